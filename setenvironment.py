@@ -88,3 +88,37 @@ forecast_basestring = api['forecast_basestring']
 image_basestring_original = api['image_basestring_original']
 image_basestring_large = api['image_basestring_large']
 personal_regObs_app_token = api['personal_regObs_app_token']
+
+# Base urls of the api's. Point these to another host, e.g. the stand-in api in tests/standinapi.py, to run offline.
+regobs_webapi_basestring = api.get('regobs_webapi_basestring', 'https://api.regobs.no/v4/')
+forecast_api_basestring = api.get('forecast_api_basestring', 'https://api01.nve.no/hydrology/forecast/')
+odata_basestring = api.get('odata_basestring', 'https://api.nve.no/hydrology/regobs/')
+
+# Set http session variables. Older config files may be missing these, so defaults are given.
+http_pool_connections = api.get('http_pool_connections', 10)
+http_pool_maxsize = api.get('http_pool_maxsize', 10)
+http_host_pool_maxsize = api.get('http_host_pool_maxsize', {})
+
+# Seconds to wait for a server to answer before the request is given up, and retried.
+request_timeout = api.get('request_timeout', 60)
+
+# Retry policy for requests. Attempts in total and backoff in seconds.
+request_retries = api.get('request_retries', 5)
+request_backoff_factor = api.get('request_backoff_factor', 0.5)
+request_backoff_max = api.get('request_backoff_max', 30)
+
+# Adaptive concurrency of batches of requests, see makesession.RequestScheduler. Rate limit is requests pr second
+# pr host, 0 for no limit.
+scheduler_max_concurrency = api.get('scheduler_max_concurrency', 20)
+scheduler_initial_concurrency = api.get('scheduler_initial_concurrency', 4)
+scheduler_rate_limit = api.get('scheduler_rate_limit', 20)
+scheduler_latency_factor = api.get('scheduler_latency_factor', 4)
+
+# Avalanche warnings valid before today are kept in a cache in local storage, so they are only requested once.
+forecast_cache = api.get('forecast_cache', True)
+# Days without warnings are only cached when older than this many days, since they may not be published yet.
+forecast_cache_grace_days = api.get('forecast_cache_grace_days', 7)
+forecast_cache_folder = local_storage + 'forecastcache/'
+
+# What observation objects keep of the raw json from the api. 'Keep', 'Drop', 'Compressed' or 'Reference'.
+original_data = api.get('original_data', 'Keep')
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the observation ingest pipeline in getobservations.
+
+The data is a season of registrations cloned from the recorded fixtures and served by the stand-in api, so runs
+are repeatable and need no network access. Every stage is timed on its own and reports records pr second and
+peak memory allocated (tracemalloc) while the stage runs:
+
+    http_paging     get_data against the stand-in api. Includes decoding the json in the responses.
+    json_decoding   json.loads of the whole season as one payload.
+    mapping         Observation(d) for every registration. Only the registration, location and observer.
+    flattening      The FlatList of all forms on all observations. This is where _get_object makes the forms.
+    to_dict         to_dict() on every form.
+    dataframe       pandas.DataFrame of the dicts.
+    json_dataframe  make_data_frame for every form type. The columns are read straight from the json.
+    process_mapping Observations with forms made in --workers processes. Only run if --workers is more than 1.
+    pickle_save     makepickle.pickle_anything of the observations.
+    pickle_load     makepickle.unpickle_anything of the same.
+
+Ex of use:
+    python tests/benchobservations.py --registrations 20000 --out results.json
+    python tests/benchobservations.py --registrations 20000 --compare results.json
+
+With --compare, stages more than --tolerance slower than in the saved results are listed and the exit code is 1.
+"""
+
+import os as os
+import sys as sys
+import gc as gc
+import json as json
+import time as time
+import argparse as argparse
+import functools as functools
+import tempfile as tempfile
+import tracemalloc as tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+from utilities import makepickle as mp
+from varsomdata import getobservations as go
+from standinapi import StandInApi, make_registrations
+
+__author__ = 'raek'
+
+SEASON_FROM_DATE = '2018-12-01'
+SEASON_TO_DATE = '2019-05-31'
+
+
+def _measure(function, repeat=1, memory=True):
+    """Runs function and returns (result, seconds, peak_bytes). Time is the best of repeat runs. Peak memory is
+    measured in a separate run, since tracemalloc slows down the code it traces."""
+
+    best_seconds = None
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+
+    peak_bytes = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        function()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result, best_seconds, peak_bytes
+
+
+def run_benchmarks(registrations_count=20000, repeat=1, memory=True, max_workers=4, latency=0., workers=1):
+    """Runs all stages and returns the results.
+
+    :param registrations_count:     [int] registrations in the season
+    :param repeat:                  [int] times each stage is timed. Best time is reported.
+    :param memory:                  [bool] if True, peak memory of each stage is measured.
+    :param max_workers:             [int] pages requested concurrently in the http_paging stage
+    :param latency:                 [float] seconds added to every response from the stand-in api
+    :param workers:                 [int] processes in the process_mapping stage
+    :return:                        [list of dict] one pr stage with stage, records, seconds,
+                                    records_pr_second and peak_mb
+    """
+
+    registrations = make_registrations(SEASON_FROM_DATE, SEASON_TO_DATE, registrations_count)
+    results = []
+
+    def add_result(stage, records, seconds, peak_bytes):
+        results.append({'stage': stage,
+                        'records': records,
+                        'seconds': round(seconds, 4),
+                        'records_pr_second': round(records / seconds) if seconds else None,
+                        'peak_mb': round(peak_bytes / 2**20, 1) if peak_bytes is not None else None})
+
+    with StandInApi(registrations=registrations, latency=latency):
+        data, seconds, peak_bytes = _measure(
+            lambda: go.get_data(SEASON_FROM_DATE, SEASON_TO_DATE, max_workers=max_workers), repeat, memory)
+    add_result('http_paging', len(data), seconds, peak_bytes)
+
+    payload = json.dumps(data)
+    data, seconds, peak_bytes = _measure(lambda: json.loads(payload), repeat, memory)
+    add_result('json_decoding', len(data), seconds, peak_bytes)
+    del payload
+
+    observations, seconds, peak_bytes = _measure(lambda: [go.Observation(d) for d in data], repeat, memory)
+    add_result('mapping', len(observations), seconds, peak_bytes)
+
+    def flatten():
+        # Forms are kept on the observations once made. Forget them, so every run makes them.
+        for o in observations:
+            o.Observations = None
+            o._forms = {}
+        return [f for o in observations for f in o.Observations]
+
+    forms, seconds, peak_bytes = _measure(flatten, repeat, memory)
+    add_result('flattening', len(forms), seconds, peak_bytes)
+
+    dicts, seconds, peak_bytes = _measure(lambda: [f.to_dict() for f in forms], repeat, memory)
+    add_result('to_dict', len(dicts), seconds, peak_bytes)
+
+    data_frame, seconds, peak_bytes = _measure(lambda: pd.DataFrame(dicts), repeat, memory)
+    add_result('dataframe', len(data_frame), seconds, peak_bytes)
+    del dicts, data_frame
+
+    # As from get_data with registration_types, only registrations with the form are given to make_data_frame.
+    data_by_type = {registration_tid: [d for d in data if d.get(form[1])]
+                    for registration_tid, form in go._form_registry.items()}
+    data_frames, seconds, peak_bytes = _measure(
+        lambda: [go.make_data_frame(d, registration_tid) for registration_tid, d in data_by_type.items()],
+        repeat, memory)
+    add_result('json_dataframe', sum(len(df) for df in data_frames), seconds, peak_bytes)
+    del data_frames
+
+    if workers > 1:
+        map_with_forms = functools.partial(go._map_observations, make_forms=True)
+        forms, seconds, peak_bytes = _measure(
+            lambda: [f for o in go._map_in_processes(map_with_forms, data, workers) for f in o.Observations],
+            repeat, memory)
+        add_result('process_mapping', len(forms), seconds, peak_bytes)
+        del forms
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        file_name = os.path.join(temp_folder, 'season.pickle')
+
+        _, seconds, peak_bytes = _measure(
+            lambda: mp.pickle_anything(observations, file_name, print_message=False), repeat, memory)
+        add_result('pickle_save', len(observations), seconds, peak_bytes)
+
+        unpickled, seconds, peak_bytes = _measure(
+            lambda: mp.unpickle_anything(file_name, print_message=False), repeat, memory)
+        add_result('pickle_load', len(unpickled), seconds, peak_bytes)
+
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Lists the stages that are slower than in the baseline by more than the tolerance.
+
+    :param results:     [list of dict] as returned by run_benchmarks
+    :param baseline:    [list of dict] as returned by run_benchmarks
+    :param tolerance:   [float] 0.2 allows a stage to be 20% slower
+    :return:            [list of strings] one line pr regression
+    """
+
+    baseline_by_stage = {b['stage']: b for b in baseline}
+    regressions = []
+
+    for r in results:
+        b = baseline_by_stage.get(r['stage'])
+        if b is None or not b['records_pr_second'] or not r['records_pr_second']:
+            continue
+        if r['records_pr_second'] < b['records_pr_second'] * (1 - tolerance):
+            regressions.append('{0}: {1} records/s, was {2} records/s'.format(
+                r['stage'], r['records_pr_second'], b['records_pr_second']))
+
+    return regressions
+
+
+def print_results(results):
+    print('{0:<15}{1:>10}{2:>12}{3:>14}{4:>10}'.format('stage', 'records', 'seconds', 'records/s', 'peak MB'))
+    for r in results:
+        print('{0:<15}{1:>10}{2:>12}{3:>14}{4:>10}'.format(
+            r['stage'], r['records'], r['seconds'], str(r['records_pr_second']), str(r['peak_mb'])))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmarks of the observation ingest pipeline.')
+    parser.add_argument('--registrations', type=int, default=20000, help='registrations in the season')
+    parser.add_argument('--repeat', type=int, default=1, help='times each stage is timed')
+    parser.add_argument('--max-workers', type=int, default=4, help='pages requested concurrently')
+    parser.add_argument('--workers', type=int, default=1, help='processes mapping in the process_mapping stage')
+    parser.add_argument('--latency', type=float, default=0., help='seconds added to every api response')
+    parser.add_argument('--no-memory', action='store_true', help='skip measuring peak memory')
+    parser.add_argument('--out', help='write the results to this json file')
+    parser.add_argument('--compare', help='compare with results in this json file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown when comparing')
+    args = parser.parse_args()
+
+    results = run_benchmarks(registrations_count=args.registrations, repeat=args.repeat,
+                             memory=not args.no_memory, max_workers=args.max_workers, latency=args.latency,
+                             workers=args.workers)
+    print_results(results)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('Regression in {0}'.format(regression))
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""A local stand-in for the regObs webapi, the avalanche and landslide forecast api's and the regObs OData KDV
+views.
+
+It replays the payloads in tests/fixtures so the client code can be tested and benchmarked without network access.
+Latency and errors may be injected to see how the client behaves against a slow or flaky api.
+
+Ex of use:
+    with StandInApi(latency=0.05, error_rate=0.1) as api:
+        observations = go.get_all_observations('2019-02-01', '2019-02-28')
+        print(api.request_count)
+
+Inside the with-block the base urls in setenvironment point at the stand-in. They are restored on exit.
+
+The fixtures are recorded from the live api's by running this file with --record. Registrations served by the
+stand-in are clones of the fixture registrations, spread out over the period given and with RegIDs of their own,
+so a season of observations may be served from a handful of recorded ones.
+"""
+
+import os as os
+import sys as sys
+import json as json
+import copy as copy
+import time as time
+import random as random
+import threading as threading
+import tempfile as tempfile
+import datetime as dt
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import setenvironment as env
+
+__author__ = 'raek'
+
+fixtures_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(file_name):
+    """Reads a json file in the fixtures folder."""
+
+    with open(os.path.join(fixtures_folder, file_name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_registrations(from_date, to_date, count, templates=None, first_reg_id=1000000):
+    """Makes registrations by cloning the recorded ones. Observation times are spread evenly over the period
+    and every clone gets a RegID of its own.
+
+    :param from_date:       [date or string]
+    :param to_date:         [date or string] inclusive
+    :param count:           [int] number of registrations
+    :param templates:       [list of dict] registrations to clone. Default the recorded ones in search.json.
+    :param first_reg_id:    [int]
+    :return:                [list of dict] sorted by DtObsTime
+    """
+
+    if templates is None:
+        templates = load_fixture('search.json')
+
+    from_date = _as_datetime(from_date)
+    to_date = _as_datetime(to_date) + dt.timedelta(days=1)
+    step = (to_date - from_date) / max(count, 1)
+
+    registrations = []
+    for i in range(count):
+        registration = copy.deepcopy(templates[i % len(templates)])
+        obs_time = from_date + step * i
+        registration['RegID'] = first_reg_id + i
+        registration['DtObsTime'] = obs_time.strftime('%Y-%m-%dT%H:%M:%S')
+        registration['DtRegTime'] = (obs_time + dt.timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%S')
+        registration['DtChangeTime'] = registration['DtRegTime']
+        registrations.append(registration)
+
+    return registrations
+
+
+def _as_datetime(date):
+    if isinstance(date, dt.datetime):
+        return date
+    if isinstance(date, dt.date):
+        return dt.datetime.combine(date, dt.time())
+    return dt.datetime.strptime(date[:10], '%Y-%m-%d')
+
+
+def _as_list(value):
+    """The client sends lists padded with None, e.g. SelectedRegions [None], when nothing is selected."""
+
+    if not isinstance(value, list):
+        value = [value]
+    return [v for v in value if v]
+
+
+def _matches(registration, search_query):
+    """Filters on the parts of the search query the client actually uses."""
+
+    reg_id = search_query.get('RegId')
+    if reg_id is not None and registration['RegID'] != reg_id:
+        return False
+
+    observer_id = search_query.get('ObserverId')
+    if observer_id is not None and registration['Observer']['ObserverID'] != observer_id:
+        return False
+
+    geohazard_tids = _as_list(search_query.get('SelectedGeoHazards'))
+    if geohazard_tids and registration['GeoHazardTID'] not in geohazard_tids:
+        return False
+
+    region_ids = _as_list(search_query.get('SelectedRegions'))
+    if region_ids and registration['ObsLocation']['ForecastRegionTID'] not in region_ids:
+        return False
+
+    # Forms are selected as {'Id': parent type, 'SubTypes': [RegistrationTID, ..]}.
+    registration_tids = [tid for r in _as_list(search_query.get('SelectedRegistrationTypes'))
+                         for tid in (r.get('SubTypes') or [r['Id']])]
+    if registration_tids and not [s for s in registration['Summaries'] if s['RegistrationTID'] in registration_tids]:
+        return False
+
+    from_date = search_query.get('FromDate')
+    if from_date and registration['DtObsTime'][:10] < from_date[:10]:
+        return False
+
+    to_date = search_query.get('ToDate')
+    if to_date and registration['DtObsTime'][:10] > to_date[:10]:
+        return False
+
+    from_change_time = search_query.get('FromDtChangeTime')
+    if from_change_time and registration['DtChangeTime'] < from_change_time:
+        return False
+
+    return True
+
+
+class StandInApi:
+    """Serves the recorded payloads on a local port in a background thread.
+
+    :param registrations:   [list of dict] served by /v4/Search. Default the recorded ones in search.json.
+    :param latency:         [float] seconds added to every response
+    :param error_rate:      [float] 0-1. Share of requests answered with error_status instead of data.
+    :param error_status:    [int] http status of the injected errors
+    :param seed:            [int] seed for the injected errors, so a run may be repeated
+    """
+
+    def __init__(self, registrations=None, latency=0., error_rate=0., error_status=502, seed=None):
+
+        if registrations is None:
+            registrations = load_fixture('search.json')
+
+        self.registrations = sorted(registrations, key=lambda r: r['DtObsTime'])
+        self.avalanche_warning = load_fixture('avalanchewarningbyregion.json')[0]
+        self.kdv = load_fixture('kdv.json')
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.request_count = 0
+        self.error_count = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._cache_folder = None
+        self._saved_env = {}
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}/'.format(self._server.server_address[1])
+
+    def start(self):
+        """Starts the server on a free port and points setenvironment at it. The forecast cache is pointed at
+        a temporary folder, so warnings from the stand-in never mix with real ones in local storage."""
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        base_strings = {'regobs_webapi_basestring': self.base_url + 'v4/',
+                        'forecast_api_basestring': self.base_url + 'forecast/',
+                        'odata_basestring': self.base_url + 'odata/'}
+
+        self._cache_folder = tempfile.TemporaryDirectory()
+        base_strings['forecast_cache_folder'] = self._cache_folder.name + '/'
+
+        for name, base_string in base_strings.items():
+            self._saved_env[name] = getattr(env, name)
+            setattr(env, name, base_string)
+
+        return self
+
+    def stop(self):
+        """Stops the server and restores the base urls and the forecast cache folder in setenvironment."""
+
+        for name, base_string in self._saved_env.items():
+            setattr(env, name, base_string)
+        self._saved_env = {}
+
+        if self._cache_folder is not None:
+            self._cache_folder.cleanup()
+            self._cache_folder = None
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _inject_error(self):
+        with self._lock:
+            self.request_count += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.error_count += 1
+                return True
+        return False
+
+    def search(self, search_query, count_only=False):
+        """Response of /v4/Search and /v4/Search/Count."""
+
+        matches = [r for r in self.registrations if _matches(r, search_query)]
+
+        if count_only:
+            return {'TotalMatches': len(matches)}
+
+        offset = search_query.get('Offset') or 0
+        number_of_records = search_query.get('NumberOfRecords') or 100
+        return matches[offset:offset + number_of_records]
+
+    def avalanche_warnings(self, region_id, lang_key, from_date, to_date):
+        """Response of AvalancheWarningByRegion/Detail. One warning pr day, made from the recorded one."""
+
+        warnings = []
+        date = _as_datetime(from_date)
+        while date <= _as_datetime(to_date):
+            warning = copy.deepcopy(self.avalanche_warning)
+            warning['RegionId'] = int(region_id)
+            warning['LangKey'] = int(lang_key)
+            warning['ValidFrom'] = date.strftime('%Y-%m-%dT00:00:00')
+            warning['ValidTo'] = date.strftime('%Y-%m-%dT23:59:59')
+            warning['PublishTime'] = (date - dt.timedelta(hours=8)).strftime('%Y-%m-%dT%H:%M:%S')
+            warnings.append(warning)
+            date += dt.timedelta(days=1)
+
+        return warnings
+
+    def landslide_warnings(self, municipality, lang_key, from_date, to_date):
+        """Response of landslide Warning/Municipality. One warning pr day, made up since there is no fixture."""
+
+        warnings = []
+        date = _as_datetime(from_date)
+        while date <= _as_datetime(to_date):
+            warnings.append({'Id': int(date.strftime('%Y%m%d')),
+                             'MunicipalityList': [{'Id': int(municipality)}],
+                             'LangKey': int(lang_key),
+                             'ActivityLevel': '1',
+                             'ValidFrom': date.strftime('%Y-%m-%dT07:00:00'),
+                             'ValidTo': (date + dt.timedelta(days=1)).strftime('%Y-%m-%dT06:59:59'),
+                             'MainText': 'Generelt lav jordskredfare.'})
+            date += dt.timedelta(days=1)
+
+        return warnings
+
+    def odata(self, view):
+        """Response of the OData KDV views."""
+
+        if view not in self.kdv:
+            return None
+
+        return {'d': {'results': self.kdv[view]}}
+
+
+def _make_handler(api):
+    """Request handler class bound to the given StandInApi."""
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _respond(self, data, status=200):
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _before(self):
+            if api.latency:
+                time.sleep(api.latency)
+
+            if api._inject_error():
+                self._respond({'Message': 'Injected error'}, status=api.error_status)
+                return False
+
+            return True
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            search_query = json.loads(self.rfile.read(length) or b'{}')
+
+            if not self._before():
+                return
+
+            path = urlparse(self.path).path.rstrip('/')
+            if path == '/v4/Search':
+                self._respond(api.search(search_query))
+            elif path == '/v4/Search/Count':
+                self._respond(api.search(search_query, count_only=True))
+            else:
+                self._respond({'Message': 'No such resource'}, status=404)
+
+        def do_GET(self):
+            if not self._before():
+                return
+
+            parts = unquote(urlparse(self.path).path).strip('/').split('/')
+
+            # forecast/avalanche/{version}/api/AvalancheWarningByRegion/Detail/{region}/{lang}/{from}/{to}
+            if parts[:2] == ['forecast', 'avalanche'] and parts[3:6] == ['api', 'AvalancheWarningByRegion', 'Detail'] \
+                    and len(parts) == 10:
+                self._respond(api.avalanche_warnings(*parts[6:10]))
+                return
+
+            # forecast/landslide/{version}/api/Warning/Municipality/{municipality}/{lang}/{from}/{to}
+            if parts[:2] == ['forecast', 'landslide'] and parts[3:6] == ['api', 'Warning', 'Municipality'] \
+                    and len(parts) == 10:
+                self._respond(api.landslide_warnings(*parts[6:10]))
+                return
+
+            # odata/{version}/OData.svc/{view}
+            if parts[:1] == ['odata'] and len(parts) == 4 and parts[2].lower() == 'odata.svc':
+                data = api.odata(parts[3])
+                if data is not None:
+                    self._respond(data)
+                    return
+
+            self._respond({'Message': 'No such resource'}, status=404)
+
+    return Handler
+
+
+def record_fixtures(from_date='2019-02-12', to_date='2019-02-12', region_id=3011,
+                    kdv_views=('AvalCauseKDV', 'DangerSignKDV', 'AvalancheDangerKDV', 'EstimatedNumKDV',
+                               'TripTypeKDV')):
+    """Records fresh fixtures from the live api's. Needs network access.
+
+    :param from_date:       [string] registrations observed in this period are recorded
+    :param to_date:         [string]
+    :param region_id:       [int] the avalanche warning recorded is for this region on from_date
+    :param kdv_views:       [list of strings] KDV views recorded
+    """
+
+    from utilities import makesession as ms
+    from varsomdata import getobservations as go
+
+    search_query = go._make_search_query(from_date=from_date, to_date=to_date, records_requested=100)
+    registrations = ms.request_json('POST', env.regobs_webapi_basestring + 'Search', json=search_query)
+
+    warning_url = '{0}avalanche/{1}/api/AvalancheWarningByRegion/Detail/{2}/1/{3}/{3}'.format(
+        env.forecast_api_basestring, env.forecast_api_version, region_id, from_date)
+    avalanche_warnings = ms.request_json('GET', warning_url)
+
+    kdv = {}
+    for view in kdv_views:
+        kdv_url = '{0}{1}/OData.svc/{2}?$filter=LangKey%20eq%201&$format=json'.format(
+            env.odata_basestring, env.odata_version, view)
+        kdv[view] = ms.request_json('GET', kdv_url)['d']['results']
+
+    for file_name, data in [('search.json', registrations),
+                            ('avalanchewarningbyregion.json', avalanche_warnings),
+                            ('kdv.json', kdv)]:
+        with open(os.path.join(fixtures_folder, file_name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        print('standinapi.py -> record_fixtures: Wrote {0}'.format(file_name))
+
+
+if __name__ == "__main__":
+
+    if '--record' in sys.argv:
+        record_fixtures()
+
+    else:
+        with StandInApi() as stand_in:
+            print('standinapi.py: Serving on {0}. Ctrl-C to stop.'.format(stand_in.base_url))
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
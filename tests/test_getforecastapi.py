@@ -0,0 +1,152 @@
+import datetime as dt
+import os as os
+import unittest as ut
+import setenvironment as env
+from standinapi import StandInApi
+from varsomdata import getforecastapi as gfa
+
+
+class TestForecastOffline(ut.TestCase):
+
+    def test_get_avalanche_warnings(self):
+        with StandInApi():
+            warnings = gfa.get_avalanche_warnings([3011, 3010], dt.date(2019, 1, 1), dt.date(2019, 3, 15))
+
+        self.assertEqual(len(warnings), 2 * 74)
+        self.assertEqual(warnings[0].date_valid, dt.date(2019, 1, 1))
+
+    def test_forecast_cache(self):
+        with StandInApi() as api:
+            warnings = gfa.get_avalanche_warnings_as_json(3011, dt.date(2019, 1, 1), dt.date(2019, 3, 15))
+            request_count = api.request_count
+            cached_warnings = gfa.get_avalanche_warnings_as_json(3011, dt.date(2019, 1, 1), dt.date(2019, 3, 15))
+            self.assertEqual(api.request_count, request_count)
+
+            # Only the days missing in the cache are requested, here the 16th to the 20th of March.
+            longer_warnings = gfa.get_avalanche_warnings_as_json(3011, dt.date(2019, 1, 1), dt.date(2019, 3, 20))
+            self.assertEqual(api.request_count, request_count + 1)
+
+        self.assertEqual(cached_warnings, warnings)
+        self.assertEqual(longer_warnings[:len(warnings)], warnings)
+        self.assertEqual(len(longer_warnings), len(warnings) + 5)
+
+    def test_unreadable_forecast_cache(self):
+        with StandInApi() as api:
+            warnings = gfa.get_avalanche_warnings_as_json(3011, dt.date(2019, 1, 1), dt.date(2019, 1, 10))
+            cache_file = gfa._forecast_cache_file(env.forecast_api_version, 3011, 1, 2019)
+
+            # E.g. left half written by an older version, which wrote the cache in place.
+            with open(cache_file, 'r+b') as f:
+                f.truncate(os.path.getsize(cache_file) // 2)
+
+            request_count = api.request_count
+            with self.assertLogs(level='WARNING'):
+                warnings_again = gfa.get_avalanche_warnings_as_json(3011, dt.date(2019, 1, 1), dt.date(2019, 1, 10))
+            self.assertEqual(api.request_count, request_count + 1)
+
+            self.assertEqual(warnings_again, warnings)
+            self.assertEqual(len(gfa._read_forecast_cache(cache_file)), 10)
+            self.assertEqual(os.listdir(env.forecast_cache_folder), [os.path.basename(cache_file)])
+
+    def test_days_without_warnings_are_asked_for_again(self):
+        forecast_cache_grace_days = env.forecast_cache_grace_days
+
+        try:
+            with StandInApi() as api:
+                avalanche_warnings = api.avalanche_warnings
+
+                def not_published_on_january_5(region_id, lang_key, from_date, to_date):
+                    return [w for w in avalanche_warnings(region_id, lang_key, from_date, to_date)
+                            if not w['ValidFrom'].startswith('2019-01-05')]
+
+                # January 2019 is made recent, i.e. within the grace period.
+                env.forecast_cache_grace_days = (dt.date.today() - dt.date(2019, 1, 1)).days + 1
+                api.avalanche_warnings = not_published_on_january_5
+                warnings = gfa.get_avalanche_warnings_as_json(3011, dt.date(2019, 1, 1), dt.date(2019, 1, 10))
+
+                # Published now. Only the day without warnings is requested again.
+                del api.avalanche_warnings
+                request_count = api.request_count
+                published_warnings = gfa.get_avalanche_warnings_as_json(3011, dt.date(2019, 1, 1),
+                                                                        dt.date(2019, 1, 10))
+                self.assertEqual(api.request_count, request_count + 1)
+
+                # Once older than the grace period, a day without warnings is cached.
+                env.forecast_cache_grace_days = 7
+                api.avalanche_warnings = not_published_on_january_5
+                gfa.get_avalanche_warnings_as_json(3010, dt.date(2019, 1, 1), dt.date(2019, 1, 10))
+                request_count = api.request_count
+                other_warnings = gfa.get_avalanche_warnings_as_json(3010, dt.date(2019, 1, 1), dt.date(2019, 1, 10))
+                self.assertEqual(api.request_count, request_count)
+        finally:
+            env.forecast_cache_grace_days = forecast_cache_grace_days
+
+        self.assertEqual(len(warnings), 9)
+        self.assertEqual(len(published_warnings), 10)
+        self.assertEqual(len(other_warnings), 9)
+
+    def test_warnings_in_more_languages(self):
+        with StandInApi() as api:
+            warnings = gfa.get_avalanche_warnings_deprecated([3011, 3010], dt.date(2019, 1, 1), dt.date(2019, 1, 10),
+                                                             lang_key=[1, 2])
+            avalanche_warnings = gfa.get_avalanche_warnings(3011, dt.date(2019, 1, 1), dt.date(2019, 1, 20),
+                                                            lang_key=[1, 2])
+
+        self.assertEqual(len(warnings), 2 * 10)
+        self.assertEqual(api.request_count, 2 * 2 + 2)
+        self.assertTrue(all(w.main_message_no and w.main_message_en for w in warnings))
+        self.assertEqual(list(avalanche_warnings[-1].main_texts), [1, 2])
+
+    def test_warning_missing_in_a_language(self):
+        with StandInApi() as api:
+            avalanche_warnings = api.avalanche_warnings
+
+            def english_except_on_january_5(region_id, lang_key, from_date, to_date):
+                warnings = avalanche_warnings(region_id, lang_key, from_date, to_date)
+                if lang_key == '2':
+                    warnings = [w for w in warnings if not w['ValidFrom'].startswith('2019-01-05')]
+                    for w in warnings:
+                        w['MainText'] = 'English {0}'.format(w['ValidFrom'][0:10])
+                return warnings
+
+            api.avalanche_warnings = english_except_on_january_5
+
+            warnings = gfa.get_avalanche_warnings_deprecated(3011, dt.date(2019, 1, 1), dt.date(2019, 1, 10),
+                                                             lang_key=[1, 2])
+            avalanche_warnings_ = gfa.get_avalanche_warnings(3011, dt.date(2019, 1, 1), dt.date(2019, 1, 10),
+                                                             lang_key=[1, 2])
+
+        warnings_by_date = {w.date: w for w in warnings}
+        self.assertEqual(len(warnings), 10)
+        self.assertEqual(warnings_by_date[dt.date(2019, 1, 3)].main_message_en, 'English 2019-01-03')
+        self.assertIsNone(warnings_by_date[dt.date(2019, 1, 5)].main_message_en)
+        self.assertTrue(warnings_by_date[dt.date(2019, 1, 5)].main_message_no)
+        self.assertNotEqual(warnings_by_date[dt.date(2019, 1, 3)].main_message_no, 'English 2019-01-03')
+
+        main_texts_by_date = {w.date_valid: w.main_texts for w in avalanche_warnings_}
+        self.assertEqual(list(main_texts_by_date[dt.date(2019, 1, 5)]), [1])
+        self.assertEqual(main_texts_by_date[dt.date(2019, 1, 6)][2], 'English 2019-01-06')
+
+    def test_get_avalanche_warnings_grouped(self):
+        with StandInApi():
+            warnings = gfa.get_avalanche_warnings([3011, 3010], dt.date(2019, 1, 1), dt.date(2019, 3, 15))
+            grouped_warnings = gfa.get_avalanche_warnings([3011, 3010], dt.date(2019, 1, 1), dt.date(2019, 3, 15),
+                                                          grouped=True)
+
+        self.assertEqual(sorted(grouped_warnings), [3010, 3011])
+        self.assertEqual(list(grouped_warnings[3011]), [w.date_valid for w in warnings if w.region_id == 3011])
+        self.assertEqual(grouped_warnings[3010][dt.date(2019, 2, 1)].region_id, 3010)
+
+    def test_get_landslide_warnings(self):
+        with StandInApi(error_rate=0.2, seed=2) as api:
+            warnings = gfa.get_landslide_warnings_as_json([1201, 1235, 1804], '2018-01-01', '2018-07-01',
+                                                          recursive_count=20)
+
+        self.assertEqual(len(warnings), 3 * 182)
+        self.assertEqual([w['MunicipalityList'][0]['Id'] for w in warnings[::182]], [1201, 1235, 1804])
+        self.assertEqual([w['ValidFrom'] for w in warnings[:182]], sorted(w['ValidFrom'] for w in warnings[:182]))
+        self.assertGreater(api.error_count, 0)
+
+
+if __name__ == '__main__':
+    ut.main()
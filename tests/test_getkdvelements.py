@@ -0,0 +1,27 @@
+import tempfile as tempfile
+import unittest as ut
+import setenvironment as env
+from standinapi import StandInApi
+from varsomdata import getkdvelements as gkdv
+
+
+class TestGetKdvOffline(ut.TestCase):
+
+    def setUp(self):
+        self.temp_folder = tempfile.TemporaryDirectory()
+        self.local_storage = env.local_storage
+        env.local_storage = self.temp_folder.name + '/'
+
+    def tearDown(self):
+        env.local_storage = self.local_storage
+        self.temp_folder.cleanup()
+
+    def test_get_kdv(self):
+        with StandInApi():
+            danger_sign_kdv = gkdv.get_kdv('DangerSignKDV')
+
+        self.assertEqual(danger_sign_kdv[3].Name, 'Drønn i snøpakken')
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -1,6 +1,18 @@
+import copyreg as copyreg
+import datetime as dt
+import json as json
+import os as os
+import pickle as pickle
+import sys as sys
+import tempfile as tempfile
 import unittest as ut
-from varsomdata import getobservations as go
+from unittest import mock
+import numpy as np
 import pandas as pd
+import setenvironment as env
+from dateutil.parser import parse as parse
+from standinapi import StandInApi, make_registrations
+from varsomdata import getobservations as go
 
 
 class TestGetSingeFormsMethods(ut.TestCase):
@@ -158,5 +170,426 @@ class TestGetSingeFormsMethods(ut.TestCase):
         self.assertIsInstance(land_slides_df, pd.DataFrame)
 
 
+class TestGetObservationsOffline(ut.TestCase):
+
+    def setUp(self):
+        self.registrations = make_registrations('2019-02-01', '2019-02-28', 250)
+        self.api = StandInApi(registrations=self.registrations).start()
+
+    def tearDown(self):
+        self.api.stop()
+
+    def test_get_count(self):
+        self.assertEqual(go.get_count('2019-02-01', '2019-02-28'), 250)
+        self.assertEqual(go.get_count('2019-02-01', '2019-02-28', geohazard_tids=70), 50)
+
+    def test_get_data_pages(self):
+        data = go.get_data('2019-02-01', '2019-02-28', max_workers=3)
+        self.assertEqual([d['RegID'] for d in data], [r['RegID'] for r in self.registrations])
+
+    def test_get_data_reg_ids(self):
+        data = go.get_data(reg_ids=[1000003, 1000007])
+        self.assertEqual(sorted(d['RegID'] for d in data), [1000003, 1000007])
+
+    def test_iter_data_pages_in_order(self):
+        data = list(go.iter_data('2019-02-01', '2019-02-28', max_workers=3))
+        observations = list(go.iter_observations('2019-02-01', '2019-02-28', max_workers=3))
+        self.assertEqual([d['RegID'] for d in data], [r['RegID'] for r in self.registrations])
+        self.assertEqual([o.RegID for o in observations], [r['RegID'] for r in self.registrations])
+
+    def test_iter_data_yields_each_registration_once(self):
+        reg_ids = [r['RegID'] for r in self.registrations[:3]]
+        data = list(go.iter_data(reg_ids=reg_ids + reg_ids[:2]))
+        self.assertEqual([d['RegID'] for d in data], reg_ids)
+
+        # A registration found both by its RegID and by its observer is given once.
+        observer_id = self.registrations[0]['Observer']['ObserverID']
+        data = list(go.iter_data(reg_ids=reg_ids[:1] + [None], observer_ids=observer_id))
+        self.assertEqual(data, go.get_data(reg_ids=reg_ids[:1] + [None], observer_ids=observer_id))
+        self.assertEqual(len(data), len(set(d['RegID'] for d in data)))
+
+    def test_iter_data_raises_failed_page(self):
+        request_retries = env.request_retries
+        env.request_retries = 1
+
+        # The count and the first page are answered. The pages after fail.
+        def fail_after_first_page():
+            self.api.request_count += 1
+            return self.api.request_count > 2
+
+        self.api._inject_error = fail_after_first_page
+        data = []
+
+        try:
+            with self.assertRaises(Exception):
+                for d in go.iter_data('2019-02-01', '2019-02-28', max_workers=1):
+                    data.append(d)
+        finally:
+            env.request_retries = request_retries
+
+        self.assertEqual([d['RegID'] for d in data], [r['RegID'] for r in self.registrations[:100]])
+
+    def test_get_all_observations(self):
+        observations = go.get_all_observations('2019-02-01', '2019-02-10', geohazard_tids=10)
+        observations_df = go.get_danger_sign('2019-02-01', '2019-02-10', output='DataFrame')
+        self.assertTrue(all(o.GeoHazardTID == 10 for o in observations))
+        self.assertIsInstance(observations_df, pd.DataFrame)
+
+    def test_data_frame_from_json(self):
+        for registration_tid in go._form_registry:
+            data = go.get_data('2019-02-01', '2019-02-28', registration_types=registration_tid)
+            forms = sorted([f for d in data for f in go._get_object(registration_tid, d)], key=lambda f: f.DtObsTime)
+            if forms:
+                pd.testing.assert_frame_equal(go.make_data_frame(data, registration_tid),
+                                              pd.DataFrame([f.to_dict() for f in forms]))
+
+    def test_workers(self):
+        forms = go.get_all_observations('2019-02-01', '2019-02-10', output='FlatList')
+        forms_from_workers = go.get_all_observations('2019-02-01', '2019-02-10', output='FlatList', workers=2)
+        self.assertEqual([f.to_dict() for f in forms_from_workers], [f.to_dict() for f in forms])
+
+        danger_signs = go.get_danger_sign('2019-02-01', '2019-02-10')
+        danger_signs_from_workers = go.get_danger_sign('2019-02-01', '2019-02-10', workers=2)
+        self.assertEqual([f.to_dict() for f in danger_signs_from_workers], [f.to_dict() for f in danger_signs])
+        self.assertEqual(len(danger_signs), len([f for f in forms if f.RegistrationTID == 13]))
+
+        # 'List' is mapped in this process, with the forms left to be made when asked for.
+        observations = go.get_all_observations('2019-02-01', '2019-02-10', workers=2)
+        self.assertTrue(all(o._Observations is None for o in observations))
+
+    def test_names_are_interned(self):
+        observations = go.get_all_observations('2019-02-01', '2019-02-28', geohazard_tids=10)
+        danger_signs = [f for o in observations for f in o.get_forms(13)]
+        region_names = [o.ForecastRegionName for o in observations]
+        danger_sign_names = [f.DangerSignName for f in danger_signs]
+        self.assertEqual(len(set(map(id, region_names))), len(set(region_names)))
+        self.assertEqual(len(set(map(id, danger_sign_names))), len(set(danger_sign_names)))
+
+    def test_json_is_not_changed_by_interning(self):
+        registration = [r for r in self.registrations if r['DangerObs']][0]
+        d = json.loads(json.dumps(registration))
+        region_name = d['ObsLocation']['ForecastRegionName']
+        danger_sign_name = d['DangerObs'][0]['DangerSignName']
+
+        # Interned copies that are other objects than the names in the json.
+        interned_region_name = sys.intern(region_name.encode().decode())
+        interned_danger_sign_name = sys.intern(danger_sign_name.encode().decode())
+        self.assertIsNot(interned_region_name, region_name)
+        self.assertIsNot(interned_danger_sign_name, danger_sign_name)
+
+        observation = go.Observation(d)
+        danger_sign = observation.get_forms(13)[0]
+        self.assertIs(observation.ForecastRegionName, interned_region_name)
+        self.assertIs(danger_sign.DangerSignName, interned_danger_sign_name)
+        self.assertIs(d['ObsLocation']['ForecastRegionName'], region_name)
+        self.assertIs(d['DangerObs'][0]['DangerSignName'], danger_sign_name)
+        self.assertEqual(d, registration)
+
+    def test_to_records(self):
+        forms = go.get_all_observations('2019-02-01', '2019-02-28', output='FlatList')
+        records = go.to_records(forms)
+        geohazard_tids, counts = np.unique(records['GeoHazardTID'], return_counts=True)
+        self.assertEqual(dict(zip(geohazard_tids.tolist(), counts.tolist())),
+                         {g: len([f for f in forms if f.GeoHazardTID == g])
+                          for g in set(f.GeoHazardTID for f in forms)})
+        self.assertEqual(records['DtObsTime'][-1], np.datetime64(forms[-1].DtObsTime, 's'))
+
+    def test_profile_layers(self):
+        profiles = go.get_snow_profile('2019-02-01', '2019-02-28')
+        layers = go.ProfileLayers(profiles)
+        self.assertEqual(len(layers.RegIDs), len(profiles))
+        self.assertEqual(np.bincount(layers.StratProfile['Profile'], minlength=len(profiles)).tolist(),
+                         [len(p.StratProfile) for p in profiles])
+        self.assertEqual(layers.SnowTemp['SnowTemp'].tolist(), [l.SnowTemp for p in profiles for l in p.SnowTemp])
+
+    def test_original_data(self):
+        kept = go.get_all_observations('2019-02-01', '2019-02-05', original_data='Keep')
+        dropped = go.get_all_observations('2019-02-01', '2019-02-05', original_data='Drop')
+        compressed = go.get_all_observations('2019-02-01', '2019-02-05', original_data='Compressed')
+        referenced = go.get_all_observations('2019-02-01', '2019-02-05', original_data='Reference')
+        self.assertIsNone(dropped[0].Observations[0].OriginalData)
+        self.assertEqual(compressed[0].Observations[0].OriginalData, kept[0].OriginalData)
+        self.assertEqual(referenced[0].Observations[0].OriginalData, kept[0].OriginalData)
+
+    def test_original_data_drops_json(self):
+        kept = go.get_all_observations('2019-02-01', '2019-02-05', original_data='Keep')
+        compressed = go.get_all_observations('2019-02-01', '2019-02-05', original_data='Compressed')
+        self.assertTrue(all(o._Observations is None for o in compressed))
+
+        # Forms made later from the compressed json get the option too.
+        forms = [f for o in compressed for f in o.Observations]
+        self.assertEqual([f.to_dict() for f in forms], [f.to_dict() for o in kept for f in o.Observations])
+        self.assertEqual(forms[0].OriginalData, kept[0].OriginalData)
+
+        for original_data in ['Drop', 'Reference']:
+            observations = go.get_all_observations('2019-02-01', '2019-02-05', original_data=original_data)
+            self.assertTrue(all(o._form_data is None for o in observations))
+            self.assertLess(len(pickle.dumps(observations)), len(pickle.dumps(compressed)) * 0.9)
+
+            request_count = self.api.request_count
+            forms = [f for o in observations for f in o.Observations]
+            pictures = [p for f in forms for p in getattr(f, 'Pictures', [])]
+            self.assertEqual(self.api.request_count, request_count)
+            self.assertTrue(all(f.Pictures._attachments is None for f in forms if hasattr(f, 'Pictures')))
+
+            self.assertEqual([f.to_dict() for f in forms], [f.to_dict() for o in kept for f in o.Observations])
+            self.assertTrue(pictures)
+            if original_data == 'Drop':
+                self.assertTrue(all(f.OriginalData is None for f in forms))
+                self.assertTrue(all(p.OriginalData is None for p in pictures))
+            else:
+                self.assertEqual(pictures[0].OriginalData['PictureID'], pictures[0].PictureID)
+
+
+class TestFlakyApiOffline(ut.TestCase):
+
+    def test_errors_are_retried(self):
+        request_retries = env.request_retries
+        request_backoff_factor = env.request_backoff_factor
+        env.request_retries, env.request_backoff_factor = 20, 0.
+
+        try:
+            registrations = make_registrations('2019-02-01', '2019-02-28', 500)
+            with StandInApi(registrations=registrations, latency=0.01, error_rate=0.3, seed=1) as api:
+                data = go.get_data('2019-02-01', '2019-02-28', max_workers=4)
+        finally:
+            env.request_retries, env.request_backoff_factor = request_retries, request_backoff_factor
+
+        self.assertEqual(len(data), 500)
+        self.assertGreater(api.error_count, 0)
+
+    def test_failed_shards_are_raised(self):
+        local_storage = env.local_storage
+        request_retries = env.request_retries
+        request_backoff_factor = env.request_backoff_factor
+
+        with tempfile.TemporaryDirectory() as temp_folder:
+            env.local_storage = temp_folder + '/'
+            env.request_retries, env.request_backoff_factor = 1, 0.
+            registrations = make_registrations('2019-02-01', '2019-02-28', 300)
+
+            try:
+                with StandInApi(registrations=registrations, error_rate=0.5, seed=3) as api:
+                    with self.assertRaises(RuntimeError):
+                        go.get_data('2019-02-01', '2019-02-28', shard_days=7)
+                    shard_folders = os.listdir(temp_folder + '/shards')
+                    self.assertEqual(len(shard_folders), 1)
+
+                    # The same call resumes with the shards that failed.
+                    api.error_rate = 0.
+                    request_count = api.request_count
+                    data = go.get_data('2019-02-01', '2019-02-28', shard_days=7)
+                    resumed_request_count = api.request_count - request_count
+            finally:
+                env.local_storage = local_storage
+                env.request_retries, env.request_backoff_factor = request_retries, request_backoff_factor
+
+            self.assertEqual([d['RegID'] for d in data], [r['RegID'] for r in registrations])
+            self.assertLess(resumed_request_count, 4 * 2)
+            self.assertEqual(os.listdir(temp_folder + '/shards'), [])
+
+
+    def test_resume_with_shard_size(self):
+        local_storage = env.local_storage
+        request_retries = env.request_retries
+
+        with tempfile.TemporaryDirectory() as temp_folder:
+            env.local_storage = temp_folder + '/'
+            env.request_retries = 1
+
+            try:
+                with StandInApi(registrations=make_registrations('2019-02-01', '2019-02-28', 300)) as api:
+                    # The count is answered, the shards fail.
+                    def fail_after_count():
+                        api.request_count += 1
+                        return api.request_count > 1
+
+                    api._inject_error = fail_after_count
+                    with self.assertRaises(RuntimeError):
+                        go.get_data('2019-02-01', '2019-02-28', shard_size=75)
+
+                    # More registrations give another count, but the pull resumes in the same folder.
+                    del api._inject_error
+                    api.registrations += make_registrations('2019-02-01', '2019-02-28', 300, first_reg_id=2000000)
+                    data = go.get_data('2019-02-01', '2019-02-28', shard_size=75)
+            finally:
+                env.local_storage = local_storage
+                env.request_retries = request_retries
+
+            self.assertEqual(len(data), 600)
+            self.assertEqual(os.listdir(temp_folder + '/shards'), [])
+
+    def test_shards_reaching_today_are_not_stored(self):
+        today = dt.date.today()
+        past_shard = (today - dt.timedelta(days=2), today - dt.timedelta(days=1))
+        today_shard = (today, today)
+        periods_requested = []
+
+        def get_period(from_date, to_date, raise_errors=False):
+            periods_requested.append((from_date, to_date))
+            if len(periods_requested) == 2:
+                raise ValueError('Today failed')
+            return [{'RegID': len(periods_requested)}]
+
+        with tempfile.TemporaryDirectory() as temp_folder:
+            shard_folder = temp_folder + '/shards/'
+            with self.assertRaises(RuntimeError):
+                go._get_shards(get_period, [past_shard, today_shard], shard_folder, 1)
+            self.assertEqual(os.listdir(shard_folder), ['{0}_{1}.pickle'.format(*past_shard)])
+
+            data = go._get_shards(get_period, [past_shard, today_shard], shard_folder, 1)
+
+        self.assertEqual(periods_requested, [past_shard, today_shard, today_shard])
+        self.assertEqual(data, [{'RegID': 1}, {'RegID': 3}])
+
+
+class _BaselinePickle:
+    """Pickles as the classes did before they got __slots__, i.e. with the attributes in a plain dict."""
+
+    def __init__(self, o):
+        self.o = o
+
+    def __reduce__(self):
+        return copyreg._reconstructor, (type(self.o), object, None), _baseline_state(self.o)
+
+
+def _baseline_state(o):
+    state = {}
+    for cls in type(o).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if name in ('__dict__', '_forms', '_form_data', '_retention'):
+                continue
+            # E.g. OriginalData and Observations were plain attributes before they became properties.
+            public_name = name.lstrip('_')
+            value = getattr(o, public_name)
+            if public_name == 'Observations':
+                value = [_BaselinePickle(form) for form in value]
+            elif public_name == 'Pictures':
+                value = list(value)
+            state[public_name] = value
+    return state
+
+
+class TestBaselinePicklesOffline(ut.TestCase):
+
+    def test_unpickle_baseline_observation(self):
+        registration = make_registrations('2019-02-01', '2019-02-28', 1)[0]
+        observation = go.Observation(registration)
+        unpickled = pickle.loads(pickle.dumps(_BaselinePickle(observation)))
+
+        self.assertIsInstance(unpickled, go.Observation)
+        self.assertEqual(unpickled.RegID, observation.RegID)
+        self.assertEqual(unpickled.DtObsTime, observation.DtObsTime)
+        self.assertEqual(unpickled.NickName, observation.NickName)
+        self.assertEqual(unpickled.OriginalData, registration)
+        self.assertEqual([type(o) for o in unpickled.Observations], [type(o) for o in observation.Observations])
+        self.assertEqual(len(unpickled.get_forms(13)), len(observation.get_forms(13)))
+
+        for unpickled_form, form in zip(unpickled.Observations, observation.Observations):
+            self.assertEqual(_baseline_state(unpickled_form).keys(), _baseline_state(form).keys())
+            self.assertEqual(unpickled_form.RegistrationTID, form.RegistrationTID)
+            self.assertEqual(unpickled_form.Summary, form.Summary)
+            self.assertEqual(len(unpickled_form.Pictures), len(form.Pictures))
+
+    def test_unpickle_baseline_form(self):
+        registration = make_registrations('2019-02-01', '2019-02-28', 1)[0]
+        form = go.Observation(registration).get_forms(13)[0]
+        unpickled = pickle.loads(pickle.dumps(_BaselinePickle(form)))
+
+        self.assertIsInstance(unpickled, type(form))
+        self.assertFalse(unpickled.__dict__)
+        self.assertEqual(unpickled.DangerSignName, form.DangerSignName)
+        self.assertEqual(unpickled.OriginalData, registration)
+
+
+class _Trip:
+    def __init__(self, d, i):
+        self.RegID = int(d['RegID'])
+        self.Destination = d['Trips'][i]
+
+
+class TestFormRegistryOffline(ut.TestCase):
+
+    def setUp(self):
+        self.registration = make_registrations('2019-02-01', '2019-02-28', 1)[0]
+        self.registration['Trips'] = ['Tromsdalstinden', 'Fløya']
+
+    def test_registered_form(self):
+        go.register_form(99, _Trip, 'Trips', list_key='Trips')
+        self.addCleanup(go._form_registry.pop, 99)
+
+        trips = go._get_object(99, self.registration)
+        self.assertEqual([type(t) for t in trips], [_Trip, _Trip])
+        self.assertEqual([t.Destination for t in trips], ['Tromsdalstinden', 'Fløya'])
+
+        observation = go.Observation(self.registration)
+        self.assertEqual([t.Destination for t in observation.get_forms(99)], ['Tromsdalstinden', 'Fløya'])
+        self.assertEqual([t.Destination for t in observation.Observations[-2:]], ['Tromsdalstinden', 'Fløya'])
+
+    def test_unknown_form_warns_once(self):
+        self.addCleanup(go._unknown_registration_tids.discard, 98)
+
+        with self.assertLogs(level='WARNING') as logs:
+            for registration in make_registrations('2019-02-01', '2019-02-28', 5):
+                self.assertEqual(go._get_object(98, registration), [])
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('98', logs.records[0].getMessage())
+
+
+class TestPictureListOffline(ut.TestCase):
+
+    def setUp(self):
+        self.attachments = [{'PictureID': picture_id, 'Photographer': 'Ragnar', 'Copyright': 'NVE', 'Aspect': 180,
+                             'GeoHazardTID': 10, 'GeoHazardName': 'Snø', 'RegistrationTID': registration_tid,
+                             'RegistrationName': 'Faretegn', 'Comment': ''}
+                            for picture_id, registration_tid in [(1, 13), (2, 21), (3, 13), (4, 23)]]
+
+    def test_len_does_not_make_pictures(self):
+        pictures = go._PictureList(self.attachments, 13)
+
+        with mock.patch.object(go, 'Picture', wraps=go.Picture) as picture_class:
+            self.assertEqual(len(pictures), 2)
+            self.assertEqual(len(go._PictureList(self.attachments, 36)), 1)
+            picture_class.assert_not_called()
+
+            self.assertEqual([p.PictureID for p in pictures], [1, 3])
+            self.assertEqual(picture_class.call_count, 2)
+
+        self.assertEqual(len(pictures), 2)
+        self.assertIsInstance(pictures[0], go.Picture)
+
+    def test_list_operations(self):
+        pictures = go._PictureList(self.attachments, 13)
+        pictures.append(go.Picture(self.attachments[1]))
+        del pictures[0]
+
+        self.assertEqual([p.PictureID for p in pictures], [3, 2])
+        self.assertTrue(pictures)
+        self.assertFalse(go._PictureList(self.attachments, 10))
+
+
+class TestParseStringtimeOffline(ut.TestCase):
+
+    def test_same_as_dateutil(self):
+        stringtimes = ['2019-02-01T12:30:15',
+                       '2019-02-01T12:30:15.1234567',
+                       '2019-02-01T12:30:15.123456789Z',
+                       '2019-02-01T12:30:15.12',
+                       '2019-02-01T12:30:15Z',
+                       '2019-02-01T12:30:15+01:00',
+                       '2019-02-01T12:30:15-0230',
+                       '2019-02-01T12:30+0100',
+                       '2019-02-01',
+                       '2019-02-01 12:30:15',
+                       '2019-02-01 12:30:15.5+01:00']
+
+        for stringtime in stringtimes:
+            expected = parse(stringtime)
+            parsed = go._parse_stringtime(stringtime)
+            self.assertEqual(parsed, expected, stringtime)
+            self.assertEqual(parsed.utcoffset(), expected.utcoffset(), stringtime)
+
+
 if __name__ == '__main__':
     ut.main()
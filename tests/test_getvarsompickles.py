@@ -0,0 +1,75 @@
+import os as os
+import copy as copy
+import tempfile as tempfile
+import unittest as ut
+from unittest import mock
+import setenvironment as env
+from standinapi import StandInApi, make_registrations
+from varsomdata import getvarsompickles as gvp
+from utilities import makepickle as mp
+
+
+class TestIncrementalSyncOffline(ut.TestCase):
+
+    def setUp(self):
+        self.temp_folder = tempfile.TemporaryDirectory()
+        self.local_storage = env.local_storage
+        env.local_storage = self.temp_folder.name + '/'
+
+        # The pickles of the current season are the ones synced, so 2018-19 is made the current season.
+        self.season_patch = mock.patch.object(gvp.gm, 'get_season_from_date', return_value='2018-19')
+        self.season_patch.start()
+
+        self.registrations = make_registrations('2019-02-01', '2019-02-10', 120)
+        self.file_name_list = '{0}all_observations_list_2018-19_lk1.pickle'.format(env.local_storage)
+
+    def tearDown(self):
+        self.season_patch.stop()
+        env.local_storage = self.local_storage
+        self.temp_folder.cleanup()
+
+    def _make_outdated(self):
+        os.utime(self.file_name_list, (0, 0))
+
+    def test_changed_is_replaced_and_new_is_appended(self):
+        with StandInApi(registrations=self.registrations) as api:
+            gvp.get_all_observations('2018-19', incremental=True, max_workers=2)
+            self._make_outdated()
+
+            changed = api.registrations[5]
+            changed['DtChangeTime'] = '2019-03-01T12:00:00'
+            changed['Observer']['NickName'] = 'Endret'
+            new = copy.deepcopy(api.registrations[0])
+            new.update({'RegID': 2000000, 'DtChangeTime': '2019-03-01T12:00:00'})
+            api.registrations.append(new)
+
+            request_count = api.request_count
+            observations = gvp.get_all_observations('2018-19', incremental=True, max_workers=2)
+            sync_request_count = api.request_count - request_count
+
+        self.assertEqual(len(observations), len(self.registrations) + 1)
+        self.assertEqual(observations[5].RegID, changed['RegID'])
+        self.assertEqual(observations[5].NickName, 'Endret')
+        self.assertEqual(observations[-1].RegID, 2000000)
+        self.assertEqual(sync_request_count, 2)
+
+    def test_failed_sync_leaves_pickles(self):
+        request_retries = env.request_retries
+        env.request_retries = 1
+
+        try:
+            with StandInApi(registrations=self.registrations) as api:
+                stored_observations = gvp.get_all_observations('2018-19', incremental=True, max_workers=2)
+                self._make_outdated()
+                api.error_rate = 1.
+                observations = gvp.get_all_observations('2018-19', incremental=True, max_workers=2)
+        finally:
+            env.request_retries = request_retries
+
+        self.assertEqual(os.path.getmtime(self.file_name_list), 0)
+        self.assertEqual([o.RegID for o in observations], [o.RegID for o in stored_observations])
+        self.assertEqual(len(mp.unpickle_anything(self.file_name_list)), len(self.registrations))
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,69 @@
+import datetime as dt
+import time as time
+import unittest as ut
+import setenvironment as env
+from standinapi import StandInApi
+from utilities import makesession as ms
+from varsomdata import getforecastapi as gfa
+
+
+class TestRequestSchedulerOffline(ut.TestCase):
+
+    def test_errors_halve_concurrency(self):
+        request_backoff_factor = env.request_backoff_factor
+        env.request_backoff_factor = 0.
+
+        try:
+            scheduler = ms.RequestScheduler(max_concurrency=8, initial_concurrency=8, rate_limit=0, retries=20)
+            with StandInApi(error_rate=0.3, seed=1) as api:
+                warnings = gfa.get_avalanche_warnings_as_json(list(range(3003, 3013)), dt.date(2019, 1, 1),
+                                                              dt.date(2019, 3, 31), scheduler=scheduler)
+        finally:
+            env.request_backoff_factor = request_backoff_factor
+
+        self.assertEqual(len(warnings), 10 * 90)
+        self.assertGreater(api.error_count, 0)
+        self.assertLess(scheduler.concurrency, 8)
+
+    def test_rate_limit(self):
+        scheduler = ms.RequestScheduler(max_concurrency=4, rate_limit=50)
+        with StandInApi() as api:
+            start = dt.datetime.now()
+            scheduler.request_json_all('GET', [api.base_url + 'odata/v3.2.0/OData.svc/DangerSignKDV'] * 26)
+            seconds = (dt.datetime.now() - start).total_seconds()
+
+        self.assertGreaterEqual(seconds, 0.5)
+        self.assertEqual(api.request_count, 26)
+
+    def test_timeouts_are_retried(self):
+        request_timeout = env.request_timeout
+        request_backoff_factor = env.request_backoff_factor
+        env.request_timeout, env.request_backoff_factor = 0.2, 0.
+
+        try:
+            with StandInApi() as api:
+                url = api.base_url + 'odata/v3.2.0/OData.svc/DangerSignKDV'
+
+                # The first request to the api stalls for longer than the timeout. Then it answers in good time.
+                def stall_first_request():
+                    api.request_count += 1
+                    if api.request_count == 1:
+                        time.sleep(0.5)
+                    return False
+
+                api._inject_error = stall_first_request
+                kdv = ms.request_json('GET', url)
+                self.assertEqual(api.request_count, 2)
+
+                api.request_count = 0
+                kdv_all = ms.RequestScheduler(rate_limit=0).request_json_all('GET', [url])
+                self.assertEqual(api.request_count, 2)
+        finally:
+            env.request_timeout, env.request_backoff_factor = request_timeout, request_backoff_factor
+
+        self.assertTrue(kdv)
+        self.assertEqual(kdv_all, [kdv])
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -0,0 +1,21 @@
+import unittest as ut
+import setenvironment as env
+from standinapi import StandInApi
+
+
+class TestStandInApi(ut.TestCase):
+
+    def test_base_url_restored(self):
+        base_url = env.regobs_webapi_basestring
+        forecast_cache_folder = env.forecast_cache_folder
+
+        with StandInApi() as api:
+            self.assertTrue(env.regobs_webapi_basestring.startswith(api.base_url))
+            self.assertNotEqual(env.forecast_cache_folder, forecast_cache_folder)
+
+        self.assertEqual(env.regobs_webapi_basestring, base_url)
+        self.assertEqual(env.forecast_cache_folder, forecast_cache_folder)
+
+
+if __name__ == '__main__':
+    ut.main()
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Handles pickling and unpickling for storing data."""
 
+import os as os
 import pickle as pickle
 import logging as lg
 
@@ -16,7 +17,16 @@ def pickle_anything(something_to_pickle, file_name_and_path, print_message=True)
     :return:
     """
 
-    pickle.dump(something_to_pickle, open(file_name_and_path, 'wb'))
+    # Written to a temporary file first and moved in place, so a reader never finds a half written pickle.
+    temporary_file_name = '{0}.{1}.tmp'.format(file_name_and_path, os.getpid())
+    try:
+        with open(temporary_file_name, 'wb') as f:
+            pickle.dump(something_to_pickle, f)
+        os.replace(temporary_file_name, file_name_and_path)
+    except BaseException:
+        if os.path.exists(temporary_file_name):
+            os.remove(temporary_file_name)
+        raise
 
     if print_message is True:
         lg.info("makepickle.py -> pickle_anything: {0} pickled.".format(file_name_and_path))
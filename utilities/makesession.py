@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""Handles the http session shared by all requests to the api's.
+
+Making a new request with requests.get or requests.post opens a new connection (and tls handshake) every time.
+The session made here keeps connections alive and pools them pr host, so repeated requests to the same api reuse
+connections. Pool sizes and the retry and backoff policy are set in config/api.json.
+
+Many requests to the same api go through a RequestScheduler, which bounds and adapts how many are in flight.
+"""
+
+import threading as threading
+import random as random
+import time as time
+import heapq as heapq
+import collections as collections
+import logging as lg
+from concurrent import futures
+from urllib.parse import urlparse
+import requests as requests
+from requests.adapters import HTTPAdapter
+import setenvironment as env
+
+__author__ = 'raek'
+
+_session = None
+_session_lock = threading.Lock()
+
+# Responses faster than this are never taken as a sign of congestion. On fast responses the jitter is just noise.
+LATENCY_FLOOR = 0.1
+
+
+def _make_session():
+    """Makes a session with keep-alive connection pools. Hosts given in http_host_pool_maxsize in the api config
+    get their own pool with the given size. All other hosts share pools of the default size.
+
+    :return session:    [requests.Session]
+    """
+
+    session = requests.Session()
+    session.headers.update({'Accept-Encoding': 'gzip, deflate',
+                            'Connection': 'keep-alive'})
+
+    default_adapter = HTTPAdapter(pool_connections=env.http_pool_connections, pool_maxsize=env.http_pool_maxsize)
+    session.mount('http://', default_adapter)
+    session.mount('https://', default_adapter)
+
+    # requests uses the adapter with the longest matching prefix, so these take precedence over the default.
+    for host, pool_maxsize in env.http_host_pool_maxsize.items():
+        host_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        session.mount('http://{0}/'.format(host), host_adapter)
+        session.mount('https://{0}/'.format(host), host_adapter)
+
+    return session
+
+
+def get_session():
+    """Returns the shared session. It is made on first use.
+
+    :return session:    [requests.Session]
+    """
+
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _make_session()
+
+    return _session
+
+
+def get(url, **kwargs):
+    """Same as requests.get, but on the shared session."""
+
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Same as requests.post, but on the shared session."""
+
+    return get_session().post(url, **kwargs)
+
+
+def _is_transient(error):
+    """Connection errors, timeouts, broken json, 429 Too Many Requests and 5xx server errors are worth retrying.
+    Other 4xx errors will not go away by asking again."""
+
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status_code = error.response.status_code
+        return status_code == 429 or status_code >= 500
+
+    return isinstance(error, (requests.RequestException, ValueError))
+
+
+def backoff_delay(attempt, backoff_factor=None, backoff_max=None):
+    """Exponential backoff with full jitter. The ceiling doubles for every attempt and the delay is drawn
+    uniformly below it, so clients retrying at the same time spread out.
+
+    :param attempt:         [int] 0 for the first retry, 1 for the second etc.
+    :param backoff_factor:  [float] seconds. Default from config.
+    :param backoff_max:     [float] seconds. Upper limit of the ceiling. Default from config.
+    :return:                [float] seconds to wait before the next attempt
+    """
+
+    if backoff_factor is None:
+        backoff_factor = env.request_backoff_factor
+
+    if backoff_max is None:
+        backoff_max = env.request_backoff_max
+
+    return random.uniform(0, min(backoff_max, backoff_factor * 2 ** attempt))
+
+
+def request_json(method, url, retries=None, **kwargs):
+    """Makes a request on the shared session and returns the json in the response. Transient errors are retried
+    with exponential backoff and jitter. When all attempts fail, the last error is raised.
+
+    :param method:      [string] 'GET' or 'POST'
+    :param url:         [string]
+    :param retries:     [int] attempts in total before giving up. Default from config.
+    :param kwargs:      passed on to requests, e.g. json=query or headers={..}. Default timeout from config.
+    :return:            json in the response as dict or list
+    """
+
+    if retries is None:
+        retries = env.request_retries
+
+    # Without a timeout a stalled connection would hang here for good, and never be retried.
+    kwargs.setdefault('timeout', env.request_timeout)
+
+    attempt = 0
+    while True:
+        try:
+            r = get_session().request(method, url, **kwargs)
+            r.raise_for_status()
+            return r.json()
+
+        except Exception as e:
+            attempt += 1
+            if attempt >= retries or not _is_transient(e):
+                raise
+
+            delay = backoff_delay(attempt - 1)
+            lg.warning("makesession.py -> request_json: {0} on attempt {1} of {2}. Retry in {3:.1f}s. {4}"
+                       .format(type(e).__name__, attempt, retries, delay, url))
+            time.sleep(delay)
+
+
+class RequestScheduler:
+    """Makes many requests on a bounded pool of threads and adapts the concurrency to how the server copes.
+
+    The number of requests in flight starts at initial_concurrency and follows AIMD (additive increase,
+    multiplicative decrease). Every request answered in good time adds about one to the limit pr round of
+    requests, up to max_concurrency. A transient error or a response slower than latency_factor times the fastest
+    seen (but at least LATENCY_FLOOR) halves the limit, at most once pr round. Transient errors are retried with
+    backoff. Requests to the same host are also spaced to at most rate_limit pr second. Defaults are taken from
+    config.
+
+    The scheduler keeps what it has learned between calls, so the same one may be used for related batches.
+    """
+
+    def __init__(self, max_concurrency=None, initial_concurrency=None, rate_limit=None, latency_factor=None,
+                 retries=None):
+        """
+        :param max_concurrency:     [int] ceiling for requests in flight. Also the size of the thread pool.
+        :param initial_concurrency: [int] requests in flight to start with
+        :param rate_limit:          [float] requests pr second pr host. 0 or None for no limit.
+        :param latency_factor:      [float] responses slower than this times the fastest seen count as congestion
+        :param retries:             [int] attempts in total pr request before giving up
+        """
+
+        self.max_concurrency = max(1, max_concurrency or env.scheduler_max_concurrency)
+        self.concurrency = float(min(self.max_concurrency, initial_concurrency or env.scheduler_initial_concurrency))
+        self.rate_limit = env.scheduler_rate_limit if rate_limit is None else rate_limit
+        self.latency_factor = latency_factor or env.scheduler_latency_factor
+        self.retries = retries or env.request_retries
+
+        self.min_latency = None
+        self._last_decrease = 0.
+        self._next_send = {}
+
+    def __repr__(self):
+        return '{0}(concurrency={1:.1f}, max_concurrency={2}, rate_limit={3})'.format(
+            self.__class__.__name__, self.concurrency, self.max_concurrency, self.rate_limit)
+
+    def _increase(self):
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1. / self.concurrency)
+
+    def _decrease(self, start):
+        # Requests sent before the last decrease saw the old limit. They should not cut it once more.
+        if start > self._last_decrease:
+            self.concurrency = max(1., self.concurrency / 2.)
+            self._last_decrease = time.monotonic()
+
+    def _on_response(self, start, latency):
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+
+        if latency > self.latency_factor * max(self.min_latency, LATENCY_FLOOR):
+            self._decrease(start)
+        else:
+            self._increase()
+
+    def _wait_for_host(self, host, now):
+        """Seconds until the host may get the next request. Reserves the slot if it is free now."""
+
+        if not self.rate_limit:
+            return 0.
+
+        next_send = self._next_send.get(host, now)
+        if next_send > now:
+            return next_send - now
+
+        self._next_send[host] = now + 1. / self.rate_limit
+        return 0.
+
+    def request_json_all(self, method, urls, **kwargs):
+        """Requests all urls and returns the json in the responses in the order of the urls. Requests that fail
+        after all retries, or with an error that is not transient, are logged and give None.
+
+        :param method:  [string] 'GET' or 'POST'
+        :param urls:    [list of strings]
+        :param kwargs:  passed on to requests, e.g. headers={..}. Default timeout from config.
+        :return:        [list] json in the responses as dict or list, None where the request failed
+        """
+
+        log_ref = 'makesession.py -> RequestScheduler.request_json_all'
+        kwargs.setdefault('timeout', env.request_timeout)
+        results = [None] * len(urls)
+        pending = collections.deque((index, 0) for index in range(len(urls)))
+        delayed = []
+        in_flight = {}
+
+        def request_one(url):
+            r = get_session().request(method, url, **kwargs)
+            r.raise_for_status()
+            return r.json()
+
+        with futures.ThreadPoolExecutor(min(self.max_concurrency, max(1, len(urls)))) as executor:
+            while pending or delayed or in_flight:
+                now = time.monotonic()
+                wait_seconds = None
+
+                while delayed and delayed[0][0] <= now:
+                    _, index, attempt = heapq.heappop(delayed)
+                    pending.append((index, attempt))
+
+                while pending and len(in_flight) < int(self.concurrency):
+                    index, attempt = pending[0]
+                    wait_seconds = self._wait_for_host(urlparse(urls[index]).netloc, now)
+                    if wait_seconds:
+                        break
+                    pending.popleft()
+                    in_flight[executor.submit(request_one, urls[index])] = (index, attempt, now)
+
+                if delayed:
+                    until_delayed = delayed[0][0] - now
+                    wait_seconds = until_delayed if wait_seconds is None else min(wait_seconds, until_delayed)
+
+                if not in_flight:
+                    time.sleep(wait_seconds or 0.)
+                    continue
+
+                done, _ = futures.wait(in_flight, timeout=wait_seconds, return_when=futures.FIRST_COMPLETED)
+
+                for future in done:
+                    index, attempt, start = in_flight.pop(future)
+                    try:
+                        results[index] = future.result()
+                        self._on_response(start, time.monotonic() - start)
+
+                    except Exception as e:
+                        if not _is_transient(e):
+                            lg.error("{0}: {1} is not worth retrying. {2}"
+                                     .format(log_ref, type(e).__name__, urls[index]))
+                            continue
+
+                        self._decrease(start)
+                        if attempt + 1 >= self.retries:
+                            lg.error("{0}: {1} on attempt {2} of {2}. Giving up. {3}"
+                                     .format(log_ref, type(e).__name__, self.retries, urls[index]))
+                            continue
+
+                        delay = backoff_delay(attempt)
+                        lg.warning("{0}: {1} on attempt {2} of {3}. Retry in {4:.1f}s. {5}"
+                                   .format(log_ref, type(e).__name__, attempt + 1, self.retries, delay, urls[index]))
+                        heapq.heappush(delayed, (time.monotonic() + delay, index, attempt + 1))
+
+        return results
@@ -8,13 +8,16 @@ Modifications:
 """
 
 import requests
-import math
-from concurrent import futures
+import operator as operator
 import re
 import datetime as dt
+import os as os
+import pickle as pickle
 import numpy as np
 from varsomdata import varsomclasses as vc
 import setenvironment as env
+from utilities import makesession as ms
+from utilities import makepickle as mp
 import logging as lg
 from dateutil.parser import parse as parse
 
@@ -55,6 +58,7 @@ class AvalancheWarning:
         self.danger_level = self._nan_value  # [int]
         self.danger_level_name = self._nan_str  # [String]
         self.main_text = self._nan_str  # [String]
+        self.main_texts = {}  # [dictionary] {lang_key: main text} when warnings are got in more languages
         self.author = self._nan_str  # [String]
         self.avalanche_danger = self._nan_value  # [String]
         self.emergency_warning = self._nan_str  # [String]
@@ -190,6 +194,7 @@ class AvalancheWarning:
         self.set_danger_level(_d['DangerLevel'])
         self.danger_level_name = _d['DangerLevelName']
         self.main_text = _d['MainText']
+        self.main_texts = _d.get('MainTexts', {})
         self.author = _d['Author']
         self.avalanche_danger = _d['AvalancheDanger']
         self.emergency_warning = _d['EmergencyWarning']
@@ -231,6 +236,7 @@ class AvalancheWarning:
                  'danger_level': self.danger_level,
                  'danger_level_name': self.danger_level_name,
                  'main_text': self.main_text,
+                 'main_texts': self.main_texts,
                  'author': self.author,
                  'avalanche_danger': self.avalanche_danger,
                  'emergency_warning': self.emergency_warning,
@@ -635,7 +641,7 @@ class MountainWeather:
             raise
 
         api_url = f"http://h-web03.nve.no/APSapi/TimeSeriesReader.svc/MountainWeather/{region_id}/{d}/en/true"
-        api_return = requests.get(api_url).json()
+        api_return = ms.get(api_url).json()
 
         self.region_id = region_id
         self.date_valid = date_valid
@@ -757,79 +763,230 @@ class MountainWeather:
             lg.error("getforecastapi.py -> MountainWeather.from_dict(): TypeError source.")
 
 
-def get_avalanche_warnings_as_json(region_ids, from_date, to_date, lang_key=1, recursive_count=5):
+def _forecast_cache_file(api_version, region_id, lang_key, year):
+    """The forecast cache holds one pickle pr api version, region, language and year. Each is a dictionary
+    {date_valid: [warnings as json]}, where days without warnings have an empty list."""
+
+    return '{0}{1}_{2}_{3}_{4}.pickle'.format(env.forecast_cache_folder, api_version, region_id, lang_key, year)
+
+
+def _read_forecast_cache(cache_file):
+    """Reads one pickle of the forecast cache. A missing or unreadable pickle is a cache miss.
+
+    :param cache_file:  [string] See _forecast_cache_file.
+    :return:            [dict] {date_valid: [warnings as json]}, empty if nothing was read.
+    """
+
+    if not os.path.exists(cache_file):
+        return {}
+
+    try:
+        return mp.unpickle_anything(cache_file, print_message=False)
+    except (OSError, EOFError, pickle.UnpicklingError) as e:
+        lg.warning("getforecastapi.py -> _read_forecast_cache: Could not read {0}. Requesting anew. {1}"
+                   .format(cache_file, e))
+        return {}
+
+
+def _date_spans(dates, max_days):
+    """Splits dates in runs of consecutive days, and the runs in spans of at most max_days.
+
+    :param dates:       [list of dates] sorted
+    :param max_days:    [int]
+    :return:            [list of (from_date, to_date)] both included
+    """
+
+    spans = []
+    for date in dates:
+        if spans and date - spans[-1][1] == dt.timedelta(days=1) and (date - spans[-1][0]).days < max_days:
+            spans[-1][1] = date
+        else:
+            spans.append([date, date])
+
+    return [tuple(span) for span in spans]
+
+
+def _as_date(date):
+    if isinstance(date, str):
+        return dt.datetime.strptime(date[0:10], '%Y-%m-%d').date()
+    if isinstance(date, dt.datetime):
+        return date.date()
+    return date
+
+
+def get_avalanche_warnings_as_json(region_ids, from_date, to_date, lang_key=1, recursive_count=5, scheduler=None,
+                                   use_cache=None):
     """
-    Selects warnings and returns the json structured as given on the api.
+    Selects warnings and returns the json structured as given on the api. The requests, one pr region and
+    at most 31 days, are made concurrently by a makesession.RequestScheduler. It adapts the number of requests
+    in flight to how the api responds.
+
+    Past forecasts dont change, so warnings valid before today are kept in a cache in local storage. Only the
+    days missing in the cache are requested. Today and later are always requested, since they may be updated.
+    A day without warnings may not be published yet, so it is only cached when older than forecast_cache_grace_days
+    in config.
+
+    If more languages are given, all are requested together. The warnings in the first language are returned,
+    each with MainTexts added, {lang_key: MainText} from the warnings on the same region and date in all the
+    languages. A language without a warning on the region and date is missing in MainTexts. Warnings only found
+    in the other languages are left out. Both are logged.
 
     :param region_ids:      [int or list of ints]       RegionID as given in the forecast api [1-99] or in regObs [101-199]
     :param from_date:       [date or string as yyyy-mm-dd]
     :param to_date:         [date or string as yyyy-mm-dd]
-    :param lang_key:        [int]                       Language setting. 1 is norwegian and 2 is english.
+    :param lang_key:        [int or list of ints]       Language setting. 1 is norwegian and 2 is english.
     :param recursive_count  [int]                       by default attempt the same request # times before giving up
+    :param scheduler:       [RequestScheduler]          Default None makes a new one with settings from config.
+    :param use_cache:       [bool]                      Default None takes forecast_cache in config.
 
-    :return warnings:       [string]                    String as json
+    :return warnings:       [list of dict]              Warnings in the order of the regions and then by date.
 
-    Eg. http://api01.nve.no/hydrology/forecast/avalanche/v2.0.2/api/AvalancheWarningByRegion/Detail/10/1/2013-01-10/2013-01-20
-        http://api01.nve.no/hydrology/forecast/avalanche/v2.0.2/api/AvalancheWarningByRegion/Detail/29/1/2015-12-02/2015-12-02
+    Eg. https://api01.nve.no/hydrology/forecast/avalanche/v2.0.2/api/AvalancheWarningByRegion/Detail/10/1/2013-01-10/2013-01-20
+        https://api01.nve.no/hydrology/forecast/avalanche/v2.0.2/api/AvalancheWarningByRegion/Detail/29/1/2015-12-02/2015-12-02
     """
-    MAX_WORKERS=800
     TIME_DELTA=30
 
+    log_ref = 'getforecastapi.py -> get_avalanche_warnings_as_json'
+
     # If input isn't a list, make it so
     if not isinstance(region_ids, list):
         region_ids = [region_ids]
 
-    warnings_ = []
-    future_tuples = []
+    if scheduler is None:
+        scheduler = ms.RequestScheduler(retries=recursive_count)
+
+    if use_cache is None:
+        use_cache = env.forecast_cache
+
+    lang_keys = lang_key if isinstance(lang_key, list) else [lang_key]
 
-    workers = min(MAX_WORKERS, len(region_ids) * math.ceil((to_date - from_date).days / TIME_DELTA))
-    with futures.ThreadPoolExecutor(workers) as executor:
-        for region_id in region_ids:
+    from_date = _as_date(from_date)
+    to_date = _as_date(to_date)
+    dates = [from_date + dt.timedelta(days=i) for i in range((to_date - from_date).days + 1)]
+    today = dt.date.today()
+    grace_date = today - dt.timedelta(days=env.forecast_cache_grace_days)
 
-            # In nov 2016 we updated all regions to have ids in th 3000´s. GIS and regObs equal.
-            # Before that GIS har numbers 0-99 and regObs 100-199. Messy..
-            # Also, new api dont support old forecasts due to model changes.
-            if region_id > 100 and region_id < 3000:
-                region_id = region_id - 100
-                api_version = env.forecast_api_version_archive
+    if use_cache and not os.path.exists(env.forecast_cache_folder):
+        os.makedirs(env.forecast_cache_folder)
+
+    regions = []
+    requests_ = []
+
+    for lang_key_, region_id in [(l, r) for l in lang_keys for r in region_ids]:
+
+        # In nov 2016 we updated all regions to have ids in th 3000´s. GIS and regObs equal.
+        # Before that GIS har numbers 0-99 and regObs 100-199. Messy..
+        # Also, new api dont support old forecasts due to model changes.
+        if region_id > 100 and region_id < 3000:
+            region_id = region_id - 100
+            api_version = env.forecast_api_version_archive
+        else:
+            api_version = env.forecast_api_version
+
+        cache = {}
+        if use_cache:
+            for year in range(from_date.year, to_date.year + 1):
+                cache_file = _forecast_cache_file(api_version, region_id, lang_key_, year)
+                cache[year] = _read_forecast_cache(cache_file)
+
+        # Days without warnings in caches from before the grace period was added are asked for again too.
+        missing_dates = [d for d in dates
+                         if d >= today or d not in cache.get(d.year, {}) or (not cache[d.year][d] and d >= grace_date)]
+        if len(missing_dates) < len(dates):
+            lg.info("{0}: {1} of {2} days for {3} found in cache.".format(
+                log_ref, len(dates) - len(missing_dates), len(dates), region_id))
+
+        regions.append((region_id, api_version, lang_key_, cache, {}))
+
+        for tmp_from_date, delta_date in _date_spans(missing_dates, TIME_DELTA + 1):
+            url = '{5}avalanche/{4}/api/AvalancheWarningByRegion/Detail/{0}/{3}/{1}/{2}' \
+                .format(region_id, tmp_from_date, delta_date, lang_key_, api_version, env.forecast_api_basestring)
+
+            requests_.append((len(regions) - 1, tmp_from_date, delta_date, url))
+
+    responses = scheduler.request_json_all('GET', [url for _, _, _, url in requests_])
+
+    for (region_index, tmp_from_date, delta_date, url), warnings_region in zip(requests_, responses):
+        region_id, api_version, lang_key_, cache, fetched = regions[region_index]
+
+        if warnings_region is None:
+            lg.error("{0}: No warnings for {1} in {2} to {3}. Requests failed.".format(
+                log_ref, region_id, tmp_from_date, delta_date))
+            continue
+
+        lg.info("{0}: {1} warnings found for {2} in {3} to {4}".format(
+            log_ref, len(warnings_region), region_id, tmp_from_date, delta_date))
+
+        # Every day in the span is noted, also days without warnings, so they are not asked for again.
+        for i in range((delta_date - tmp_from_date).days + 1):
+            fetched[tmp_from_date + dt.timedelta(days=i)] = []
+        for w in warnings_region:
+            fetched.setdefault(_as_date(w['ValidFrom']), []).append(w)
+
+    warnings_by_lang_key = {lang_key_: [] for lang_key_ in lang_keys}
+
+    for region_id, api_version, lang_key_, cache, fetched in regions:
+        warnings_ = warnings_by_lang_key[lang_key_]
+
+        if use_cache:
+            to_cache = {d: w for d, w in fetched.items() if d < today and (w or d < grace_date)}
+            for year in set(d.year for d in to_cache):
+                cache[year].update((d, w) for d, w in to_cache.items() if d.year == year)
+                mp.pickle_anything(cache[year], _forecast_cache_file(api_version, region_id, lang_key_, year),
+                                   print_message=False)
+
+        for d in dates:
+            if d in fetched:
+                warnings_ += fetched[d]
+            elif d in cache.get(d.year, {}):
+                warnings_ += cache[d.year][d]
+
+    if not isinstance(lang_key, list):
+        return warnings_by_lang_key[lang_key]
+
+    # Join the languages on region and date in one pass over each.
+    warnings_ = warnings_by_lang_key[lang_keys[0]]
+    warnings_by_region_and_date = {}
+    for w in warnings_:
+        w['MainTexts'] = {}
+        warnings_by_region_and_date[(w['RegionId'], w['ValidFrom'][0:10])] = w
+
+    for lang_key_ in lang_keys:
+        for w in warnings_by_lang_key[lang_key_]:
+            joined_warning = warnings_by_region_and_date.get((w['RegionId'], w['ValidFrom'][0:10]))
+            if joined_warning is not None:
+                joined_warning['MainTexts'][lang_key_] = w['MainText']
             else:
-                api_version = env.forecast_api_version
-
-            tmp_from_date = from_date
-            while tmp_from_date <= to_date:
-                if to_date - tmp_from_date > dt.timedelta(days=TIME_DELTA):
-                    delta_date = tmp_from_date + dt.timedelta(days=TIME_DELTA)
-                else:
-                    delta_date = to_date
-                url = 'http://api01.nve.no/hydrology/forecast/avalanche/{4}/api/AvalancheWarningByRegion/Detail/{0}/{3}/{1}/{2}' \
-                    .format(region_id, tmp_from_date, delta_date, lang_key, api_version)
-
-                future = executor.submit(lambda x: requests.get(x), url)
-                future_tuples.append((region_id, tmp_from_date, delta_date, url, 0, future))
-                tmp_from_date = delta_date + dt.timedelta(days=1)
-
-        # If at first you don't succeed, try and try again.
-        while len(future_tuples):
-            region_id, tmp_from_date, delta_date, url, retries, future = future_tuples.pop()
-
-            try:
-                warnings_region = future.result().json()
-                lg.info("getforecastapi.py -> get_avalanche_warnings_as_json: {0} warnings found for {1} in {2} to {3}"
-                        .format(len(warnings_region), region_id, tmp_from_date, delta_date))
-                warnings_ += warnings_region
-
-            except:
-
-                lg.error("getforecastapi.py -> get_avalanche_warnings_as_json: EXCEPTION. RECURSIVE COUNT {0} for {1} in {2} to {3}"
-                                 .format(recursive_count, region_id, tmp_from_date, delta_date))
-                if retries < recursive_count - 1:
-                    future = executor.submit(lambda x: requests.get(x), url)
-                    future_tuples.insert(0, (region_id, tmp_from_date, delta_date, url, retries + 1, future))
+                lg.warning("{0}: Warning for {1} on {2} in language {3} has none in language {4}. Left out.".format(
+                    log_ref, w['RegionId'], w['ValidFrom'][0:10], lang_key_, lang_keys[0]))
+
+    # Warnings without a counterpart in a language dont get its main text.
+    for lang_key_ in lang_keys[1:]:
+        missing_count = len([w for w in warnings_ if lang_key_ not in w['MainTexts']])
+        if missing_count:
+            lg.warning("{0}: {1} of {2} warnings have no main text in language {3}.".format(
+                log_ref, missing_count, len(warnings_), lang_key_))
 
     return warnings_
 
 
-def get_avalanche_warnings(region_ids, from_date, to_date, lang_key=1, as_dict=False):
+def _group_warnings(avalanche_warnings, as_dict=False):
+    """Groups warnings by region and date. The warnings are expected sorted by date, so the dates of each region
+    come in order. The api gives one warning pr region and day. Should there be more, the last one is kept.
+
+    :param avalanche_warnings:  [list of AvalancheWarning]
+    :param as_dict:             [bool] when True, the warnings are given as dictionaries
+    :return:                    {region_id: {date_valid: warning, ..}, ..}
+    """
+
+    grouped_warnings = {}
+    for aw in avalanche_warnings:
+        grouped_warnings.setdefault(aw.region_id, {})[aw.date_valid] = aw.to_dict() if as_dict else aw
+
+    return grouped_warnings
+
+
+def get_avalanche_warnings(region_ids, from_date, to_date, lang_key=1, as_dict=False, grouped=False):
     """
     Selects warnings and returns a list of AvalancheDanger Objects. This method adds the
     avalanche problems to the warning.
@@ -837,8 +994,11 @@ def get_avalanche_warnings(region_ids, from_date, to_date, lang_key=1, as_dict=F
     :param region_ids:  [int or list of ints] RegionID as given in the forecast api [1-99] or in regObs [101-199]
     :param from_date:   [date or string as yyyy-mm-dd]
     :param to_date:     [date or string as yyyy-mm-dd]
-    :param lang_key:    [int] Language setting. 1 is norwegian and 2 is english.
+    :param lang_key:    [int or list of ints] Language setting. 1 is norwegian and 2 is english. If more are given,
+                        the warnings are in the first and main_texts has the main text in all of them.
     :param as_dict:     [bool] when True, it returns a list of dictionaries instead of AvalancheDanger objects
+    :param grouped:     [bool] when True, the warnings are returned as {region_id: {date_valid: warning}} instead
+                        of a list. Handy when looking up warnings for many regions and days.
 
     :return avalanche_danger_list: List of AvalancheDanger objects or AvalancheDanger dictionaries (see as_dict)
     """
@@ -848,13 +1008,16 @@ def get_avalanche_warnings(region_ids, from_date, to_date, lang_key=1, as_dict=F
     for w in warnings_as_json:
         _aw = AvalancheWarning()
         _aw.from_dict(w)
+        avalanche_warnings.append(_aw)
 
-        if as_dict:
-            avalanche_warnings.append(_aw.to_dict())
-            avalanche_warnings = sorted(avalanche_warnings, key=lambda aw: aw['date_valid'])  # Sort by date
-        else:
-            avalanche_warnings.append(_aw)
-            avalanche_warnings = sorted(avalanche_warnings, key=lambda aw: aw.date_valid)  # Sort by date
+    # Sort by date once all are made. The sort is stable, so warnings on the same date keep the order from the api.
+    avalanche_warnings.sort(key=operator.attrgetter('date_valid'))
+
+    if grouped:
+        return _group_warnings(avalanche_warnings, as_dict=as_dict)
+
+    if as_dict:
+        avalanche_warnings = [aw.to_dict() for aw in avalanche_warnings]
 
     return avalanche_warnings
 
@@ -867,7 +1030,8 @@ def get_avalanche_warnings_deprecated(region_ids, from_date, to_date, lang_key=1
     :param region_ids:  [int or list of ints] RegionID as given in the forecast api [1-99] or in regObs [101-199]
     :param from_date:   [date or string as yyyy-mm-dd]
     :param to_date:     [date or string as yyyy-mm-dd]
-    :param lang_key:    [int] Language setting. 1 is norwegian and 2 is english.
+    :param lang_key:    [int or list of ints] Language setting. 1 is norwegian and 2 is english. With [1, 2] the
+                        warnings get both the norwegian and the english main message.
     :param as_dict:     [bool] when True, it returns a list of dictionaries instead of AvalancheDanger objects
 
     :return avalanche_danger_list: List of AvalancheDanger objects or AvalancheDanger dictionaries (see as_dict)
@@ -875,7 +1039,10 @@ def get_avalanche_warnings_deprecated(region_ids, from_date, to_date, lang_key=1
 
     warnings_as_json = get_avalanche_warnings_as_json(region_ids, from_date, to_date, lang_key=lang_key)
     avalanche_warning_list = []
-    avalanche_danger_list = []
+
+    # With more languages, the warnings are in the first one.
+    if isinstance(lang_key, list):
+        lang_key = lang_key[0]
     exception_counter = 0
 
     for w in warnings_as_json:
@@ -914,10 +1081,11 @@ def get_avalanche_warnings_deprecated(region_ids, from_date, to_date, lang_key=1
         url = "http://www.varsom.no/snoskredvarsling/varsel/{0}/{1}".format(varsom_name, varsom_date)
         warning.set_url(url)
 
-        if lang_key == 1:
-            warning.set_main_message_no(w['MainText'])
-        if lang_key == 2:
-            warning.set_main_message_en(w['MainText'])
+        main_texts = w.get('MainTexts', {lang_key: w['MainText']})
+        if 1 in main_texts:
+            warning.set_main_message_no(main_texts[1])
+        if 2 in main_texts:
+            warning.set_main_message_en(main_texts[2])
 
         if w['AvalancheProblems'] is not None:
             for p in w['AvalancheProblems']:
@@ -967,19 +1135,19 @@ def get_avalanche_warnings_deprecated(region_ids, from_date, to_date, lang_key=1
 
                 warning.add_problem(problem)
 
-        if as_dict:
-            avalanche_warning_list.append(warning.to_dict())
-            avalanche_danger_list = sorted(avalanche_warning_list, key=lambda AvalancheDanger: AvalancheDanger['date'])
-        else:
-            avalanche_warning_list.append(warning)
-            # Sort by date
-            avalanche_danger_list = sorted(avalanche_warning_list, key=lambda AvalancheDanger: AvalancheDanger.date)
+        avalanche_warning_list.append(warning)
         '''
         except:
             lg.error("getForecastApi -> get_avalanche_warnings_deprecated: Exception at {0} of {1}".format(len(avalanche_warning_list) + exception_counter, len(warnings_as_json)))
             exception_counter += 1
         '''
 
+    # Sort by date
+    avalanche_danger_list = sorted(avalanche_warning_list, key=operator.attrgetter('date'))
+
+    if as_dict:
+        avalanche_danger_list = [warning.to_dict() for warning in avalanche_danger_list]
+
     return avalanche_danger_list
 
 
@@ -1004,50 +1172,66 @@ def get_valid_regids(region_id, from_date, to_date):
     return valid_regids
 
 
-def get_landslide_warnings_as_json(municipality, from_date, to_date, lang_key=1, recursive_count=5):
-    """Selects landslide warnings and returns the json structured as given on the api as dict objects.
+def get_landslide_warnings_as_json(municipality, from_date, to_date, lang_key=1, recursive_count=5, scheduler=None,
+                                   days_pr_request=90):
+    """Selects landslide warnings and returns the json structured as given on the api as dict objects. Long periods
+    are split in requests of at most days_pr_request days. Requests for all municipalities and periods are made
+    concurrently by a makesession.RequestScheduler, which retries failed requests with backoff.
 
     :param municipality:    [int or list of ints]       Municipality numbers
     :param from_date:       [date or string as yyyy-mm-dd]
     :param to_date:         [date or string as yyyy-mm-dd]
     :param lang_key:        [int]                       Language setting. 1 is norwegian and 2 is english.
     :param recursive_count  [int]                       by default attempt the same request # times before giving up
+    :param scheduler:       [RequestScheduler]          Default None makes a new one with settings from config.
+    :param days_pr_request: [int]                       Longest period asked for in one request.
 
-    :return warnings:       [warnings]
+    :return warnings:       [warnings]                  In the order of the municipalities and then by period.
 
     Eg. https://api01.nve.no/hydrology/forecast/landslide/v1.0.5/api/Warning/Municipality/1201/1/2018-06-03/2018-07-03
     """
 
+    log_ref = 'getforecastapi.py -> get_landslide_warnings_as_json'
+
     # If input isn't a list, make it so
     if not isinstance(municipality, list):
         municipality = [municipality]
 
-    landslide_warnings = []
-    recursive_count_default = recursive_count   # need the default for later
+    if scheduler is None:
+        scheduler = ms.RequestScheduler(retries=recursive_count)
 
-    for m in municipality:
+    from_date = _as_date(from_date)
+    to_date = _as_date(to_date)
+    dates = [from_date + dt.timedelta(days=i) for i in range((to_date - from_date).days + 1)]
+    spans = _date_spans(dates, days_pr_request)
 
-        if len(municipality) > 1:
-            # if we are looping the initial list make sure each item gets the recursive count default
-            recursive_count = recursive_count_default
+    landslide_api_base_url = env.forecast_api_basestring + 'landslide/v1.0.5/api'
+    headers = {'Content-Type': 'application/json'}
 
-        landslide_api_base_url = 'https://api01.nve.no/hydrology/forecast/landslide/v1.0.5/api'
-        headers = {'Content-Type': 'application/json'}
-        url = landslide_api_base_url + '/Warning/Municipality/{0}/{1}/{2}/{3}'.format(m, lang_key, from_date, to_date)
+    requests_ = [(m, tmp_from_date, delta_date, landslide_api_base_url + '/Warning/Municipality/{0}/{1}/{2}/{3}'
+                  .format(m, lang_key, tmp_from_date, delta_date))
+                 for m in municipality for tmp_from_date, delta_date in spans]
 
-        # If at first you don't succeed, try and try again.
-        try:
-            landslide_warnings_municipal = requests.get(url, headers=headers).json()
-            lg.info("getforecastapi.py -> get_landslide_warnings_as_json: {0} warnings found for {1} in {2} to {3}"
-                    .format(len(landslide_warnings_municipal), m, from_date, to_date))
-            landslide_warnings += landslide_warnings_municipal
+    responses = scheduler.request_json_all('GET', [url for _, _, _, url in requests_], headers=headers)
 
-        except:
-            lg.error("getforecastapi.py -> get_avalanche_warnings_as_json: EXCEPTION. RECURSIVE COUNT {0} for {1} in {2} to {3}"
-                     .format(recursive_count, m, from_date, to_date))
-            if recursive_count > 1:
-                recursive_count -= 1        # count down
-                landslide_warnings += get_landslide_warnings_as_json(m, from_date, to_date, lang_key, recursive_count=recursive_count)
+    landslide_warnings = []
+    seen_warnings = set()
+
+    for (m, tmp_from_date, delta_date, url), landslide_warnings_municipal in zip(requests_, responses):
+        if landslide_warnings_municipal is None:
+            lg.error("{0}: No warnings for {1} in {2} to {3}. Requests failed.".format(
+                log_ref, m, tmp_from_date, delta_date))
+            continue
+
+        lg.info("{0}: {1} warnings found for {2} in {3} to {4}".format(
+            log_ref, len(landslide_warnings_municipal), m, tmp_from_date, delta_date))
+
+        # A warning valid over more days may be given in two neighbouring periods. Keep it once pr municipality.
+        for w in landslide_warnings_municipal:
+            warning_key = (m, w.get('Id'))
+            if w.get('Id') is None or warning_key not in seen_warnings:
+                seen_warnings.add(warning_key)
+                landslide_warnings.append(w)
 
     return landslide_warnings
 
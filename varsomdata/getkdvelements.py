@@ -6,12 +6,12 @@ This is also the contents of drop down choices in regObs. It is useful to have a
 these tables.
 """
 
-import requests
 import os.path
 import datetime as dt
 import collections
 from utilities import makepickle as mp
 from utilities import makelogs as ml
+from utilities import makesession as ms
 from varsomdata import varsomclasses as vc
 import setenvironment as env
 
@@ -57,11 +57,11 @@ def get_kdv(view):
         if 'TripTypeKDV' in view:
             filter = 'filter=LangKey%20eq%201'
 
-        url = 'https://api.nve.no/hydrology/regobs/{0}/OData.svc/{1}?${2}&$format=json'.format(env.odata_version, view, filter)
+        url = '{0}{1}/OData.svc/{2}?${3}&$format=json'.format(env.odata_basestring, env.odata_version, view, filter)
         lang_key = 1
 
         print("getkdvelements.py -> get_kdv: Getting KDV from URL: {0}".format(url))
-        kdv = requests.get(url).json()
+        kdv = ms.get(url).json()
 
         for a in kdv['d']['results']:
             try:
@@ -6,14 +6,13 @@ for retrieving info on trips submitted.
 
 import sys as sys
 import datetime as dt
-import requests as requests
 import csv as csv
 import setenvironment as env
 from varsomdata import getobservations as go
 from varsomdata import getdangers as gd
 from varsomdata import getkdvelements as kdv
 from varsomdata import getvarsompickles as gvp
-from utilities import fencoding as fe, readfile as rf, makelogs as ml
+from utilities import fencoding as fe, readfile as rf, makelogs as ml, makesession as ms
 
 __author__ = 'raek'
 
@@ -88,7 +87,7 @@ def get_trip(from_date, to_date, geohazard_tid=None, output='List'):
 
     ml.log_and_print('[info] getmisc.py -> get_trip: ..to {0}'.format(url), print_it=True)
 
-    result = requests.get(url).json()
+    result = ms.get(url).json()
     data = result['d']['results']
 
     # if more than 1000 elements are requested, odata truncates data to 1000. We do more requests
@@ -135,7 +134,7 @@ def get_observer_group_member(group_id=None, output='List'):
         url = 'http://api.nve.no/hydrology/regobs/{0}/Odata.svc/ObserverGroupMemberV/?$filter=ObserverGroupID%20eq%20{1}&$format=json'.format(env.odata_version, group_id)
     ml.log_and_print("[info] getmisc.py -> get_observer_group_member: {0}".format(url))
 
-    result = requests.get(url).json()
+    result = ms.get(url).json()
     data = result['d']['results']
     data_out = [ObserverGroupMember(d) for d in data]
 
@@ -198,7 +197,7 @@ def get_registration(from_date, to_date, output='List', geohazard_tid=None, appl
     url = 'http://api.nve.no/hydrology/regobs/{0}/Odata.svc/{1}/?$filter={2}&$format=json'.format(env.odata_version, 'Registration', odata_filter)
     ml.log_and_print("[info] getmisc.py -> get_registration: ..to {0}".format(url), print_it=True)
 
-    result = requests.get(url).json()
+    result = ms.get(url).json()
     data = result['d']['results']
 
     # if more than 1000 elements are requested, odata truncates data to 1000. We do more requests
@@ -253,7 +252,7 @@ def get_obs_location(from_date, to_date):
     odata_filter = "DtRegTime gt datetime'{0}' and DtRegTime lt datetime'{1}' and langkey eq 1".format(from_date, to_date)
 
     url = 'http://api.nve.no/hydrology/regobs/{0}/Odata.svc/ObsLocationV/?$filter={1}&$format=json'.format(env.odata_version, odata_filter)
-    result = requests.get(url).json()
+    result = ms.get(url).json()
     data = result['d']['results']
     ml.log_and_print('[info] getmisc.py -> get_obs_location: {0}'.format(url))
 
@@ -404,15 +403,15 @@ def get_observer_v():
     """
 
     url_1 = 'http://api.nve.no/hydrology/regobs/{0}/Odata.svc/ObserverV/?$filter=ObserverId lt 3000&$format=json'.format(env.odata_version)
-    result_1 = requests.get(url_1).json()
+    result_1 = ms.get(url_1).json()
     data_1 = result_1['d']['results']
 
     url_2 = 'http://api.nve.no/hydrology/regobs/{0}/Odata.svc/ObserverV/?$filter=ObserverId gt 2999 and ObserverId lt 6000&$format=json'.format(env.odata_version)
-    result_2 = requests.get(url_2).json()
+    result_2 = ms.get(url_2).json()
     data_2 = result_2['d']['results']
 
     url_3 = 'http://api.nve.no/hydrology/regobs/{0}/Odata.svc/ObserverV/?$filter=ObserverId gt 5999&$format=json'.format(env.odata_version)
-    result_3 = requests.get(url_3).json()
+    result_3 = ms.get(url_3).json()
     data_3 = result_3['d']['results']
 
     data = data_1 + data_2 + data_3
@@ -8,20 +8,93 @@ Modifications:
 
 import datetime as dt
 import requests as requests
+import numpy as np
 import pandas as pd
+from concurrent import futures
 import sys as sys
+import os as os
+import math as math
+import json as json
+import shutil as shutil
+import hashlib as hashlib
+import re as re
+import zlib as zlib
+import functools as functools
+from collections.abc import MutableSequence
+import operator as operator
 import logging as lg
 from dateutil.parser import parse as parse
 import setenvironment as env
+from utilities import makesession as ms
+from utilities import makepickle as mp
 
 __author__ = 'raek'
 
+# Default maximum number of RegID and ObserverID combinations queried at the same time in get_data and get_count.
+MAX_QUERIES = 10
+
+# The form classes pr RegistrationTID, as (form class, json key, list key). Filled by register_form. The order
+# of registration is the order of the forms in Observation.Observations. The columns of the forms in data frames
+# are in _form_columns.
+_form_registry = {}
+_form_columns = {}
+_unknown_registration_tids = set()
+
+# Options for what the observation objects keep of the raw json they were made from. See retain_original_data.
+ORIGINAL_DATA_OPTIONS = ['Keep', 'Drop', 'Compressed', 'Reference']
+
+# Number of parsed time strings remembered by _stringtime_2_datetime.
+DATETIME_CACHE_SIZE = 2**14
+
+# The header fields in to_arrays and to_records, as (attribute, numpy dtype).
+RECORD_FIELDS = [('RegID', 'int32'),
+                 ('RegistrationTID', 'int32'),
+                 ('DtObsTime', 'datetime64[s]'),
+                 ('DtRegTime', 'datetime64[s]'),
+                 ('GeoHazardTID', 'int32'),
+                 ('ForecastRegionTID', 'int32'),
+                 ('ObserverID', 'int32'),
+                 ('CompetenceLevelTID', 'int32'),
+                 ('LangKey', 'int32')]
+
+# The layer fields of snow profiles in ProfileLayers, as (attribute, numpy dtype). GrainSizeAvg and
+# GrainSizeAvgMax are corrected for the error in the api, as on StratProfileLayer.
+STRAT_PROFILE_FIELDS = [('DepthTop', 'float64'),
+                        ('Thickness', 'float64'),
+                        ('HardnessTID', 'int32'),
+                        ('HardnessBottomTID', 'int32'),
+                        ('GrainFormPrimaryTID', 'int32'),
+                        ('GrainFormSecondaryTID', 'int32'),
+                        ('GrainSizeAvg', 'float64'),
+                        ('GrainSizeAvgMax', 'float64'),
+                        ('WetnessTID', 'int32'),
+                        ('CriticalLayerTID', 'int32')]
+SNOW_TEMP_FIELDS = [('Depth', 'float64'),
+                    ('SnowTemp', 'float64')]
+SNOW_DENSITY_FIELDS = [('Depth', 'float64'),
+                       ('Thickness', 'float64'),
+                       ('Density', 'float64'),
+                       ('Weight', 'float64'),
+                       ('WaterEquivalent', 'float64')]
+
+# When registrations are mapped to objects in worker processes, they are sent to the workers in this many chunks
+# pr worker. More chunks even out the load, fewer chunks mean less overhead.
+MAP_CHUNKS_PR_WORKER = 4
+
+# ISO 8601 as returned by the webapi, e.g. '2019-02-12T18:41:07.347' or '2019-02-12T18:41:07+01:00'.
+_ISO_DATETIME = re.compile(r'(\d{4})-(\d{2})-(\d{2})'
+                           r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?)?'
+                           r'(Z|[+-]\d{2}:?\d{2})?$')
+
 
 def _stringtime_2_datetime(stringtime):
     """
     Takes in a date as string, both given as unix datetime or normal local time, as string.
     Method returns a normal datetime object.
 
+    The same times are repeated on many registrations, so parsed times are cached. Datetime objects are
+    immutable and safe to share.
+
     :param stringtime:
     :return:           The date and time as datetime object
     """
@@ -29,15 +102,44 @@ def _stringtime_2_datetime(stringtime):
     if stringtime is None:
         return None
 
-    elif '/Date(' in stringtime:  # oData gives unix time. Unix date time in milliseconds from 1.1.1970
+    return _parse_stringtime(stringtime)
+
+
+@functools.lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def _parse_stringtime(stringtime):
+    """Parses the time strings in _stringtime_2_datetime. ISO 8601, which is what the webapi returns, is parsed
+    directly. dateutil handles anything else, but is many times slower."""
+
+    if '/Date(' in stringtime:  # oData gives unix time. Unix date time in milliseconds from 1.1.1970
         unix_date_time = int(stringtime[6:-2])
         unix_datetime_in_seconds = unix_date_time / 1000  # For some reason they are given in miliseconds
-        date = dt.datetime.fromtimestamp(int(unix_datetime_in_seconds))
+        return dt.datetime.fromtimestamp(int(unix_datetime_in_seconds))
 
-    else:
-        date = parse(stringtime)
+    iso_match = _ISO_DATETIME.match(stringtime)
+    if iso_match is None:
+        return parse(stringtime)
+
+    year, month, day, hour, minute, second, fraction, offset = iso_match.groups()
+
+    microsecond = 0
+    if fraction:
+        microsecond = int(fraction[:6].ljust(6, '0'))
 
-    return date
+    tzinfo = None
+    if offset == 'Z':
+        tzinfo = dt.timezone.utc
+    elif offset:
+        offset_minutes = int(offset[1:3]) * 60 + int(offset[-2:])
+        if offset[0] == '-':
+            offset_minutes = -offset_minutes
+        tzinfo = dt.timezone(dt.timedelta(minutes=offset_minutes))
+
+    try:
+        return dt.datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+                           microsecond, tzinfo=tzinfo)
+    except ValueError:
+        # Out of range values, e.g. hour 24. Let dateutil decide.
+        return parse(stringtime)
 
 
 def _reg_types_dict(registration_tids=None):
@@ -154,104 +256,75 @@ def _look_up_name_and_summary(registration_tid, summaries):
     return registration_name, summary
 
 
+@functools.lru_cache(maxsize=None)
+def _name_attributes(cls):
+    """The attributes in the __slots__ of cls that hold names, i.e. those ending with Name."""
+    return tuple(name for c in cls.__mro__ for name in getattr(c, '__slots__', ()) if name.endswith('Name'))
+
+
+def _intern_names(o):
+    """Interns the names on an object made from the json from the webapi, i.e. the string attributes ending
+    with Name. E.g. ForecastRegionName, NickName, GeoHazardName and the KDV names in the forms. Equal names on
+    all registrations are then the same string object. Seasons of observations take less memory, pickle once pr
+    name and compare faster when grouped.
+
+    Names are interned as they are copied to the object, so the json given is left as it is.
+
+    :param o:       an Observation, a form or a Picture. Attributes not in __slots__ are left as they are.
+    :return:        o
+    """
+
+    for name in _name_attributes(o.__class__):
+        value = getattr(o, name, None)
+        if value.__class__ is str:
+            setattr(o, name, sys.intern(value))
+
+    return o
+
+
+def register_form(registration_tid, form_class, json_key, list_key=None, columns=None):
+    """Registers a form class, so _get_object and Observation know how to map the form.
+
+    :param registration_tid:    [int] RegistrationTID of the form
+    :param form_class:          [class] made with form_class(d), or form_class(d, i) if the form is a list
+    :param json_key:            [string] key of the form in the webapi json of a registration
+    :param list_key:            [string] For forms with a one-to-many relation, the key of the list in the json.
+                                         One object is made pr item. Default None makes one object.
+    :param columns:             [list] The columns to_dict adds to the common ones, so make_data_frame can read
+                                them straight from the json. Each is a key in the form, a tuple of
+                                (column, key in the form) or a tuple of (column, function(form, d)). Form is
+                                None if the registration has none. Default None makes make_data_frame use
+                                the objects and to_dict.
+    """
+
+    _form_registry[registration_tid] = (form_class, json_key, list_key)
+
+    if columns is None:
+        _form_columns.pop(registration_tid, None)
+    else:
+        _form_columns[registration_tid] = columns
+
+
 def _get_object(registration_tid, d):
     """Given a RegistrationTID and data (d), map data to the right object. For forms that have a one-to-many
     relation, each data item must be mapped individually."""
 
-    if registration_tid == 10:
-        return [GeneralObservation(d)]
-
-    elif registration_tid == 11:
-        return [Incident(d)]
-
-    elif registration_tid == 13:
-        i = -1
-        _objects = []
-        for do in d['DangerObs']:
-            i += 1
-            _objects.append(DangerSign(d, i))
-        return _objects
-
-    elif registration_tid == 14:
-        i = -1
-        _objects = []
-        for do in d['DamageObs']:
-            i += 1
-            _objects.append(DamageObs(d, i))
-        return _objects
-
-    elif registration_tid == 21:
-        return [WeatherObservation(d)]
-
-    elif registration_tid == 22:
-        return [SnowSurfaceObservation(d)]
-
-    elif registration_tid == 25:
-        i = -1
-        _objects = []
-        for do in d['CompressionTest']:
-            i += 1
-            _objects.append(ColumnTest(d, i))
-        return _objects
-
-    elif registration_tid == 26:
-        return [AvalancheObs(d)]
-
-    elif registration_tid == 27:
-        i = -1
-        _objects = []
-        for do in d['AvalancheActivityObs']:
-            i += 1
-            _objects.append(AvalancheActivityObs(d, i))
-        return _objects
-
-    elif registration_tid == 33:
-        i = -1
-        _objects = []
-        for do in d['AvalancheActivityObs2']:
-            i += 1
-            _objects.append(AvalancheActivityObs2(d, i))
-        return _objects
-
-    elif registration_tid == 28:
-        return [AvalancheEvaluation(d)]
-
-    elif registration_tid == 30:
-        return [AvalancheEvaluation2(d)]
-
-    elif registration_tid == 31:
-        return [AvalancheEvaluation3(d)]
-
-    elif registration_tid == 32:
-        i = -1
-        _objects = []
-        for do in d['AvalancheEvalProblem2']:
-            i += 1
-            _objects.append(AvalancheEvalProblem2(d, i))
-        return _objects
-
-    elif registration_tid == 36:
-        return [SnowProfile(d)]
-
-    elif registration_tid == 50:
-        return [IceThickness(d)]
-
-    elif registration_tid == 51:
-        return [IceCover(d)]
-
-    elif registration_tid == 61:
-        return [WaterLevel(d)]
-
-    elif registration_tid == 62:
-        return [WaterLevel2(d)]
-
-    elif registration_tid == 71:
-        return [LandSlideObs(d)]
+    form = _form_registry.get(registration_tid)
 
-    else:
-        lg.warning("getobservations.py -> _get_object: Unknown RegistrationTID.")
+    if form is None:
+        # Registrations of an unknown type would otherwise log one warning each.
+        if registration_tid not in _unknown_registration_tids:
+            _unknown_registration_tids.add(registration_tid)
+            lg.warning("getobservations.py -> _get_object: Unknown RegistrationTID {0}.".format(registration_tid))
         return []
 
+    form_class, json_key, list_key = form
+
+    if list_key is None:
+        return [_intern_names(form_class(d))]
+
+    return [_intern_names(form_class(d, i)) for i in range(len(d[list_key]))]
+
 
 def _make_common_dict(o):
     """
@@ -288,18 +361,182 @@ def _make_common_dict(o):
     return _dict
 
 
-def _make_one_request(from_date=None, to_date=None, reg_id=None, registration_types=None,
-                      region_ids=None, location_id=None, countries=None, time_zone=None,
-                      observer_id=None, observer_nick=None, observer_competence=None, group_id=None,
-                      geohazard_tids=0, lang_key=1, recursive_count=5, output='List'):
+# The columns of _make_common_dict. make_data_frame reads them straight from the json with _common_values.
+_COMMON_COLUMNS = ('RegistrationTID', 'RegistrationName', 'RegID', 'DtObsTime', 'DtRegTime', 'GeoHazardName',
+                   'GeoHazardTID', 'LangKey', 'LocationName', 'LocationID', 'UTMZone', 'UTMEast', 'UTMNorth',
+                   'Latitude', 'Longitude', 'ForecastRegionName', 'ForecastRegionTID', 'MunicipalName', 'NickName',
+                   'ObserverID', 'CompetenceLevelName')
+
+
+def _common_values(registration_tid, d):
+    """The values of _COMMON_COLUMNS for a form on the registration d. Same values as _make_common_dict gives
+    on the form object, but without making the object."""
+
+    location = d['ObsLocation']
+    observer = d['Observer']
+    registration_name, _ = _look_up_name_and_summary(registration_tid, d['Summaries'])
+
+    return (registration_tid,
+            registration_name,
+            int(d['RegID']),
+            _stringtime_2_datetime(d['DtObsTime']),
+            _stringtime_2_datetime(d['DtRegTime']),
+            d['GeoHazardName'],
+            d['GeoHazardTID'],
+            d['LangKey'],
+            location['LocationName'],
+            location['ObsLocationID'],
+            int(location['UTMZone']),
+            int(location['UTMEast']),
+            int(location['UTMNorth']),
+            location['Latitude'],
+            location['Longitude'],
+            location['ForecastRegionName'],
+            location['ForecastRegionTID'],
+            location['MunicipalName'],
+            observer['NickName'],
+            int(observer['ObserverID']),
+            observer['CompetenceLevelName'])
+
+
+def _time_column(key):
+    """Column of the time in key of the form, as datetime."""
+
+    def time_column(item, d):
+        return _stringtime_2_datetime(item[key]) if item else None
+
+    return time_column
+
+
+def _count_column(*keys):
+    """Column of the number of elements in a list in the form. The keys are the path to the list."""
+
+    def count_column(item, d):
+        for key in keys:
+            if not item:
+                return 0
+            item = item[key]
+        return len(item) if item else 0
+
+    return count_column
+
+
+def _avalanche_problem_column(key, n):
+    """Column of AvalancheProblemTID{n} or AvalancheProblemName{n} of AvalancheEvaluation. Problems with TID 0
+    are not given."""
+
+    def avalanche_problem_column(item, d):
+        if item and item['AvalancheProblemTID{0}'.format(n)] != 0:
+            return item['{0}{1}'.format(key, n)]
+        return None
+
+    return avalanche_problem_column
+
+
+def _middle_time_column(item, d):
+    """DtMiddleTime of AvalancheActivityObs2."""
+
+    dt_start = _stringtime_2_datetime(item['DtStart']) if item else None
+    dt_end = _stringtime_2_datetime(item['DtEnd']) if item else None
+
+    if dt_start is not None and dt_end is not None:
+        return dt_start + (dt_end - dt_start) / 2
+
+    return None
+
+
+def _profile_pictures_of_tid23_column(item, d):
+    """ProfilePicturesOfTID23 of SnowProfile."""
+
+    if not item:
+        return None
+
+    return len([a for a in d['Attachments'] if a['RegistrationTID'] == 23])
+
+
+def _urls_column(item, d):
+    """URLs of LandSlideObs."""
+
+    return '{0} on observation'.format(len(item['Urls']) if item else 0)
+
+
+def _post_one_page(url, search_query, offset, retries=None):
+    """Posts the search query for the page of records starting at offset and returns the records on the page.
+    The query is copied so that concurrent requests do not share the offset. A failing page is retried on its
+    own with backoff, so pages already received are kept."""
+
+    page_query = dict(search_query)
+    page_query['Offset'] = offset
+
+    return ms.request_json('POST', url, retries=retries, json=page_query)
+
+
+def _iter_pages(url, search_query, total_count, max_workers=1, retries=None):
+    """All page offsets are known when the total count is known. Yield the pages in the order of the offsets
+    while the next pages are requested in the background. At most max_workers pages are in flight or waiting
+    to be consumed at any time, so memory use does not grow with the size of the result.
+
+    :param url:             [string] url to the Search endpoint
+    :param search_query:    [dict] query object posted in the request
+    :param total_count:     [int] TotalMatches as given by /Search/Count
+    :param max_workers:     [int] maximum number of requests in flight at the same time
+    :param retries:         [int] attempts pr page before giving up. Default from config.
+    :return:                [generator] of pages, each a list of dictionaries as given directly from the api
     """
-    Part of get_data and the get_count method.
-    Parameters mostly the same except observer_id and reg_id can not be lists.
-    Exception is output ('List' or 'Count'). If 'Count' only the number of obs is returned.
+
+    log_ref = 'getobservations.py -> _iter_pages'
+    records_requested = search_query['NumberOfRecords']
+    offsets = list(range(0, total_count, records_requested))
+    max_workers = max(1, min(max_workers, len(offsets)))
+
+    records_received = 0
+    in_flight = []
+
+    executor = futures.ThreadPoolExecutor(max_workers)
+    try:
+        for offset in offsets:
+            in_flight.append(executor.submit(_post_one_page, url, search_query, offset, retries))
+
+            # The oldest page is yielded when the window is full, so pages come out in the order of the offsets.
+            if len(in_flight) >= max_workers:
+                page = in_flight.pop(0).result()
+                records_received += len(page)
+                lg.info("{0}: {1:.2f}%".format(log_ref, records_received / total_count * 100))
+                yield page
+
+        while in_flight:
+            page = in_flight.pop(0).result()
+            records_received += len(page)
+            lg.info("{0}: {1:.2f}%".format(log_ref, records_received / total_count * 100))
+            yield page
+
+    finally:
+        # If the consumer stops early or a page fails, dont wait for pages nobody will read.
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _get_pages(url, search_query, total_count, max_workers=1, retries=None):
+    """Requests all pages, one by one or concurrently on a bounded worker pool, and puts them together in
+    the order of the offsets.
+
+    :return:                [list] of dictionaries as given directly from the api
     """
 
-    log_ref = 'getobservations.py -> _make_one_request'
-    records_requested = 100
+    data = []
+    for page in _iter_pages(url, search_query, total_count, max_workers=max_workers, retries=retries):
+        data += page
+
+    return data
+
+
+def _make_search_query(from_date=None, to_date=None, reg_id=None, registration_types=None,
+                       region_ids=None, location_id=None, countries=None, time_zone=None,
+                       observer_id=None, observer_nick=None, observer_competence=None, group_id=None,
+                       geohazard_tids=0, lang_key=1, from_change_time=None, records_requested=100):
+    """Makes the query object posted to the regObs webapi Search and Search/Count. Parameters as in
+    _make_one_request."""
 
     # Dates in the web-api request are strings
     if isinstance(from_date, dt.date):
@@ -312,13 +549,14 @@ def _make_one_request(from_date=None, to_date=None, reg_id=None, registration_ty
     elif isinstance(to_date, dt.datetime):
         to_date = dt.datetime.strftime(to_date, '%Y-%m-%d')
 
+    # Registrations created or changed after this time. Sent with time, not only date.
+    if isinstance(from_change_time, dt.datetime):
+        from_change_time = from_change_time.isoformat()
+
     # Only norwegian (lang_key = 1) and english (lang_key = 2) are supported. If other, default to english.
     if lang_key not in [1, 2]:
         lang_key = 2
 
-    data = []  # data from one query
-
-    # query object posted in the request
     search_query = {'LangKey': lang_key,
                     'RegId': reg_id,
                     'ObserverGuid': None,
@@ -334,80 +572,224 @@ def _make_one_request(from_date=None, to_date=None, reg_id=None, registration_ty
                     'Countries': countries,
                     'FromDate': from_date,
                     'ToDate': to_date,
+                    'FromDtChangeTime': from_change_time,
                     'NumberOfRecords': records_requested,  # int
                     'Offset': 0}
 
-    url = 'https://api.regobs.no/v4/Search'
+    return search_query
 
-    count_request = requests.post(url + '/Count', json=search_query).json()
-    total_count = count_request['TotalMatches']
-    lg.info("{0}: {1} observations match the request.".format(log_ref, total_count))
 
-    if output == 'Count':
-        return total_count
+def _make_one_request(from_date=None, to_date=None, reg_id=None, registration_types=None,
+                      region_ids=None, location_id=None, countries=None, time_zone=None,
+                      observer_id=None, observer_nick=None, observer_competence=None, group_id=None,
+                      geohazard_tids=0, lang_key=1, recursive_count=None, output='List', max_workers=1,
+                      raise_errors=False, from_change_time=None):
+    """
+    Part of get_data and the get_count method.
+    Parameters mostly the same except observer_id and reg_id can not be lists.
+    Exception is output ('List' or 'Count'). If 'Count' only the number of obs is returned.
+    If max_workers is more than 1, the pages are requested concurrently on a pool of max_workers threads.
+    recursive_count is the number of attempts pr request (default from config). A failing page is retried
+    with backoff from where it failed, not from the first page. If all attempts fail, an empty result is
+    returned, or the error is raised if raise_errors is True.
+    """
+
+    log_ref = 'getobservations.py -> _make_one_request'
+
+    if recursive_count is None:
+        recursive_count = env.request_retries
+
+    # query object posted in the request
+    search_query = _make_search_query(from_date=from_date, to_date=to_date, reg_id=reg_id,
+                                      registration_types=registration_types, region_ids=region_ids,
+                                      location_id=location_id, countries=countries, time_zone=time_zone,
+                                      observer_id=observer_id, observer_nick=observer_nick,
+                                      observer_competence=observer_competence, group_id=group_id,
+                                      geohazard_tids=geohazard_tids, lang_key=lang_key,
+                                      from_change_time=from_change_time)
+
+    url = env.regobs_webapi_basestring + 'Search'
 
     # get data from regObs api. It returns 100 items at a time. If more, continue requesting with an offset. Paging.
-    while len(data) < total_count:
+    try:
+        count_request = ms.request_json('POST', url + '/Count', retries=recursive_count, json=search_query)
+        total_count = count_request['TotalMatches']
+        lg.info("{0}: {1} observations match the request.".format(log_ref, total_count))
 
-        # try and if there is an exception, try again.
-        try:
-            r = requests.post(url, json=search_query)
-            responds = r.json()
-            data += responds
+        if output == 'Count':
+            return total_count
 
-            # log request status
-            if r.status_code <= 299:
+        data = _get_pages(url, search_query, total_count, max_workers=max_workers, retries=recursive_count)
 
-                if len(data) == 0:
-                    lg.info("{0}: no data".format(log_ref))
-                else:
-                    lg.info("{0}: {1:.2f}%".format(log_ref, len(data) / total_count * 100))
+    except Exception:
+        error_msg = sys.exc_info()[0]
+        lg.error("{0}: EXCEPTION. Giving up after {1} attempts. {2}".format(log_ref, recursive_count, error_msg))
 
-                # get more data until we reach total_count
-                if len(data) < total_count:
-                    search_query['Offset'] += records_requested
+        if raise_errors:
+            raise
 
-            else:
-                lg.warning("{0}: http {1} {2}".format(log_ref, r.status_code, r.reason))
+        if output == 'Count':
+            return 0
+        return []
 
-        except Exception:
-            error_msg = sys.exc_info()[0]
-            lg.error("{0}: EXCEPTION. RECURSIVE COUNT {1} {2}".format(log_ref, recursive_count, error_msg))
-
-            # When exception occurred, start requesting again. All that has happened in this scope is not important.
-            # Call the current method again and make sure the received data goes direct to return within this scope.
-            data_by_exception = []
-
-            if recursive_count > 1:
-                recursive_count -= 1  # count down
-                data_by_exception = _make_one_request(from_date=from_date,
-                                                      to_date=to_date,
-                                                      reg_id=reg_id,
-                                                      registration_types=registration_types,
-                                                      region_ids=region_ids,
-                                                      location_id=location_id,
-                                                      countries=countries,
-                                                      time_zone=time_zone,
-                                                      observer_id=observer_id,
-                                                      observer_nick=observer_nick,
-                                                      observer_competence=observer_competence,
-                                                      group_id=group_id,
-                                                      geohazard_tids=geohazard_tids,
-                                                      lang_key=lang_key,
-                                                      output=output,
-                                                      recursive_count=recursive_count)
-
-            return data_by_exception
+    if len(data) == 0:
+        lg.info("{0}: no data".format(log_ref))
 
     return data
 
 
+def _reg_and_observer_combinations(reg_ids, observer_ids):
+    """The webapi takes one RegID and one ObserverID pr query. Returns the combinations to query, with repeated
+    ids only queried once."""
+
+    # dict.fromkeys keeps the first of repeated combinations, in order.
+    return list(dict.fromkeys((reg_id, observer_id) for reg_id in reg_ids for observer_id in observer_ids))
+
+
+def _map_combinations(function, combinations, max_queries):
+    """Runs function on every RegID and ObserverID combination, at most max_queries at a time. The results
+    are returned in the order of the combinations."""
+
+    if max_queries > 1 and len(combinations) > 1:
+        with futures.ThreadPoolExecutor(min(max_queries, len(combinations))) as executor:
+            return list(executor.map(function, combinations))
+
+    return [function(c) for c in combinations]
+
+
+def _merge_by_reg_id(results):
+    """Merges lists of registrations into one list. A registration found in more than one list is only
+    included the first time it is found."""
+
+    merged = []
+    reg_ids_seen = set()
+
+    for data in results:
+        for d in data:
+            if d['RegID'] not in reg_ids_seen:
+                reg_ids_seen.add(d['RegID'])
+                merged.append(d)
+
+    return merged
+
+
+def _as_date(date_inn):
+    """Dates may be given as date, datetime or string 'yyyy-mm-dd'. Returns a date."""
+
+    if isinstance(date_inn, dt.datetime):
+        return date_inn.date()
+    elif isinstance(date_inn, dt.date):
+        return date_inn
+    else:
+        return dt.datetime.strptime(str(date_inn)[0:10], '%Y-%m-%d').date()
+
+
+def _make_shards(from_date, to_date, shard_days):
+    """Splits [from_date, to_date] in periods of shard_days days. The webapi includes both dates in a query, so
+    each period starts the day after the previous ended.
+
+    :return:    [list of tuples] (from_date, to_date) of each shard, in order.
+    """
+
+    from_date = _as_date(from_date)
+    to_date = _as_date(to_date)
+    shard_days = max(1, int(shard_days))
+
+    shards = []
+    shard_from_date = from_date
+    while shard_from_date <= to_date:
+        shard_to_date = min(shard_from_date + dt.timedelta(days=shard_days - 1), to_date)
+        shards.append((shard_from_date, shard_to_date))
+        shard_from_date = shard_to_date + dt.timedelta(days=1)
+
+    return shards
+
+
+def _shard_days_from_count(from_date, to_date, estimated_count, shard_size):
+    """Number of days in a shard so that shards hold about shard_size registrations, given the count of the
+    whole period. Assumes registrations are evenly spread over the period."""
+
+    days = (_as_date(to_date) - _as_date(from_date)).days + 1
+    number_of_shards = max(1, math.ceil(estimated_count / max(1, shard_size)))
+
+    return max(1, math.ceil(days / number_of_shards))
+
+
+def _shard_folder(query):
+    """Checkpoints of shards are stored in a folder in local storage named by a hash of the query, so the same
+    query finds the shards already received. The base url of the api is part of the hash, so shards from e.g.
+    a test api are never used against another."""
+
+    query_as_string = json.dumps([env.regobs_webapi_basestring, query], sort_keys=True, default=str)
+    query_hash = hashlib.md5(query_as_string.encode('utf-8')).hexdigest()
+
+    return '{0}shards/{1}/'.format(env.local_storage, query_hash)
+
+
+def _get_shards(get_period, shards, shard_folder, max_shards):
+    """Gets all shards, at most max_shards at a time. Shards already in the shard folder are read from file.
+    Each shard received is stored before the next is returned, so an interrupted pull can resume. When all shards
+    are received the folder is removed. If any shard fails, RuntimeError is raised and the folder is kept, so the
+    same call again resumes with the shards that failed. Shards reaching today or later may still change, so
+    they are always requested and never stored.
+
+    :param get_period:      [function] get_period(from_date, to_date, raise_errors=True) gives data for a period
+    :param shards:          [list of tuples] (from_date, to_date) of each shard
+    :param shard_folder:    [string] where shards are stored while the pull is ongoing
+    :param max_shards:      [int] maximum number of shards requested at the same time
+    :return:                [list] of dictionaries, merged in the order of the shards
+    """
+
+    log_ref = 'getobservations.py -> _get_shards'
+
+    if not os.path.exists(shard_folder):
+        os.makedirs(shard_folder)
+
+    def _get_one_shard(shard):
+        shard_file = '{0}{1}_{2}.pickle'.format(shard_folder, shard[0], shard[1])
+        is_final = shard[1] < dt.date.today()
+
+        if is_final and os.path.exists(shard_file):
+            lg.info("{0}: shard {1} to {2} found in local storage.".format(log_ref, shard[0], shard[1]))
+            return mp.unpickle_anything(shard_file, print_message=False)
+
+        try:
+            shard_data = get_period(shard[0], shard[1], raise_errors=True)
+        except Exception:
+            lg.error("{0}: shard {1} to {2} failed. {3}".format(log_ref, shard[0], shard[1], sys.exc_info()[0]))
+            return None
+
+        if is_final:
+            mp.pickle_anything(shard_data, shard_file, print_message=False)
+        lg.info("{0}: shard {1} to {2} received with {3} registrations."
+                .format(log_ref, shard[0], shard[1], len(shard_data)))
+
+        return shard_data
+
+    with futures.ThreadPoolExecutor(max(1, min(max_shards, len(shards)))) as executor:
+        results = list(executor.map(_get_one_shard, shards))
+
+    failed_shards = [shard for shard, result in zip(shards, results) if result is None]
+
+    if failed_shards:
+        error_message = "{0} of {1} shards failed: {2}. Make the same call again to resume from {3}.".format(
+            len(failed_shards), len(shards), ', '.join('{0} to {1}'.format(*shard) for shard in failed_shards),
+            shard_folder)
+        lg.error("{0}: {1}".format(log_ref, error_message))
+        raise RuntimeError(error_message)
+
+    shutil.rmtree(shard_folder, ignore_errors=True)
+
+    return _merge_by_reg_id(results)
+
+
 def get_count(from_date=None, to_date=None, registration_types=None,
               reg_ids=None, region_ids=None, location_id=None, countries=None, time_zone=None,
               observer_ids=None, observer_nick=None, observer_competence=None, group_id=None,
-              geohazard_tids=0, lang_key=1):
+              geohazard_tids=0, lang_key=1, max_queries=MAX_QUERIES):
     """
-    Gets the count of observations for a given query.
+    Gets the count of observations for a given query. The webapi takes one RegID and one ObserverID pr query,
+    so each combination is counted in its own query. These run concurrently, at most max_queries at a time.
 
     :param from_date:           [string] 'yyyy-mm-dd'. Result includes from date.
     :param to_date:             [string] 'yyyy-mm-dd'. Result includes to date.
@@ -423,6 +805,7 @@ def get_count(from_date=None, to_date=None, registration_types=None,
     :param group_id:            [int]
     :param geohazard_tids:      [int or list] Geohazards requested.
     :param lang_key:            [int] Default 1 gives Norwegian.
+    :param max_queries:         [int] Maximum number of RegID and ObserverID combinations queried at the same time.
 
     :return:                    [int] Total matches to one query.
     """
@@ -447,18 +830,17 @@ def get_count(from_date=None, to_date=None, registration_types=None,
     if not isinstance(reg_ids, list):
         reg_ids = [reg_ids]
 
-    total_count = 0
-
-    for reg_id in reg_ids:
-        for observer_id in observer_ids:
-            part_count = _make_one_request(
-                from_date=from_date, to_date=to_date, lang_key=lang_key, reg_id=reg_id,
-                registration_types=registration_types, region_ids=region_ids, countries=countries,
-                time_zone=time_zone, geohazard_tids=geohazard_tids,
-                observer_id=observer_id, observer_nick=observer_nick, observer_competence=observer_competence,
-                group_id=group_id, location_id=location_id, output='Count')
+    def _count_one_combination(reg_and_observer_id):
+        reg_id, observer_id = reg_and_observer_id
+        return _make_one_request(
+            from_date=from_date, to_date=to_date, lang_key=lang_key, reg_id=reg_id,
+            registration_types=registration_types, region_ids=region_ids, countries=countries,
+            time_zone=time_zone, geohazard_tids=geohazard_tids,
+            observer_id=observer_id, observer_nick=observer_nick, observer_competence=observer_competence,
+            group_id=group_id, location_id=location_id, output='Count')
 
-            total_count += part_count
+    combinations = _reg_and_observer_combinations(reg_ids, observer_ids)
+    total_count = sum(_map_combinations(_count_one_combination, combinations, max_queries))
 
     return total_count
 
@@ -466,10 +848,22 @@ def get_count(from_date=None, to_date=None, registration_types=None,
 def get_data(from_date=None, to_date=None, registration_types=None,
              reg_ids=None, region_ids=None, location_id=None, countries=None, time_zone=None,
              observer_ids=None, observer_nick=None, observer_competence=None, group_id=None,
-             geohazard_tids=0, lang_key=1):
+             geohazard_tids=0, lang_key=1, max_workers=1, max_queries=MAX_QUERIES,
+             shard_days=None, shard_size=None, max_shards=4, from_change_time=None, raise_errors=False):
     """
     Gets data from Regobs webapi. Each observation returned as a dictionary in a list.
 
+    The webapi takes one RegID and one ObserverID pr query, so each combination is requested in its own query.
+    These run concurrently, at most max_queries at a time. Results are merged in the order of the combinations
+    and registrations found by more than one query are only included once.
+
+    Long periods may be split in shards of shard_days days, or in shards expected to hold about shard_size
+    registrations each (estimated from the count of the whole period). Shards are requested concurrently, at
+    most max_shards at a time, and each shard is stored in local storage when received. If the pull is
+    interrupted, the same call resumes with the shards not yet received. Shards are returned in the order of
+    their dates and a registration is only included once. If a shard fails after all retries, RuntimeError is
+    raised rather than returning a period with holes in it.
+
     :param from_date:           [string] 'yyyy-mm-dd'. Result includes from date.
     :param to_date:             [string] 'yyyy-mm-dd'. Result includes to date.
     :param registration_types:  [string or list of strings] Default None gives all.
@@ -484,6 +878,14 @@ def get_data(from_date=None, to_date=None, registration_types=None,
     :param group_id:            [int]
     :param geohazard_tids:      [int or list] Geohazards requested.
     :param lang_key:            [int] Default 1 gives Norwegian.
+    :param max_workers:         [int] Default 1 requests pages one by one. If more, pages are requested concurrently.
+    :param max_queries:         [int] Maximum number of RegID and ObserverID combinations queried at the same time.
+    :param shard_days:          [int] Default None does not shard. Number of days in each shard.
+    :param shard_size:          [int] Default None does not shard. Approximate number of registrations in a shard.
+    :param max_shards:          [int] Maximum number of shards requested at the same time.
+    :param from_change_time:    [datetime] Default None gives all. Only registrations created or changed after.
+    :param raise_errors:        [bool] Default False logs failed requests and returns what was received. If True,
+                                the error is raised. Sharded requests always raise.
 
     :return:                    [list] of dictionaries as given directly from the api.
     """
@@ -508,23 +910,160 @@ def get_data(from_date=None, to_date=None, registration_types=None,
     if not isinstance(reg_ids, list):
         reg_ids = [reg_ids]
 
-    all_data = []
+    combinations = _reg_and_observer_combinations(reg_ids, observer_ids)
+
+    def _get_period(period_from_date, period_to_date, raise_errors=False):
 
-    for reg_id in reg_ids:
-        for observer_id in observer_ids:
-            data = _make_one_request(
-                from_date=from_date, to_date=to_date, lang_key=lang_key, reg_id=reg_id,
+        def _get_one_combination(reg_and_observer_id):
+            reg_id, observer_id = reg_and_observer_id
+            return _make_one_request(
+                from_date=period_from_date, to_date=period_to_date, lang_key=lang_key, reg_id=reg_id,
                 registration_types=registration_types, region_ids=region_ids, countries=countries,
                 time_zone=time_zone, geohazard_tids=geohazard_tids,
                 observer_id=observer_id, observer_nick=observer_nick, observer_competence=observer_competence,
-                group_id=group_id, location_id=location_id)
+                group_id=group_id, location_id=location_id, max_workers=max_workers, raise_errors=raise_errors,
+                from_change_time=from_change_time)
+
+        results = _map_combinations(_get_one_combination, combinations, max_queries)
+
+        if len(combinations) == 1:
+            return results[0]
+        return _merge_by_reg_id(results)
+
+    if shard_days is None and shard_size is None:
+        all_data = _get_period(from_date, to_date, raise_errors=raise_errors)
 
-            all_data += data
+    elif from_date is None or to_date is None:
+        lg.warning("getobservations.py -> get_data: Sharding needs both from_date and to_date. Not sharding.")
+        all_data = _get_period(from_date, to_date, raise_errors=raise_errors)
+
+    else:
+        # The folder is named by what was asked for, not by shard_days found from a count that may change.
+        query = {'from_date': from_date, 'to_date': to_date, 'registration_types': registration_types,
+                 'reg_ids': reg_ids, 'region_ids': region_ids, 'location_id': location_id, 'countries': countries,
+                 'time_zone': time_zone, 'observer_ids': observer_ids, 'observer_nick': observer_nick,
+                 'observer_competence': observer_competence, 'group_id': group_id,
+                 'geohazard_tids': geohazard_tids, 'lang_key': lang_key, 'shard_days': shard_days,
+                 'shard_size': shard_size, 'from_change_time': from_change_time}
+        shard_folder = _shard_folder(query)
+
+        if shard_days is None:
+            # A resumed pull uses the shards of the first attempt, so the shards received fit.
+            shard_days_file = '{0}shard_days.pickle'.format(shard_folder)
+            if os.path.exists(shard_days_file):
+                shard_days = mp.unpickle_anything(shard_days_file, print_message=False)
+            else:
+                estimated_count = get_count(
+                    from_date=from_date, to_date=to_date, registration_types=registration_types, reg_ids=reg_ids,
+                    region_ids=region_ids, location_id=location_id, countries=countries, time_zone=time_zone,
+                    observer_ids=observer_ids, observer_nick=observer_nick, observer_competence=observer_competence,
+                    group_id=group_id, geohazard_tids=geohazard_tids, lang_key=lang_key, max_queries=max_queries)
+                shard_days = _shard_days_from_count(from_date, to_date, estimated_count, shard_size)
+
+                if not os.path.exists(shard_folder):
+                    os.makedirs(shard_folder)
+                mp.pickle_anything(shard_days, shard_days_file, print_message=False)
+
+        shards = _make_shards(from_date, to_date, shard_days)
+        all_data = _get_shards(_get_period, shards, shard_folder, max_shards)
 
     return all_data
 
 
-class Registration:
+def iter_data(from_date=None, to_date=None, registration_types=None,
+              reg_ids=None, region_ids=None, location_id=None, countries=None, time_zone=None,
+              observer_ids=None, observer_nick=None, observer_competence=None, group_id=None,
+              geohazard_tids=0, lang_key=1, max_workers=2):
+    """
+    Same as get_data, but a generator. Registrations are yielded one by one as their page arrives, while the
+    next pages are requested in the background. Only a few pages are held in memory at any time, so results
+    can be filtered, mapped or written to file without holding the whole result set.
+
+    Unlike get_data, an error that remains after all retries is raised, since records already yielded can not
+    be taken back. As in get_data, a registration found by more than one RegID and ObserverID combination is only
+    yielded the first time it is found.
+
+    :param max_workers:         [int] Default 2. Number of pages requested ahead of the one being consumed.
+
+    Other parameters as in get_data.
+
+    :return:                    [generator] of dictionaries as given directly from the api.
+    """
+
+    log_ref = 'getobservations.py -> iter_data'
+
+    # If input isn't a list, make it so
+    if not isinstance(registration_types, list):
+        registration_types = [registration_types]
+
+    if not isinstance(region_ids, list):
+        region_ids = [region_ids]
+
+    if not isinstance(countries, list):
+        countries = [countries]
+
+    if not isinstance(geohazard_tids, list):
+        geohazard_tids = [geohazard_tids]
+
+    # regObs weabapi does not support multiple ObserverIDs and RegIDs. Making it so.
+    if not isinstance(observer_ids, list):
+        observer_ids = [observer_ids]
+
+    if not isinstance(reg_ids, list):
+        reg_ids = [reg_ids]
+
+    url = env.regobs_webapi_basestring + 'Search'
+    reg_ids_seen = set()
+
+    for reg_id, observer_id in _reg_and_observer_combinations(reg_ids, observer_ids):
+        search_query = _make_search_query(
+            from_date=from_date, to_date=to_date, lang_key=lang_key, reg_id=reg_id,
+            registration_types=registration_types, region_ids=region_ids, countries=countries,
+            time_zone=time_zone, geohazard_tids=geohazard_tids,
+            observer_id=observer_id, observer_nick=observer_nick, observer_competence=observer_competence,
+            group_id=group_id, location_id=location_id)
+
+        try:
+            total_count = ms.request_json('POST', url + '/Count', json=search_query)['TotalMatches']
+            lg.info("{0}: {1} observations match the request.".format(log_ref, total_count))
+
+            for page in _iter_pages(url, search_query, total_count, max_workers=max_workers):
+                for d in page:
+                    if d['RegID'] not in reg_ids_seen:
+                        reg_ids_seen.add(d['RegID'])
+                        yield d
+
+        except Exception:
+            lg.error("{0}: EXCEPTION. Giving up. {1}".format(log_ref, sys.exc_info()[0]))
+            raise
+
+
+class _Slotted:
+    """Base of the registration classes. Attributes are kept in __slots__ instead of a __dict__ on every object,
+    which takes much less memory when a season of observations is loaded. The mixins Registration, Location,
+    Observer and Pictures list their attributes in _fields and the form classes put them in their own __slots__.
+
+    Attributes not in __slots__ may still be set, e.g. by scripts adding their own attributes. They go in a
+    __dict__ made the first time one is set.
+    """
+
+    __slots__ = ('__dict__',)
+
+    def __setstate__(self, state):
+        # Pickles made before the classes got __slots__ hold a plain dict. Newer pickles hold a tuple of the
+        # __dict__ (or None) and the values in __slots__.
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = {**(dict_state or {}), **(slots_state or {})}
+
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class Registration(_Slotted):
+    __slots__ = ()
+    _fields = ('RegID', 'DtObsTime', 'DtRegTime', 'DtChangeTime', 'GeoHazardTID', 'GeoHazardName', '_OriginalData')
+
     def __init__(self, d):
         self.RegID = int(d['RegID'])
         self.DtObsTime = _stringtime_2_datetime(d['DtObsTime'])
@@ -535,8 +1074,23 @@ class Registration:
 
         self.OriginalData = d
 
+    @property
+    def OriginalData(self):
+        """The raw json of the registration. Depending on retain_original_data it is kept as is, dropped,
+        compressed or requested anew from the api when asked for."""
+        return _load_original_data(self._OriginalData)
+
+    @OriginalData.setter
+    def OriginalData(self, d):
+        self._OriginalData = d
+
+
+class Location(_Slotted):
+    __slots__ = ()
+    _fields = ('LocationName', 'LocationID', 'UTMZone', 'UTMEast', 'UTMNorth', 'Latitude', 'Longitude', 'UTMSourceName',
+               'UTMSourceTID', 'ForecastRegionName', 'ForecastRegionTID', 'MunicipalName', 'MunicipalNo', 'CountryName',
+               'CountryID', 'Title', 'Height')
 
-class Location:
     def __init__(self, d):
         self.LocationName = d['ObsLocation']['LocationName']
         self.LocationID = d['ObsLocation']['ObsLocationID']
@@ -560,7 +1114,11 @@ class Location:
         self.Height = d['ObsLocation']['Height']
 
 
-class Observer:
+class Observer(_Slotted):
+    __slots__ = ()
+    _fields = ('NickName', 'ObserverID', 'CompetenceLevelTID', 'CompetenceLevelName', 'ObserverGroupName',
+               'ObserverGroupID')
+
     def __init__(self, d):
         self.NickName = d['Observer']['NickName']
         self.ObserverID = int(d['Observer']['ObserverID'])
@@ -572,7 +1130,10 @@ class Observer:
         self.ObserverGroupID = d['Observer']['ObserverGroupID']
 
 
-class Picture:
+class Picture(_Slotted):
+    __slots__ = ('PictureID', 'URLoriginal', 'URLlarge', 'Photographer', 'Copyright', 'Aspect', 'GeoHazardTID',
+                 'GeoHazardName', 'RegistrationTID', 'RegistrationName', 'Comment', '_OriginalData')
+
     def __init__(self, p):
         self.PictureID = p['PictureID']
         self.URLoriginal = env.image_basestring_original + '{}'.format(self.PictureID)
@@ -588,93 +1149,359 @@ class Picture:
 
         self.OriginalData = p
 
+    @property
+    def OriginalData(self):
+        """The raw json of the attachment. See Registration.OriginalData."""
+        return _load_original_data(self._OriginalData)
+
+    @OriginalData.setter
+    def OriginalData(self, p):
+        self._OriginalData = p
 
-class Pictures:
+
+class Pictures(_Slotted):
     """A parent class for listing of the pictures related to the form in question."""
 
+    __slots__ = ()
+    _fields = ('Pictures',)
+
     def __init__(self, d, registration_tid):
-        self.Pictures = []
-        for a in d['Attachments']:
-            picture = Picture(a)
-            # Pictures with TID 23 were profiles, but data model for profiles weren't added before TID 36
-            if (picture.RegistrationTID == registration_tid) \
-                    or (picture.RegistrationTID == 23 and registration_tid == 36):
-                self.Pictures.append(picture)
+        self.Pictures = _PictureList(d['Attachments'], registration_tid)
+
+
+class _PictureList(MutableSequence):
+    """The pictures of a form. It works as a list of Picture objects, but the objects are not made from the
+    attachments in the json before a picture is asked for. Most analyses only count the pictures, and len() does
+    not make them.
+
+    :param attachments:         [list of dict] Attachments in the json of the registration
+    :param registration_tid:    [int] RegistrationTID of the form. Only its pictures are listed.
+    """
+
+    __slots__ = ('_attachments', '_registration_tid', '_pictures')
+
+    def __init__(self, attachments, registration_tid):
+        self._attachments = attachments
+        self._registration_tid = registration_tid
+        self._pictures = None
+
+    def _form_attachments(self):
+        # Pictures with TID 23 were profiles, but data model for profiles weren't added before TID 36
+        return [a for a in self._attachments
+                if a['RegistrationTID'] == self._registration_tid
+                or (a['RegistrationTID'] == 23 and self._registration_tid == 36)]
+
+    def _get_pictures(self):
+        if self._pictures is None:
+            self._pictures = [_intern_names(Picture(a)) for a in self._form_attachments()]
+            self._attachments = None
+        return self._pictures
+
+    def __len__(self):
+        if self._pictures is None:
+            return len(self._form_attachments())
+        return len(self._pictures)
+
+    def __getitem__(self, index):
+        return self._get_pictures()[index]
+
+    def __setitem__(self, index, picture):
+        self._get_pictures()[index] = picture
+
+    def __delitem__(self, index):
+        del self._get_pictures()[index]
+
+    def insert(self, index, picture):
+        self._get_pictures().insert(index, picture)
+
+    def __eq__(self, other):
+        if isinstance(other, _PictureList):
+            other = other._get_pictures()
+        return self._get_pictures() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._get_pictures())
+
+
+class _CompressedData:
+    """Raw json kept as zlib compressed bytes. Used by retain_original_data with 'Compressed'.
+
+    A registration is too small to compress well on its own. Registrations share most of their keys, so the json
+    of another registration is given as a preset dictionary (zdict). The zdict is made from the first registration
+    compressed and is shared by all, so it is held, and pickled, only once.
+    """
+
+    __slots__ = ('data', 'zdict')
+
+    _shared_zdict = None
+
+    def __init__(self, d):
+        json_bytes = json.dumps(d, ensure_ascii=False).encode('utf-8')
+
+        if _CompressedData._shared_zdict is None:
+            # zlib only looks 32 kB back, so a longer dictionary is no use.
+            _CompressedData._shared_zdict = json_bytes[-32768:]
+
+        compressor = zlib.compressobj(zdict=_CompressedData._shared_zdict)
+        self.data = compressor.compress(json_bytes) + compressor.flush()
+        self.zdict = _CompressedData._shared_zdict
+
+    def load(self):
+        decompressor = zlib.decompressobj(zdict=self.zdict)
+        return json.loads((decompressor.decompress(self.data) + decompressor.flush()).decode('utf-8'))
+
+
+class _DataReference:
+    """Where to find the raw json in the api. Used by retain_original_data with 'Reference'. The registration
+    is requested anew every time it is loaded. For a picture, the attachment with the PictureID is returned."""
+
+    __slots__ = ('RegID', 'LangKey', 'PictureID')
+
+    def __init__(self, reg_id, lang_key, picture_id=None):
+        self.RegID = reg_id
+        self.LangKey = lang_key
+        self.PictureID = picture_id
+
+    def load(self):
+        data = get_data(reg_ids=self.RegID, lang_key=self.LangKey)
+        if not data:
+            return None
+
+        if self.PictureID is None:
+            return data[0]
+
+        for a in data[0]['Attachments']:
+            if a['PictureID'] == self.PictureID:
+                return a
+
+        return None
+
+
+def _load_original_data(original_data):
+    """Returns the raw json however it is kept."""
+
+    if isinstance(original_data, (_CompressedData, _DataReference)):
+        return original_data.load()
+
+    return original_data
+
+
+def _retained(d, original_data, reg_id, lang_key, picture_id=None):
+    """What is kept of the raw json d with the given original_data option. See retain_original_data."""
+
+    if original_data == 'Drop':
+        return None
+    if original_data == 'Compressed':
+        return _CompressedData(d)
+    if original_data == 'Reference':
+        return _DataReference(reg_id, lang_key, picture_id)
+    return d
+
+
+def _retain_pictures(pictures, original_data, reg_id, lang_key):
+    """Applies the option to the pictures of a form. Pictures not yet made are made, so the raw attachments in
+    the _PictureList are not kept."""
+
+    for picture in pictures:
+        if isinstance(picture._OriginalData, dict):
+            picture._OriginalData = _retained(picture._OriginalData, original_data, reg_id, lang_key,
+                                              picture.PictureID)
+
+
+def retain_original_data(observations, original_data=None):
+    """Sets what observation objects keep of the raw json in OriginalData. All forms of a registration share
+    the one raw json, so it is only compressed once pr registration.
+
+    Pictures not yet made are made here, so no raw attachments are kept. With 'Drop' and 'Reference' the forms
+    not yet made are made here as well (see Observation), since nothing is left to make them from later. With
+    'Compressed' they are made from the compressed json when asked for, and get the option then.
+
+    :param observations:    [list] Observation objects or form objects, e.g. as returned by get_all_observations
+    :param original_data:   [string] 'Keep' keeps the raw json as is.
+                                     'Drop' keeps nothing. OriginalData is None.
+                                     'Compressed' keeps the json as compressed bytes. It is decompressed when
+                                        OriginalData is asked for.
+                                     'Reference' keeps only the RegID. The registration is requested from the
+                                        api when OriginalData is asked for.
+                                     Default None uses original_data in the api config.
+    :return:                [list] the same observations
+    """
+
+    if original_data is None:
+        original_data = env.original_data
+
+    if original_data not in ORIGINAL_DATA_OPTIONS:
+        lg.warning("getobservations.py -> retain_original_data: Illegal original_data option {0}."
+                   .format(original_data))
+        return observations
+
+    if original_data == 'Keep':
+        return observations
+
+    # The raw json is kept alongside its replacement while working, so the id is not reused by another dict.
+    replacements = {}
+
+    def _retain(o):
+        d = o._OriginalData
+        lang_key = getattr(o, 'LangKey', 1)
+
+        if isinstance(d, dict):
+            if id(d) not in replacements:
+                replacements[id(d)] = (d, _retained(d, original_data, o.RegID, lang_key))
+            o._OriginalData = replacements[id(d)][1]
+
+        _retain_pictures(getattr(o, 'Pictures', []), original_data, o.RegID, lang_key)
+
+    for observation in observations:
+        if isinstance(observation, Observation):
+            observation._retain(original_data, replacements)
+        else:
+            _retain(observation)
+
+    return observations
+
+
+def _form_slots(*fields, slotted_base=None):
+    """The __slots__ of a form class. These are the _fields of Registration, Location, Observer and Pictures,
+    the attributes common to all forms and the fields given. Fields already in the __slots__ of slotted_base
+    are left out.
+
+    :param fields:          [strings] attributes of the form
+    :param slotted_base:    [class] a base class with __slots__ of its own, e.g. Picture or ProfileColumnTest
+    :return:                [tuple of strings]
+    """
+
+    slots = []
+    for field in Registration._fields + Location._fields + Observer._fields + Pictures._fields \
+            + ('RegistrationTID', 'RegistrationName', 'Summary', 'LangKey') + fields:
+        if field not in slots and (slotted_base is None or field not in slotted_base.__slots__):
+            slots.append(field)
+
+    return tuple(slots)
 
 
 class Observation(Registration, Location, Observer):
+    """A registration with all its forms.
+
+    The forms are not made before they are asked for, in Observations or get_forms, and are kept once made.
+    Code only looking at RegID, times, location or observer never pays for mapping the forms.
+
+    Names are interned when the observation is made, and names on a form when it is made. See _intern_names.
+
+    If retain_original_data is used with 'Compressed' before all forms are made, the forms are made from the
+    compressed json in _form_data when asked for, and get the option then. 'Drop' and 'Reference' make the forms
+    first.
+    """
+
+    __slots__ = Registration._fields + Location._fields + Observer._fields + \
+        ('_Observations', '_forms', 'LangKey', '_form_data', '_retention')
+
     def __init__(self, d):
 
         Registration.__init__(self, d)
         Location.__init__(self, d)
         Observer.__init__(self, d)
+        _intern_names(self)
 
-        self.Observations = []
+        self._Observations = None
+        self._forms = {}
+        self._form_data = None
+        self._retention = None
 
-        if d['GeneralObservation']:
-            self.Observations += _get_object(10, d)
+        self.LangKey = int(d['LangKey'])
 
-        if d['Incident']:
-            self.Observations += _get_object(11, d)
+    @property
+    def Observations(self):
+        """All forms on the registration, as objects of their respective classes."""
 
-        if d['DangerObs']:
-            self.Observations += _get_object(13, d)
+        if self._Observations is None:
+            self._make_forms([tid for tid in _form_registry if tid not in self._forms])
+            self._Observations = [o for registration_tid in _form_registry for o in self._forms[registration_tid]]
 
-        if d['DamageObs']:
-            self.Observations += _get_object(14, d)
+            # All forms are made, so the json they were made from is not needed anymore.
+            self._form_data = None
 
-        if d['WeatherObservation']:
-            self.Observations += _get_object(21, d)
+        return self._Observations
 
-        if d['SnowSurfaceObservation']:
-            self.Observations += _get_object(22, d)
+    @Observations.setter
+    def Observations(self, observations):
+        self._Observations = observations
 
-        if d['CompressionTest']:
-            self.Observations += _get_object(25, d)
+    def get_forms(self, registration_tid):
+        """The forms of one type on the registration. Only these are made if they aren't already.
 
-        if d['AvalancheObs']:
-            self.Observations += _get_object(26, d)
+        :param registration_tid:    [int] E.g. 13 for danger signs. See _reg_types_dict.
+        :return:                    [list] of form objects. Empty if the registration has none of the type.
+        """
 
-        if d['AvalancheActivityObs']:
-            self.Observations += _get_object(27, d)
+        # Forms already made, e.g. on observations pickled before forms were made when asked for.
+        if self._Observations is not None:
+            return [o for o in self._Observations if getattr(o, 'RegistrationTID', None) == registration_tid]
 
-        if d['AvalancheActivityObs2']:
-            self.Observations += _get_object(33, d)
+        if registration_tid not in self._forms:
+            self._make_forms([registration_tid])
 
-        if d['AvalancheEvaluation']:
-            self.Observations += _get_object(28, d)
+        return self._forms[registration_tid]
 
-        if d['AvalancheEvaluation2']:
-            self.Observations += _get_object(30, d)
+    def _make_forms(self, registration_tids):
+        """Makes the forms of the given types from the json, which is loaded only once."""
 
-        if d['AvalancheEvaluation3']:
-            self.Observations += _get_object(31, d)
+        # Observations pickled before _form_data and _retention were added dont have them set.
+        form_data = getattr(self, '_form_data', None)
+        retention = getattr(self, '_retention', None)
+        d = _load_original_data(form_data) if form_data is not None else self.OriginalData
 
-        if d['AvalancheEvalProblem2']:
-            self.Observations += _get_object(32, d)
+        for registration_tid in registration_tids:
+            form = _form_registry.get(registration_tid)
+            if d and form and d.get(form[1]):
+                forms = _get_object(registration_tid, d)
+            else:
+                forms = []
 
-        if d['SnowProfile2']:
-            self.Observations += _get_object(36, d)
+            if retention:
+                for o in forms:
+                    o._OriginalData = self._OriginalData
+                    _retain_pictures(getattr(o, 'Pictures', []), retention, self.RegID, self.LangKey)
 
-        if d['IceThickness']:
-            self.Observations += _get_object(50, d)
+            self._forms[registration_tid] = forms
 
-        if d['IceCoverObs']:
-            self.Observations += _get_object(51, d)
+    def _retain(self, original_data, replacements):
+        """Applies retain_original_data to the observation and the forms already made. See retain_original_data.
 
-        if d['WaterLevel']:
-            self.Observations += _get_object(61, d)
+        :param original_data:   [string] 'Drop', 'Compressed' or 'Reference'
+        :param replacements:    [dict] {id(raw json): (raw json, what is kept)} shared by all in one call
+        """
 
-        if d['WaterLevel2']:
-            self.Observations += _get_object(62, d)
+        d = self._OriginalData
+        if not isinstance(d, dict):
+            return
 
-        if d['LandSlideObs']:
-            self.Observations += _get_object(71, d)
+        if original_data != 'Compressed':
+            # Nothing is kept to make the forms from later.
+            self.Observations
 
-        self.LangKey = int(d['LangKey'])
+        if id(d) not in replacements:
+            replacements[id(d)] = (d, _retained(d, original_data, self.RegID, self.LangKey))
+        replacement = replacements[id(d)][1]
+        self._OriginalData = replacement
+
+        forms = self._Observations if self._Observations is not None else \
+            [o for forms in self._forms.values() for o in forms]
+        for o in forms:
+            if o._OriginalData is d:
+                o._OriginalData = replacement
+            _retain_pictures(getattr(o, 'Pictures', []), original_data, self.RegID, self.LangKey)
+
+        if self._Observations is None:
+            self._form_data = replacement
+            self._retention = original_data
 
 
 class GeneralObservation(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('ObsHeader', 'ObsComment', 'Comment', 'URLs')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -720,6 +1547,9 @@ class GeneralObservation(Registration, Location, Observer, Pictures):
 
 
 class Incident(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('ActivityInfluencedTID', 'ActivityInfluencedName', 'DamageExtentTID', 'DamageExtentName',
+                            'IncidentHeader', 'IncidentIngress', 'IncidentText', 'URLs')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -780,6 +1610,8 @@ class Incident(Registration, Location, Observer, Pictures):
 
 
 class DangerSign(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('DangerObsID', 'Comment', 'DangerSignName', 'DangerSignTID')
+
     def __init__(self, d, i):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -829,6 +1661,8 @@ class DangerSign(Registration, Location, Observer, Pictures):
 
 
 class DamageObs(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('DamageTypeTID', 'DamageTypeName', 'DamagePosition', 'Comment')
+
     def __init__(self, d, i):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -872,6 +1706,9 @@ class DamageObs(Registration, Location, Observer, Pictures):
 
 
 class WeatherObservation(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('PrecipitationTID', 'PrecipitationName', 'AirTemperature', 'CloudCover', 'WindDirection',
+                            'WindDirectionName', 'WindSpeed', 'Comment')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -927,6 +1764,10 @@ class WeatherObservation(Registration, Location, Observer, Pictures):
 
 
 class SnowSurfaceObservation(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('SnowDepth', 'NewSnowDepth24', 'NewSnowLine', 'SnowDriftTID', 'SnowDriftName',
+                            'HeightLimitLayeredSnow', 'SnowLine', 'SnowSurfaceTID', 'SnowSurfaceName',
+                            'SurfaceWaterContentTID', 'SurfaceWaterContentName', 'Comment')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -993,7 +1834,12 @@ class SnowSurfaceObservation(Registration, Location, Observer, Pictures):
         return _dict
 
 
-class ProfileColumnTest:
+class ProfileColumnTest(_Slotted):
+    __slots__ = ('CompressionTestID', 'CompressionTestTID', 'CompressionTestName', 'TapsFracture',
+                 'TapsFullPropagation', 'PropagationTID', 'PropagationName', 'FractureDepth', 'StabilityEvalTID',
+                 'StabilityEvalName', 'ComprTestFractureTID', 'IncludeInSnowProfile', 'ComprTestFractureName',
+                 'Comment')
+
     def __init__(self, t):
         if t:
             self.CompressionTestID = t['CompressionTestID']
@@ -1028,6 +1874,8 @@ class ProfileColumnTest:
 
 
 class ColumnTest(Registration, Location, Observer, Pictures, ProfileColumnTest):
+    __slots__ = _form_slots(slotted_base=ProfileColumnTest)
+
     def __init__(self, d, i):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1076,6 +1924,10 @@ class ColumnTest(Registration, Location, Observer, Pictures, ProfileColumnTest):
 
 
 class AvalancheObs(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('AvalancheName', 'AvalancheTriggerName', 'Comment', 'DestructiveSizeName',
+                            'DtAvalancheTime', 'HeightStartZone', 'HeightStopZone', 'SnowLine',
+                            'TerrainStartZoneName', 'UTMEastStop', 'UTMNorthStop', 'UTMZoneStop')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1143,6 +1995,10 @@ class AvalancheObs(Registration, Location, Observer, Pictures):
 
 
 class AvalancheActivityObs(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('EstimatedNumTID', 'EstimatedNumName', 'DestructiveSizeName', 'Aspect',
+                            'HeightStartingZone', 'AvalancheName', 'AvalancheTriggerName', 'TerrainStartingZone',
+                            'DtAvalancheTime', 'Snowline', 'Comment')
+
     def __init__(self, d, i):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1207,6 +2063,11 @@ class AvalancheActivityObs(Registration, Location, Observer, Pictures):
 
 
 class AvalancheActivityObs2(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('EstimatedNumTID', 'EstimatedNumName', 'DtStart', 'DtEnd', 'ValidExposition',
+                            'ExposedHeight1', 'ExposedHeight2', 'ExposedHeightComboTID', 'AvalancheExtName',
+                            'AvalCauseName', 'AvalTriggerSimpleName', 'DestructiveSizeName', 'AvalPropagationName',
+                            'Comment', 'DtMiddleTime')
+
     def __init__(self, d, i):
 
         Registration.__init__(self, d)
@@ -1295,6 +2156,8 @@ class AvalancheEvalProblem0(Registration, Location, Observer):
     """The first avalanche problems used. At that time the problems were a list
     in the AvalancheEvaluation table. The avalanche problems where just text."""
 
+    __slots__ = _form_slots('AvalancheProblemID', 'AvalancheProblemTID', 'AvalancheProblemName')
+
     def __init__(self, d, ap_id, tid, name):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1311,6 +2174,9 @@ class AvalancheEvalProblem0(Registration, Location, Observer):
 
 
 class AvalancheEvaluation(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('AvalancheDangerTID', 'AvalancheDangerName', 'AvalancheEvaluation', 'AvalancheProblems',
+                            'ValidExposition', 'ValidHeightFrom', 'ValidHeightRelative', 'ValidHeightTo', 'Comment')
+
     def __init__(self, d):
 
         Registration.__init__(self, d)
@@ -1404,6 +2270,11 @@ class AvalancheEvaluation(Registration, Location, Observer, Pictures):
 class AvalancheEvalProblem(Registration, Location, Observer):
     """List in AvalancheEvaluation2. Part of AvalancheEvaluation2 (RegistrationTID = 30)."""
 
+    __slots__ = _form_slots('AvalancheProblemID', 'AvalCauseName', 'AvalCauseExtName', 'AvalancheProbabilityName',
+                            'AvalReleaseHeightName', 'AvalTriggerSimpleName', 'AvalancheExtName',
+                            'AvalancheProbabilityAutoText', 'AvalancheProblemAutoText', 'DestructiveSizeExtName',
+                            'Comment')
+
     def __init__(self, d, p):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1428,6 +2299,11 @@ class AvalancheEvalProblem(Registration, Location, Observer):
 
 
 class AvalancheEvaluation2(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('AvalancheEvaluation', 'AvalancheDevelopment', 'AvalancheDangerTID',
+                            'AvalancheDangerName', 'ExposedClimateTID', 'ExposedClimateName', 'ValidExposition',
+                            'ExposedHeight1', 'ExposedHeight2', 'ExposedHeightComboTID', 'Comment',
+                            'AvalancheProblems', 'ExposedClimateTName')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1532,6 +2408,9 @@ class AvalancheEvaluation2(Registration, Location, Observer, Pictures):
 
 
 class AvalancheEvaluation3(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('AvalancheEvaluation', 'AvalancheDevelopment', 'AvalancheDangerTID',
+                            'AvalancheDangerName', 'ForecastCorrectTID', 'ForecastCorrectName', 'ForecastComment')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1584,6 +2463,14 @@ class AvalancheEvaluation3(Registration, Location, Observer, Pictures):
 
 
 class AvalancheEvalProblem2(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('AvalancheProblemID', 'AvalCauseAttributeCrystalTID', 'AvalCauseAttributeLightTID',
+                            'AvalCauseAttributeSoftTID', 'AvalCauseAttributeThinTID', 'AvalCauseAttributeCrystalName',
+                            'AvalCauseAttributeLightName', 'AvalCauseAttributeSoftName', 'AvalCauseAttributeThinName',
+                            'AvalCauseDepthName', 'AvalCauseName', 'AvalCauseTID', 'AvalTriggerSimpleName',
+                            'AvalancheProbabilityName', 'DestructiveSizeName', 'AvalPropagationName',
+                            'ValidExposition', 'ExposedHeight1', 'ExposedHeight2', 'ExposedHeightComboTID',
+                            'AvalancheExtName', 'AvalancheExtTID', 'Comment')
+
     def __init__(self, d, i):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1691,6 +2578,8 @@ class AvalancheEvalProblem2(Registration, Location, Observer, Pictures):
 
 
 class SnowProfilePicture(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('PictureID', 'Photographer', 'Copyright', 'Comment')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1711,13 +2600,20 @@ class SnowProfilePicture(Registration, Location, Observer, Pictures):
         self.LangKey = d['LangKey']
 
 
-class SnowTempLayer:
+class SnowTempLayer(_Slotted):
+    __slots__ = ('Depth', 'SnowTemp')
+
     def __init__(self, l):
         self.Depth = l['Depth']
         self.SnowTemp = l['SnowTemp']
 
 
-class StratProfileLayer:
+class StratProfileLayer(_Slotted):
+    __slots__ = ('DepthTop', 'Thickness', 'GrainFormPrimaryTID', 'GrainFormPrimaryName', 'GrainFormSecondaryTID',
+                 'GrainFormSecondaryName', 'HardnessTID', 'HardnessName', 'HardnessBottomTID', 'HardnessBottomName',
+                 'WetnessTID', 'WetnessName', 'CriticalLayerTID', 'CriticalLayerName', 'Comment', 'SortOrder',
+                 'GrainSizeAvg', 'GrainSizeAvgMax')
+
     def __init__(self, l):
         self.DepthTop = l['DepthTop']
         self.Thickness = l['Thickness']
@@ -1748,7 +2644,9 @@ class StratProfileLayer:
         self.SortOrder = l['SortOrder']
 
 
-class SnowDensity:
+class SnowDensity(_Slotted):
+    __slots__ = ('CylinderDiameter', 'TareWeight', 'Comment', 'Layers')
+
     def __init__(self, d):
         self.CylinderDiameter = d['CylinderDiameter']
         self.TareWeight = d['TareWeight']
@@ -1760,7 +2658,9 @@ class SnowDensity:
             self.Layers.append(layer)
 
 
-class SnowDensityLayer:
+class SnowDensityLayer(_Slotted):
+    __slots__ = ('DensityProfileLayerID', 'Depth', 'Thickness', 'Density', 'Comment', 'Weight', 'WaterEquivalent')
+
     def __init__(self, l):
         self.DensityProfileLayerID = l['DensityProfileLayerID']
         self.Depth = l['Depth']
@@ -1773,6 +2673,9 @@ class SnowDensityLayer:
 
 
 class SnowProfile(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('TotalDepth', 'AttachmentID', 'Comment', 'StratProfile', 'SnowTemp', 'SnowDensities',
+                            'ColumnTests', 'PictureOfTID23')
+
     def __init__(self, d):
 
         Registration.__init__(self, d)
@@ -1813,8 +2716,8 @@ class SnowProfile(Registration, Location, Observer, Pictures):
 
             # Before this form was added in des 2018, profiles were added as images with RegistrationTID = 23
             self.PictureOfTID23 = 0
-            for p in self.Pictures:
-                if p.RegistrationTID == 23:
+            for a in d['Attachments']:
+                if a['RegistrationTID'] == 23:
                     self.PictureOfTID23 += 1
 
         else:
@@ -1851,8 +2754,63 @@ class SnowProfile(Registration, Location, Observer, Pictures):
 
         return _dict
 
+    def get_layers(self):
+        """The layers of the profile as numpy arrays. For many profiles, use ProfileLayers directly.
+
+        :return:    [ProfileLayers]
+        """
+
+        return ProfileLayers([self])
+
+
+class ProfileLayers(_Slotted):
+    """The layers of one or many snow profiles as numpy arrays, for analyses over all profiles in a season
+    without looping over the layer objects.
+
+    StratProfile, SnowTemp and SnowDensity are dicts of arrays with one entry pr layer, as made by to_arrays with
+    the fields in STRAT_PROFILE_FIELDS, SNOW_TEMP_FIELDS and SNOW_DENSITY_FIELDS. The layers of all profiles
+    follow each other in the order of the profiles, and the array Profile in each dict tells which profile a
+    layer belongs to, as an index in RegIDs. Missing numbers are NaN in float arrays and 0 in integer arrays.
+
+    Ex of use, grain form of the layers on top of a critical layer, for all profiles in a season:
+        layers = ProfileLayers(get_snow_profile('2018-12-01', '2019-05-31'))
+        strat = layers.StratProfile
+        critical = np.flatnonzero(strat['CriticalLayerTID'][1:] > 0) + 1
+        on_top = critical[strat['Profile'][critical - 1] == strat['Profile'][critical]] - 1
+        strat['GrainFormPrimaryTID'][on_top]
+
+    :param profiles:    [list of SnowProfile]
+    """
+
+    __slots__ = ('RegIDs', 'StratProfile', 'SnowTemp', 'SnowDensity')
+
+    def __init__(self, profiles):
+        self.RegIDs = np.array([p.RegID for p in profiles], dtype='int32')
+        self.StratProfile = _layer_arrays(profiles, lambda p: p.StratProfile, STRAT_PROFILE_FIELDS)
+        self.SnowTemp = _layer_arrays(profiles, lambda p: p.SnowTemp, SNOW_TEMP_FIELDS)
+        self.SnowDensity = _layer_arrays(profiles, lambda p: [l for sd in p.SnowDensities for l in sd.Layers],
+                                         SNOW_DENSITY_FIELDS)
+
+
+def _layer_arrays(profiles, get_layers, fields):
+    """The layers given by get_layers on all profiles, as arrays. See ProfileLayers."""
+
+    layers = []
+    profile_index = []
+    for i, p in enumerate(profiles):
+        profile_layers = get_layers(p)
+        layers += profile_layers
+        profile_index += [i] * len(profile_layers)
+
+    arrays = to_arrays(layers, fields)
+    arrays['Profile'] = np.array(profile_index, dtype='int32')
+
+    return arrays
+
+
+class IceThicknessLayer(_Slotted):
+    __slots__ = ('IceLayerID', 'IceLayerTID', 'IceLayerName', 'IceLayerThickness')
 
-class IceThicknessLayer:
     def __init__(self, l):
         self.IceLayerID = l['IceLayerID']
         self.IceLayerTID = l['IceLayerTID']
@@ -1861,6 +2819,9 @@ class IceThicknessLayer:
 
 
 class IceThickness(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('SnowDepth', 'SlushSnow', 'IceHeightBefore', 'IceHeightAfter', 'Comment',
+                            'IceThicknessLayers')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -1921,6 +2882,9 @@ class IceThickness(Registration, Location, Observer, Pictures):
 
 
 class IceCover(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('IceCoverBeforeTID', 'IceCoverBeforeName', 'IceCoverTID', 'IceCoverName',
+                            'IceCoverAfterTID', 'IceCoverAfterName', 'IceSkateabilityTID', 'IceSkateabilityName',
+                            'IceCapacityTID', 'IceCapacityName', 'Comment')
 
     def __init__(self, d):
         Registration.__init__(self, d)
@@ -1985,6 +2949,9 @@ class IceCover(Registration, Location, Observer, Pictures):
 
 
 class WaterLevel(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('WaterLevelDescribed', 'WaterLevelValue', 'WaterLevelRefTID', 'WaterLevelRefName',
+                            'Comment', 'MeasuredDischarge')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -2033,7 +3000,9 @@ class WaterLevel(Registration, Location, Observer, Pictures):
         return _dict
 
 
-class WaterLevelMeasurement:
+class WaterLevelMeasurement(_Slotted):
+    __slots__ = ('WaterLevelMeasurementId', 'WaterLevelValue', 'DtMeasurementTime', 'Comment', 'Pictures')
+
     def __init__(self, m):
         self.WaterLevelMeasurementId = m['WaterLevelMeasurementId']
         self.WaterLevelValue = m['WaterLevelValue']
@@ -2043,6 +3012,13 @@ class WaterLevelMeasurement:
 
 
 class WaterLevel2(Registration, Location, Observer):
+    __slots__ = _form_slots('WaterLevelStateTID', 'WaterLevelStateName', 'WaterAstrayTID', 'WaterAstrayName',
+                            'ObservationTimingTID', 'ObservationTimingName', 'MeasurementReferenceTID',
+                            'MeasurementReferenceName', 'MeasurementTypeTID', 'MeasurementTypeName',
+                            'WaterLevelMethodTID', 'WaterLevelMethodName', 'MarkingReferenceTID',
+                            'MarkingReferenceName', 'MarkingTypeTID', 'MarkingTypeName', 'MeasuringToolDescription',
+                            'WaterLevelMeasurements')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -2130,6 +3106,13 @@ class WaterLevel2(Registration, Location, Observer):
 
 
 class LandSlideObs(Registration, Location, Observer, Pictures):
+    __slots__ = _form_slots('DtLandSlideTime', 'DtLandSlideTimeEnd', 'UTMNorthStop', 'UTMEastStop', 'UTMZoneStop',
+                            'LandSlideTID', 'LandSlideName', 'LandSlideTriggerTID', 'LandSlideTriggerName',
+                            'LandSlideSizeTID', 'LandSlideSizeName', 'ActivityInfluencedTID',
+                            'ActivityInfluencedName', 'ForecastAccurateTID', 'ForecastAccurateName',
+                            'DamageExtentTID', 'DamageExtentName', 'UTMZoneStart', 'UTMNorthStart', 'UTMEastStart',
+                            'Comment', 'URLs')
+
     def __init__(self, d):
         Registration.__init__(self, d)
         Location.__init__(self, d)
@@ -2231,6 +3214,7 @@ class LandSlideObs(Registration, Location, Observer, Pictures):
 
 
 class PictureObservation(Registration, Location, Observer, Picture):
+    __slots__ = _form_slots(slotted_base=Picture)
 
     def __init__(self, d):
         Registration.__init__(self, d)
@@ -2241,9 +3225,268 @@ class PictureObservation(Registration, Location, Observer, Picture):
         self.LangKey = d['LangKey']
 
 
+register_form(10, GeneralObservation, 'GeneralObservation',
+              columns=['ObsHeader', 'ObsComment', 'Comment'])
+register_form(11, Incident, 'Incident',
+              columns=['GeoHazardName', 'GeoHazardTID', 'ActivityInfluencedTID', 'ActivityInfluencedName',
+                       'DamageExtentTID', 'DamageExtentName', 'IncidentHeader', 'IncidentIngress', 'IncidentText'])
+register_form(13, DangerSign, 'DangerObs', list_key='DangerObs',
+              columns=['DangerObsID', 'GeoHazardName', 'GeoHazardTID', 'Comment', 'DangerSignName',
+                       'DangerSignTID'])
+register_form(14, DamageObs, 'DamageObs', list_key='DamageObs',
+              columns=['DamageTypeTID', 'DamageTypeName', 'DamagePosition', 'Comment'])
+register_form(21, WeatherObservation, 'WeatherObservation',
+              columns=['PrecipitationTID', 'PrecipitationName', 'AirTemperature', 'CloudCover', 'WindDirection',
+                       'WindDirectionName', 'WindSpeed', 'Comment'])
+register_form(22, SnowSurfaceObservation, 'SnowSurfaceObservation',
+              columns=['SnowDepth', 'NewSnowDepth24', 'NewSnowLine', 'SnowDriftTID', 'SnowDriftName',
+                       'HeightLimitLayeredSnow', 'SnowLine', 'SnowSurfaceTID', 'SnowSurfaceName',
+                       'SurfaceWaterContentTID', 'SurfaceWaterContentName', 'Comment'])
+register_form(25, ColumnTest, 'CompressionTest', list_key='CompressionTest',
+              columns=['CompressionTestID', 'CompressionTestTID', 'CompressionTestName', 'TapsFracture',
+                       'TapsFullPropagation', 'PropagationTID', 'PropagationName', 'FractureDepth', 'StabilityEvalTID',
+                       'StabilityEvalName', 'ComprTestFractureTID', 'IncludeInSnowProfile', 'ComprTestFractureName',
+                       'Comment'])
+register_form(26, AvalancheObs, 'AvalancheObs',
+              columns=['AvalancheName', 'AvalancheTriggerName', 'Comment', 'DestructiveSizeName',
+                       ('DtAvalancheTime', _time_column('DtAvalancheTime')), 'HeightStartZone', 'HeightStopZone',
+                       'SnowLine', 'TerrainStartZoneName', 'UTMEastStop', 'UTMNorthStop', 'UTMZoneStop'])
+register_form(27, AvalancheActivityObs, 'AvalancheActivityObs', list_key='AvalancheActivityObs',
+              columns=['EstimatedNumTID', 'EstimatedNumName', 'DestructiveSizeName', 'Aspect', 'HeigthStartZone',
+                       'AvalancheName', 'AvalancheTriggerName', 'TerrainStartZoneName',
+                       ('DtAvalancheTime', _time_column('DtAvalancheTime')), 'SnowLine', 'Comment'])
+register_form(33, AvalancheActivityObs2, 'AvalancheActivityObs2', list_key='AvalancheActivityObs2',
+              columns=['EstimatedNumTID', 'EstimatedNumName', ('DtStart', _time_column('DtStart')),
+                       ('DtEnd', _time_column('DtEnd')), ('DtMiddleTime', _middle_time_column), 'ValidExposition',
+                       'ExposedHeight1', 'ExposedHeight2', 'ExposedHeightComboTID', 'AvalancheExtName',
+                       'AvalCauseName', 'AvalTriggerSimpleName', 'DestructiveSizeName', 'AvalPropagationName',
+                       'Comment'])
+register_form(28, AvalancheEvaluation, 'AvalancheEvaluation',
+              columns=['AvalancheDangerTID', 'AvalancheDangerName', ('AvalancheEvaluation', 'AvalancheEvaluation1'),
+                       'ValidExposition', 'ValidHeightFrom', 'ValidHeightRelative', ('ValidHeightTo', 'ValidHeigtTo'),
+                       'Comment']
+              + [(key + str(n), _avalanche_problem_column(key, n))
+                 for n in range(1, 4) for key in ['AvalancheProblemTID', 'AvalancheProblemName']])
+# to_dict of AvalancheEvaluation2 has columns pr AvalancheEvalProblemID in the data, so its data frames are made
+# from the objects.
+register_form(30, AvalancheEvaluation2, 'AvalancheEvaluation2')
+register_form(31, AvalancheEvaluation3, 'AvalancheEvaluation3',
+              columns=['AvalancheEvaluation', 'AvalancheDevelopment', 'AvalancheDangerTID', 'AvalancheDangerName',
+                       'ForecastCorrectTID', 'ForecastCorrectName', 'ForecastComment'])
+register_form(32, AvalancheEvalProblem2, 'AvalancheEvalProblem2', list_key='AvalancheEvalProblem2',
+              columns=['AvalancheEvalProblemID', 'AvalCauseAttributeCrystalTID', 'AvalCauseAttributeLightTID',
+                       'AvalCauseAttributeSoftTID', 'AvalCauseAttributeThinTID', 'AvalCauseAttributeCrystalName',
+                       'AvalCauseAttributeLightName', 'AvalCauseAttributeSoftName', 'AvalCauseAttributeThinName',
+                       'AvalCauseDepthName', 'AvalCauseName', 'AvalCauseTID', 'AvalTriggerSimpleName',
+                       'AvalProbabilityName', 'DestructiveSizeName', 'AvalPropagationName', 'ValidExposition',
+                       'ExposedHeight1', 'ExposedHeight2', 'ExposedHeightComboTID', 'AvalancheExtName',
+                       'AvalancheExtTID', 'Comment'])
+register_form(36, SnowProfile, 'SnowProfile2',
+              columns=['TotalDepth', 'AttachmentID', 'Comment',
+                       ('StratProfile', _count_column('StratProfile', 'Layers')),
+                       ('SnowTemp', _count_column('SnowTemp', 'Layers')),
+                       ('SnowDensities', _count_column('SnowDensity')),
+                       ('ColumnTests', _count_column('CompressionTest')),
+                       ('ProfilePicturesOfTID23', _profile_pictures_of_tid23_column)])
+register_form(50, IceThickness, 'IceThickness',
+              columns=['SnowDepth', ('SlushSnow', 'IceThicknessSum'), 'IceThicknessSum', 'IceHeightBefore',
+                       'IceHeightAfter', 'Comment', ('Layers', _count_column('IceThicknessLayers'))])
+register_form(51, IceCover, 'IceCoverObs',
+              columns=['IceCoverBeforeTID', 'IceCoverBeforeName', 'IceCoverTID', 'IceCoverName', 'IceCoverAfterTID',
+                       'IceCoverAfterName', 'IceSkateabilityTID', 'IceSkateabilityName', 'IceCapacityTID',
+                       'IceCapacityName', 'Comment'])
+register_form(61, WaterLevel, 'WaterLevel',
+              columns=['WaterLevelDescribed', 'WaterLevelValue', 'WaterLevelRefTID', 'WaterLevelRefName', 'Comment',
+                       'MeasuredDischarge'])
+register_form(62, WaterLevel2, 'WaterLevel2',
+              columns=['WaterLevelStateTID', 'WaterLevelStateName', 'WaterAstrayTID', 'WaterAstrayName',
+                       'ObservationTimingTID', 'ObservationTimingName', 'MeasurementReferenceTID',
+                       'MeasurementReferenceName', 'MeasurementTypeTID', 'MeasurementTypeName', 'WaterLevelMethodTID',
+                       'WaterLevelMethodName', 'MarkingReferenceTID', 'MarkingReferenceName', 'MarkingTypeTID',
+                       'MarkingTypeName', 'MeasuringToolDescription',
+                       ('WaterLevelMeasurements', _count_column('WaterLevelMeasurement'))])
+register_form(71, LandSlideObs, 'LandSlideObs',
+              columns=[('DtLandSlideTime', _time_column('DtLandSlideTime')),
+                       ('DtLandSlideTimeEnd', _time_column('DtLandSlideTimeEnd')), 'UTMNorthStop', 'UTMEastStop',
+                       'UTMZoneStop', 'LandSlideTID', 'LandSlideName', 'LandSlideTriggerTID', 'LandSlideTriggerName',
+                       'LandSlideSizeTID', 'LandSlideSizeName', 'ActivityInfluencedTID', 'ActivityInfluencedName',
+                       'ForecastAccurateTID', 'ForecastAccurateName', 'DamageExtentTID', 'DamageExtentName',
+                       'UTMZoneStart', 'UTMNorthStart', 'UTMEastStart', 'Comment', ('URLs', _urls_column)])
+
+
+def make_data_frame(data, registration_tid, output='DataFrame'):
+    """Makes a table of the forms of one type in the raw json from the webapi. It has the same columns and values
+    as a DataFrame of to_dict() of the form objects, but the columns are filled straight from the json, so no
+    objects are made on the way. Rows are sorted by DtObsTime.
+
+    Forms registered without columns are made as objects and converted with to_dict.
+
+    :param data:                [list of dict] registrations as returned by get_data
+    :param registration_tid:    [int] RegistrationTID of the forms in the table
+    :param output:              [string] 'DataFrame' for a pandas.DataFrame or 'Arrow' for a pyarrow.Table.
+    :return:                    [DataFrame or Table] one row pr form
+    """
+
+    registrations = sorted(data, key=lambda d: _stringtime_2_datetime(d['DtObsTime']))
+
+    if registration_tid in _form_columns:
+        columns = _make_columns(registrations, registration_tid)
+    else:
+        list_of_dict = [o.to_dict() for d in registrations for o in _get_object(registration_tid, d)]
+        columns = pd.DataFrame(list_of_dict)
+
+    if output == 'Arrow':
+        try:
+            import pyarrow as pa
+        except ImportError:
+            lg.warning("getobservations.py -> make_data_frame: pyarrow is needed for Arrow output.")
+            return None
+        if isinstance(columns, pd.DataFrame):
+            return pa.Table.from_pandas(columns, preserve_index=False)
+        return pa.table(columns)
+
+    return pd.DataFrame(columns)
+
+
+def _make_columns(registrations, registration_tid):
+    """The columns of make_data_frame, as lists in a dict. Common columns first and then the columns of the form,
+    in the same order as to_dict gives them. Columns of the form with the same name as a common column replace it.
+
+    Each form is read into a row, with the keys read straight from the form in one go with itemgetter, and the
+    rows are turned into columns at the end with zip.
+    """
+
+    form_class, json_key, list_key = _form_registry[registration_tid]
+
+    key_columns, keys, function_columns, functions = [], [], [], []
+    for form_column in _form_columns[registration_tid]:
+        if isinstance(form_column, str):
+            column, key = form_column, form_column
+        else:
+            column, key = form_column
+        if isinstance(key, str):
+            key_columns.append(column)
+            keys.append(key)
+        else:
+            function_columns.append(column)
+            functions.append(key)
+
+    if len(keys) == 1:
+        get_keys = lambda item, key=keys[0]: (item[key],)
+    elif keys:
+        get_keys = operator.itemgetter(*keys)
+    else:
+        get_keys = lambda item: ()
+    no_form = (None,) * len(keys)
+
+    rows = []
+    for d in registrations:
+        if list_key is None:
+            items = [d[json_key]]
+        else:
+            items = d[list_key] or []
+
+        if not items:
+            continue
+
+        common_values = _common_values(registration_tid, d)
+
+        for item in items:
+            rows.append(common_values
+                        + (get_keys(item) if item else no_form)
+                        + tuple([function(item, d) for function in functions]))
+
+    row_columns = _COMMON_COLUMNS + tuple(key_columns) + tuple(function_columns)
+    if rows:
+        row_values = list(zip(*rows))
+    else:
+        row_values = [()] * len(row_columns)
+
+    # Form columns come after the common ones in a row, so they win if a name is in both.
+    column_index = {column: i for i, column in enumerate(row_columns)}
+
+    columns = {}
+    for column in _COMMON_COLUMNS + tuple(c if isinstance(c, str) else c[0] for c in _form_columns[registration_tid]):
+        if column not in columns:
+            columns[column] = list(row_values[column_index[column]])
+
+    return columns
+
+
+def _map_observations(data, make_forms=False):
+    """Maps registrations to Observation objects. Module level, so it may be sent to worker processes.
+
+    :param data:        [list of dict] registrations as returned by get_data
+    :param make_forms:  [bool] If True, the forms are made as well. Else they are made when asked for.
+    :return:            [list of Observation]
+    """
+
+    observations = [Observation(d) for d in data]
+
+    if make_forms:
+        for o in observations:
+            o.Observations
+
+    return observations
+
+
+def _map_forms(registration_tid, data):
+    """Maps the forms of one type on the registrations to objects. Module level, so it may be sent to worker
+    processes.
+
+    :param registration_tid:    [int]
+    :param data:                [list of dict] registrations as returned by get_data
+    :return:                    [list] of form objects
+    """
+
+    forms = []
+    for d in data:
+        forms += _get_object(registration_tid, d)
+
+    return forms
+
+
+def _map_in_processes(function, data, workers=1):
+    """Maps the registrations in data with function, which takes a list of registrations and returns a list of
+    objects. With more than one worker, data is split in chunks that are mapped in a pool of worker processes.
+    The results are put together in the order of the chunks, so the order is the same as with one worker.
+
+    The objects, with their raw json, are pickled on the way back and unpickled in this process one chunk at a
+    time. Unpickling is not much cheaper than mapping, so it only pays off when mapping is the heavy part, i.e.
+    when the forms are made in the workers, and the json is slow to map. Names are interned in the workers, so
+    after unpickling equal names are only shared within a chunk. Compare with tests/benchobservations.py
+    --workers before using it in a batch job. If the pool fails, e.g. where new processes may not be started, data
+    is mapped in this process.
+
+    :param function:    [function] module level, so it can be pickled. E.g. functools.partial(_map_forms, 13).
+    :param data:        [list of dict] registrations as returned by get_data
+    :param workers:     [int] number of worker processes. Default 1 maps in this process.
+    :return:            [list] of objects
+    """
+
+    if workers is None or workers <= 1 or len(data) < 2:
+        return function(data)
+
+    chunk_size = max(1, math.ceil(len(data) / (workers * MAP_CHUNKS_PR_WORKER)))
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+    mapped = []
+    try:
+        with futures.ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            for chunk_mapped in executor.map(function, chunks):
+                mapped += chunk_mapped
+
+    except (OSError, futures.process.BrokenProcessPool) as e:
+        lg.warning("getobservations.py -> _map_in_processes: Worker processes failed. Mapping in this process. {0}"
+                   .format(e))
+        return function(data)
+
+    return mapped
+
+
 def _get_general(registration_type, from_date, to_date, region_ids=None, location_id=None,
                  countries=None, time_zone=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                 group_id=None, output='List', geohazard_tids=None, lang_key=1):
+                 group_id=None, output='List', geohazard_tids=None, lang_key=1, original_data=None, workers=1):
     """Gets observations of one requested type and maps them to one requested class.
 
     :param registration_type:   [int] RegistrationTID for the requested observation type
@@ -2254,15 +3497,19 @@ def _get_general(registration_type, from_date, to_date, region_ids=None, locatio
     :param observer_nick:       [int or list of ints] Default None gives all.
     :param observer_competence: [string] Part of a observer nick name
     :param group_id:            [int]
-    :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
+    :param output:              [string] Options: 'List', 'DataFrame', 'Arrow' and 'Count'. Default 'List'.
+                                'DataFrame' and 'Arrow' are made straight from the json. See make_data_frame.
     :param geohazard_tids       [int or list of ints] 10 is snow, 20,30,40 are dirt, 60 is water and 70 is ice
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param original_data:       [string] What the objects keep of the raw json. See retain_original_data.
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. Default 1 maps in
+                                this process. See _map_in_processes.
 
     :return:
     """
 
     obs_list = None
-    if output not in ['List', 'DataFrame', 'Count']:
+    if output not in ['List', 'DataFrame', 'Arrow', 'Count']:
         lg.warning("getobservations.py -> _get_general: Illegal output option.")
         return obs_list
 
@@ -2280,23 +3527,19 @@ def _get_general(registration_type, from_date, to_date, region_ids=None, locatio
                         location_id=location_id, countries=countries, time_zone=time_zone, lang_key=lang_key,
                         registration_types=registration_type, geohazard_tids=geohazard_tids)
 
-        if output == 'List' or output == 'DataFrame':
-            obs_list = []
-            for d in data:
-                obs_list += _get_object(registration_type, d)
-            obs_list = sorted(obs_list, key=lambda registration_class_type: registration_class_type.DtObsTime)
-
         if output == 'List':
+            obs_list = _map_in_processes(functools.partial(_map_forms, registration_type), data, workers)
+            obs_list = sorted(obs_list, key=lambda registration_class_type: registration_class_type.DtObsTime)
+            retain_original_data(obs_list, original_data)
             return obs_list
 
-        if output == 'DataFrame':
-            list_of_dict = [d.to_dict() for d in obs_list]
-            return pd.DataFrame(list_of_dict)
+        if output == 'DataFrame' or output == 'Arrow':
+            return make_data_frame(data, registration_type, output=output)
 
 
 def get_general_observation(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                             group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                            output='List', geohazard_tids=None, lang_key=1):
+                            output='List', geohazard_tids=None, lang_key=1, workers=1):
     """Gets observations like given in GeneralObs table with RegistrationTID = 10.
     View is shared by all the geo hazards so the filter includes geohazard_tid if only some geohazards are needed.
 
@@ -2313,6 +3556,7 @@ def get_general_observation(from_date, to_date, region_ids=None, location_id=Non
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param geohazard_tids:      [int or list of ints] Default None gives all.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2321,12 +3565,12 @@ def get_general_observation(from_date, to_date, region_ids=None, location_id=Non
                         region_ids=region_ids, location_id=location_id, countries=countries, time_zone=time_zone,
                         group_id=group_id, observer_ids=observer_ids, observer_nick=observer_nick,
                         observer_competence=observer_competence, output=output, geohazard_tids=geohazard_tids,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_incident(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None, group_id=None,
                  observer_ids=None, observer_nick=None, observer_competence=None, output='List', geohazard_tids=None,
-                 lang_key=1):
+                 lang_key=1, workers=1):
     """Gets observations like given the Incident table with RegistrationTID = 11.
     Table is shared by all the geohazards so the filter includes geohazard_tid if only some geohazards are needed.
 
@@ -2343,6 +3587,7 @@ def get_incident(from_date, to_date, region_ids=None, location_id=None, countrie
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param geohazard_tids:      [int or list of ints] Default None gives all.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2351,12 +3596,12 @@ def get_incident(from_date, to_date, region_ids=None, location_id=None, countrie
                         region_ids=region_ids, location_id=location_id, countries=countries, time_zone=time_zone,
                         group_id=group_id, observer_ids=observer_ids, observer_nick=observer_nick,
                         observer_competence=observer_competence, output=output, geohazard_tids=geohazard_tids,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_danger_sign(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                     group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                    output='List', geohazard_tids=None, lang_key=1):
+                    output='List', geohazard_tids=None, lang_key=1, workers=1):
     """Gets observations like given in DangerObsV table with RegistrationTID = 13.
     View is shared by all the geohazards so the filter includes geohazard_tid if only some geohazards are needed.
 
@@ -2373,6 +3618,7 @@ def get_danger_sign(from_date, to_date, region_ids=None, location_id=None, count
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param geohazard_tids:      [int or list of ints] Default None gives all.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2381,12 +3627,12 @@ def get_danger_sign(from_date, to_date, region_ids=None, location_id=None, count
                         region_ids=region_ids, location_id=location_id, countries=countries, time_zone=time_zone,
                         group_id=group_id, observer_ids=observer_ids, observer_nick=observer_nick,
                         observer_competence=observer_competence, output=output, geohazard_tids=geohazard_tids,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_damage_observation(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                            group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                           output='List', geohazard_tids=None, lang_key=1):
+                           output='List', geohazard_tids=None, lang_key=1, workers=1):
     """Gets observations like given in SnowSurfaceObservation table with RegistrationTID = 22.
     View is shared by all the geohazards so the filter includes geohazard_tid if only some geohazards are needed.
 
@@ -2403,6 +3649,7 @@ def get_damage_observation(from_date, to_date, region_ids=None, location_id=None
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param geohazard_tids:      [int or list of ints] Default None gives all.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2410,12 +3657,12 @@ def get_damage_observation(from_date, to_date, region_ids=None, location_id=None
     return _get_general(14, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        geohazard_tids=geohazard_tids, lang_key=lang_key)
+                        geohazard_tids=geohazard_tids, lang_key=lang_key, workers=workers)
 
 
 def get_weather_observation(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                             group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                            output='List', lang_key=1):
+                            output='List', lang_key=1, workers=1):
     """Gets observations like given in WeatherObservation table with RegistrationTID = 21.
     View is used by GeoHazard = 10 (snow).
 
@@ -2431,6 +3678,7 @@ def get_weather_observation(from_date, to_date, region_ids=None, location_id=Non
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2438,12 +3686,12 @@ def get_weather_observation(from_date, to_date, region_ids=None, location_id=Non
     return _get_general(21, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        geohazard_tids=10, lang_key=lang_key)
+                        geohazard_tids=10, lang_key=lang_key, workers=workers)
 
 
 def get_snow_surface_observation(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                                  group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                                 output='List', lang_key=1):
+                                 output='List', lang_key=1, workers=1):
     """Gets observations like given in SnowSurfaceObservation table with RegistrationTID = 22.
     View is used by GeoHazard = 10 (snow).
 
@@ -2459,6 +3707,7 @@ def get_snow_surface_observation(from_date, to_date, region_ids=None, location_i
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2466,12 +3715,12 @@ def get_snow_surface_observation(from_date, to_date, region_ids=None, location_i
     return _get_general(22, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        geohazard_tids=10, lang_key=lang_key)
+                        geohazard_tids=10, lang_key=lang_key, workers=workers)
 
 
 def get_tests(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
               group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-              output='List', lang_key=1):
+              output='List', lang_key=1, workers=1):
     """Gets observations of tests done in a snow pit.
 
     :param from_date:           [date] A query returns [from_date, to_date]
@@ -2486,6 +3735,7 @@ def get_tests(from_date, to_date, region_ids=None, location_id=None, countries=N
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2493,12 +3743,12 @@ def get_tests(from_date, to_date, region_ids=None, location_id=None, countries=N
     return _get_general(25, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_avalanche(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                   group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                  output='List', lang_key=1):
+                  output='List', lang_key=1, workers=1):
     """Gets observations as given in the AvalancheObs table with RegistrationTID = 26.
     These are observations of single avalanches, often related to incidents. It is specific for snow observations.
 
@@ -2514,6 +3764,7 @@ def get_avalanche(from_date, to_date, region_ids=None, location_id=None, countri
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2521,12 +3772,12 @@ def get_avalanche(from_date, to_date, region_ids=None, location_id=None, countri
     return _get_general(26, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence,
-                        output=output, lang_key=lang_key)
+                        output=output, lang_key=lang_key, workers=workers)
 
 
 def get_avalanche_activity(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                            group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                           output='List', lang_key=1):
+                           output='List', lang_key=1, workers=1):
     """Gets observations as given in AvalancheActivityObs table with RegistrationTID = 27.
     It is specific for snow observations. The table was introduced at the beginning an phased out in in january 2016.
 
@@ -2542,6 +3793,7 @@ def get_avalanche_activity(from_date, to_date, region_ids=None, location_id=None
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2549,12 +3801,12 @@ def get_avalanche_activity(from_date, to_date, region_ids=None, location_id=None
     return _get_general(27, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence,
-                        output=output, lang_key=lang_key)
+                        output=output, lang_key=lang_key, workers=workers)
 
 
 def get_avalanche_activity_2(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                              group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                             output='List', lang_key=1):
+                             output='List', lang_key=1, workers=1):
     """Gets observations like given in AvalancheActivityObs2 table with RegistrationTID = 33.
     It is specific for snow observations. The table was introduced in january 2016.
 
@@ -2570,6 +3822,7 @@ def get_avalanche_activity_2(from_date, to_date, region_ids=None, location_id=No
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2577,12 +3830,12 @@ def get_avalanche_activity_2(from_date, to_date, region_ids=None, location_id=No
     return _get_general(33, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_avalanche_evaluation(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                              group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                             output='List', lang_key=1):
+                             output='List', lang_key=1, workers=1):
     """Gets observations like given in AvalancheEvaluation table with RegistrationTID = 28.
     It contains avalanche problems. It is specific for snow observations.
     The table was used winter and spring 2012. Last observatins jan/beb 2013 by drift@svv..
@@ -2599,6 +3852,7 @@ def get_avalanche_evaluation(from_date, to_date, region_ids=None, location_id=No
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2606,12 +3860,12 @@ def get_avalanche_evaluation(from_date, to_date, region_ids=None, location_id=No
     return _get_general(28, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_avalanche_evaluation_2(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                                group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                               output='List', lang_key=1):
+                               output='List', lang_key=1, workers=1):
     """Gets observations like given in AvalancheEvaluation2 table with RegistrationTID = 30.
     It contains the avalanche problems used at the time. It is specific for snow observations.
     The table was introduced December 2012 and phased out winter 2014. It was last used May 2014.
@@ -2628,6 +3882,7 @@ def get_avalanche_evaluation_2(from_date, to_date, region_ids=None, location_id=
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2635,12 +3890,12 @@ def get_avalanche_evaluation_2(from_date, to_date, region_ids=None, location_id=
     return _get_general(30, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_avalanche_evaluation_3(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                                group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                               output='List', lang_key=1):
+                               output='List', lang_key=1, workers=1):
     """Gets observations like given in AvalancheEvaluation3 table with RegistrationTID = 31.
     It is specific for snow observations. The table was introduced in february 2014.
 
@@ -2656,6 +3911,7 @@ def get_avalanche_evaluation_3(from_date, to_date, region_ids=None, location_id=
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2663,12 +3919,12 @@ def get_avalanche_evaluation_3(from_date, to_date, region_ids=None, location_id=
     return _get_general(31, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_avalanche_problem_2(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                             group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                            output='List', lang_key=1):
+                            output='List', lang_key=1, workers=1):
     """Gets observations given in AvalancheEvalProblem2 table with RegistrationTID = 31.
     It is specific for snow observations. The table was introduced winter 2014 with the
     first observation was February 2014. It is currently in use (Oct 2017).
@@ -2685,6 +3941,7 @@ def get_avalanche_problem_2(from_date, to_date, region_ids=None, location_id=Non
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2692,12 +3949,12 @@ def get_avalanche_problem_2(from_date, to_date, region_ids=None, location_id=Non
     return _get_general(32, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_snow_profile(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                      group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                     output='List', lang_key=1):
+                     output='List', lang_key=1, workers=1):
     """Gets observations of snow profiles. Before dec 2018 these were provided as pictures.
 
     :param from_date:           [date] A query returns [from_date, to_date]
@@ -2712,6 +3969,7 @@ def get_snow_profile(from_date, to_date, region_ids=None, location_id=None, coun
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2719,12 +3977,12 @@ def get_snow_profile(from_date, to_date, region_ids=None, location_id=None, coun
     return _get_general(36, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_ice_thickness(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                       group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                      output='List', lang_key=1):
+                      output='List', lang_key=1, workers=1):
     """Gets observations of ice thickness from the IceThicknessObs table.
 
     :param from_date:           [date] A query returns [from_date, to_date]
@@ -2739,6 +3997,7 @@ def get_ice_thickness(from_date, to_date, region_ids=None, location_id=None, cou
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2746,12 +4005,12 @@ def get_ice_thickness(from_date, to_date, region_ids=None, location_id=None, cou
     return _get_general(50, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_ice_cover(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                   group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                  output='List', lang_key=1):
+                  output='List', lang_key=1, workers=1):
     """Gets observations of ice cover from the IceCoverObs table.
 
     :param from_date:           [date] A query returns [from_date, to_date]
@@ -2766,6 +4025,7 @@ def get_ice_cover(from_date, to_date, region_ids=None, location_id=None, countri
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2773,12 +4033,12 @@ def get_ice_cover(from_date, to_date, region_ids=None, location_id=None, countri
     return _get_general(51, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_water_level(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                     group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                    output='List', lang_key=1):
+                    output='List', lang_key=1, workers=1):
     """Gets observations of water level from the WaterLevel table. Ths was the first modelling of this form and
     was phased out in 2017.
 
@@ -2794,6 +4054,7 @@ def get_water_level(from_date, to_date, region_ids=None, location_id=None, count
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2801,12 +4062,12 @@ def get_water_level(from_date, to_date, region_ids=None, location_id=None, count
     return _get_general(61, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_water_level_2(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                       group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                      output='List', lang_key=1):
+                      output='List', lang_key=1, workers=1):
     """
     Gets observations of water level from the WaterLevel2 table which was put to use in 2017.
 
@@ -2822,6 +4083,7 @@ def get_water_level_2(from_date, to_date, region_ids=None, location_id=None, cou
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2829,12 +4091,12 @@ def get_water_level_2(from_date, to_date, region_ids=None, location_id=None, cou
     return _get_general(62, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        lang_key=lang_key)
+                        lang_key=lang_key, workers=workers)
 
 
 def get_land_slide_obs(from_date, to_date, region_ids=None, location_id=None, countries=None, time_zone=None,
                        group_id=None, observer_ids=None, observer_nick=None, observer_competence=None,
-                       output='List', lang_key=1):
+                       output='List', lang_key=1, workers=1):
     """
     Gets observations of land slide observations in the LandSlideObs table in regObs.
 
@@ -2850,6 +4112,7 @@ def get_land_slide_obs(from_date, to_date, region_ids=None, location_id=None, co
     :param observer_competence: [string] Part of a observer nick name
     :param output:              [string] Options: 'List', 'DataFrame' and 'Count'. Default 'List'.
     :param lang_key             [int] 1 is norwegian, 2 is english
+    :param workers:             [int] Processes mapping the json to objects for output 'List'. See _get_general.
 
     :return:
     """
@@ -2857,13 +4120,14 @@ def get_land_slide_obs(from_date, to_date, region_ids=None, location_id=None, co
     return _get_general(71, from_date=from_date, to_date=to_date, region_ids=region_ids, location_id=location_id,
                         countries=countries, time_zone=time_zone, group_id=group_id, observer_ids=observer_ids,
                         observer_nick=observer_nick, observer_competence=observer_competence, output=output,
-                        geohazard_tids=20, lang_key=lang_key)
+                        geohazard_tids=20, lang_key=lang_key, workers=workers)
 
 
 def get_all_observations(from_date=None, to_date=None, registration_types=None, reg_ids=None, region_ids=None,
                          location_id=None, countries=None, time_zone=None,
                          observer_ids=None, observer_nick=None, observer_competence=None, group_id=None,
-                         output='List', geohazard_tids=None, lang_key=1):
+                         output='List', geohazard_tids=None, lang_key=1, max_workers=1,
+                         shard_days=None, shard_size=None, max_shards=4, original_data=None, workers=1):
     """
     Uses the get_data method and maps all data to their respective class. Returns data as list or nest.
 
@@ -2884,6 +4148,16 @@ def get_all_observations(from_date=None, to_date=None, registration_types=None,
                                          'Count' returns the number of matching observations to the given query.
     :param geohazard_tids:      [int or list of ints] Default None gives all.
     :param lang_key:            [int] Default 1 gives Norwegian.
+    :param max_workers:         [int] Default 1 requests pages one by one. If more, pages are requested concurrently.
+    :param shard_days:          [int] Default None does not shard. Number of days in each shard. See get_data.
+    :param shard_size:          [int] Default None does not shard. Approximate number of registrations in a shard.
+    :param max_shards:          [int] Maximum number of shards requested at the same time.
+    :param original_data:       [string] What the objects keep of the raw json. 'Keep', 'Drop', 'Compressed' or
+                                         'Reference'. Default None uses the api config. See retain_original_data.
+    :param workers:             [int] Only for 'FlatList'. Default 1 maps the json to objects in this process. If
+                                         more, it is mapped in chunks in a pool of worker processes, where the
+                                         forms are made as well. See _map_in_processes. 'List' is always mapped
+                                         here, since its forms are not made before asked for.
 
     :return:                    [list or int] Depending on output requested.
     """
@@ -2900,12 +4174,16 @@ def get_all_observations(from_date=None, to_date=None, registration_types=None,
         data = get_data(from_date=from_date, to_date=to_date, registration_types=registration_types, reg_ids=reg_ids,
                         region_ids=region_ids, location_id=location_id, countries=countries, time_zone=time_zone,
                         observer_ids=observer_ids, observer_nick=observer_nick, observer_competence=observer_competence,
-                        group_id=group_id, geohazard_tids=geohazard_tids, lang_key=lang_key)
+                        group_id=group_id, geohazard_tids=geohazard_tids, lang_key=lang_key,
+                        max_workers=max_workers, shard_days=shard_days, shard_size=shard_size,
+                        max_shards=max_shards)
 
-        data_in_classes = []
+        if output == 'FlatList':
+            data_in_classes = _map_in_processes(functools.partial(_map_observations, make_forms=True), data, workers)
+        else:
+            data_in_classes = _map_observations(data)
 
-        for d in data:
-            data_in_classes.append(Observation(d))
+        retain_original_data(data_in_classes, original_data)
 
         if output == 'List':
             return data_in_classes
@@ -2918,6 +4196,103 @@ def get_all_observations(from_date=None, to_date=None, registration_types=None,
         lg.warning("getobservations.py -> get_data_in_classes: Illegal output option.")
 
 
+def iter_observations(from_date=None, to_date=None, registration_types=None, reg_ids=None, region_ids=None,
+                      location_id=None, countries=None, time_zone=None,
+                      observer_ids=None, observer_nick=None, observer_competence=None, group_id=None,
+                      output='List', geohazard_tids=None, lang_key=1, max_workers=2, original_data=None):
+    """
+    Same as get_all_observations, but a generator. Uses iter_data and maps each registration to its class as it
+    arrives, so only the observation being consumed and a few pages of raw data are held in memory.
+
+    :param output:              [string] 'List' yields one Observation pr registration.
+                                         'FlatList' yields one object pr form (observation type).
+    :param max_workers:         [int] Default 2. Number of pages requested ahead of the one being consumed.
+    :param original_data:       [string] What the objects keep of the raw json. See retain_original_data.
+
+    Other parameters as in get_all_observations.
+
+    :return:                    [generator] of Observation objects or of form objects, depending on output.
+    """
+
+    if output not in ['List', 'FlatList']:
+        lg.warning("getobservations.py -> iter_observations: Illegal output option.")
+        return
+
+    data = iter_data(from_date=from_date, to_date=to_date, registration_types=registration_types, reg_ids=reg_ids,
+                     region_ids=region_ids, location_id=location_id, countries=countries, time_zone=time_zone,
+                     observer_ids=observer_ids, observer_nick=observer_nick, observer_competence=observer_competence,
+                     group_id=group_id, geohazard_tids=geohazard_tids, lang_key=lang_key, max_workers=max_workers)
+
+    for d in data:
+        observation = Observation(d)
+        retain_original_data([observation], original_data)
+
+        if output == 'List':
+            yield observation
+
+        else:
+            for o in observation.Observations:
+                yield o
+
+
+def to_arrays(observations, fields=None):
+    """Collects header fields of a list of observations in one numpy array pr field, so counting and bucketing can
+    be done on the arrays instead of looping over the objects. Typically used on a FlatList, but any objects with
+    the attributes will do, e.g. the List of Observation objects.
+
+    Ex of use, number of forms pr geohazard and month:
+        arrays = to_arrays(get_all_observations('2019-01-01', '2019-03-31', output='FlatList'))
+        months = arrays['DtObsTime'].astype('datetime64[M]')
+        np.unique(np.stack([arrays['GeoHazardTID'], months.astype(int)]), axis=1, return_counts=True)
+
+    Times are datetime64, without time zone. Times given with a time zone are kept in the local time they were
+    given in. Missing times are NaT. Missing integers are 0, which is "Not given" in the KDVs.
+
+    :param observations:    [list] of form or Observation objects
+    :param fields:          [list of tuples] (attribute, numpy dtype). Default None gives RECORD_FIELDS.
+    :return:                [dict] attribute: numpy array
+    """
+
+    if fields is None:
+        fields = RECORD_FIELDS
+
+    arrays = {}
+    for name, dtype in fields:
+        dtype = np.dtype(dtype)
+        values = [getattr(o, name, None) for o in observations]
+
+        if dtype.kind == 'M':
+            values = [v.replace(tzinfo=None) if v is not None and v.tzinfo is not None else v for v in values]
+            # pandas converts datetime objects many times faster than numpy does.
+            arrays[name] = pd.to_datetime(values).to_numpy().astype(dtype)
+        elif dtype.kind in 'iu':
+            arrays[name] = np.fromiter((0 if v is None else v for v in values), dtype=dtype, count=len(values))
+        else:
+            arrays[name] = np.array(values, dtype=dtype)
+
+    return arrays
+
+
+def to_records(observations, fields=None):
+    """The same as to_arrays, but as one numpy structured array with a record pr observation.
+
+    :param observations:    [list] of form or Observation objects
+    :param fields:          [list of tuples] (attribute, numpy dtype). Default None gives RECORD_FIELDS.
+    :return:                [numpy structured array] with the attributes as field names
+    """
+
+    if fields is None:
+        fields = RECORD_FIELDS
+
+    arrays = to_arrays(observations, fields)
+
+    records = np.empty(len(observations), dtype=[(name, dtype) for name, dtype in fields])
+    for name, _ in fields:
+        records[name] = arrays[name]
+
+    return records
+
+
 def _request_testing():
     """
     Method for testing requests to Regobs web-api directly.
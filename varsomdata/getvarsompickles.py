@@ -28,18 +28,77 @@ def _observation_is_not_empty(o):
     return True
 
 
-def get_all_observations(year, output='List', geohazard_tids=None, lang_key=1, max_file_age=23):
+def _sync_observations(from_date, to_date, file_name_list, watermark, lang_key=1, max_workers=10,
+                       original_data=None):
+    """Updates the stored list of observations with registrations created or changed since the last sync.
+
+    The watermark is the latest DtChangeTime seen in regObs. Registrations changed after it (with some overlap,
+    since syncing twice is harmless) are requested and replaced or added by RegID. Registrations deleted in
+    regObs are not seen by the search and stay in the stored list until the next full request.
+
+    If any request fails, the error is raised, so a partial sync is never taken for a whole one.
+
+    :return listed_observations:    [list of Observation] the updated list
+    """
+
+    log_ref = 'getvarsompickles.py -> _sync_observations'
+
+    listed_observations = mp.unpickle_anything(file_name_list)
+    from_change_time = watermark - dt.timedelta(minutes=10)
+
+    data = go.get_data(from_date=from_date, to_date=to_date, geohazard_tids=None, lang_key=lang_key,
+                       max_workers=max_workers, from_change_time=from_change_time, raise_errors=True)
+    changed_observations = go.retain_original_data([go.Observation(d) for d in data], original_data)
+
+    # Changed registrations replace the stored ones where they are. New registrations are added at the end.
+    index_by_reg_id = {o.RegID: i for i, o in enumerate(listed_observations)}
+    for o in changed_observations:
+        if o.RegID in index_by_reg_id:
+            listed_observations[index_by_reg_id[o.RegID]] = o
+        else:
+            index_by_reg_id[o.RegID] = len(listed_observations)
+            listed_observations.append(o)
+
+    lg.info("{0}: {1} registrations created or changed since {2}."
+            .format(log_ref, len(changed_observations), watermark))
+
+    return listed_observations
+
+
+def _get_watermark(listed_observations, watermark=None):
+    """The latest DtChangeTime in the list, or the given watermark if that is later."""
+
+    for o in listed_observations:
+        if o.DtChangeTime is not None and (watermark is None or o.DtChangeTime > watermark):
+            watermark = o.DtChangeTime
+
+    return watermark
+
+
+def get_all_observations(year, output='List', geohazard_tids=None, lang_key=1, max_file_age=23, max_workers=10,
+                         incremental=False, original_data=None):
     """Specialized method for getting all observations for one season (1. sept to 31. august).
     For the current season (at the time of writing, 2018-19), if request has been made the last 23hrs,
     data is retrieved from a locally stored pickle, if not, new request is made to the regObs api. Previous
     seasons are not requested if a pickle is found in local storage.
 
+    With incremental=True, an outdated pickle of the current season is not requested anew. Only registrations
+    created or changed since the last request are requested and merged into the pickle by RegID. If the sync
+    fails, the pickles are left as they were, so the next call tries again, and the stored data is returned.
+
     :param year:                [string] Eg. season '2017-18' (sept-sept) or one single year '2018'
     :param output:              [string] 'List' or 'FlatList'
     :param geohazard_tids:      [int or list of ints] Default None gives all. Note, pickle stores all,
                                 but this option returns a select
     :param lang_key             [int] 1 is norwegian, 2 is english
     :param max_file_age:        [int] hrs how old the file is before new is retrieved
+    :param max_workers:         [int] number of pages requested concurrently from the regObs api
+    :param incremental:         [bool] if True, update an outdated pickle with changes only
+    :param original_data:       [string] What the stored objects keep of the raw json. Default None uses the
+                                api config. See getobservations.retain_original_data. The 'List' pickle is
+                                written before the 'FlatList' is made from it, so with 'Compressed' it holds
+                                the forms not yet made as compressed json. With 'Drop' the forms are made,
+                                and the json dropped, before either pickle is written.
 
     :return:
     """
@@ -47,6 +106,7 @@ def get_all_observations(year, output='List', geohazard_tids=None, lang_key=1, m
     from_date, to_date = gm.get_dates_from_season(year=year)
     file_name_list = '{0}all_observations_list_{1}_lk{2}.pickle'.format(env.local_storage, year, lang_key)
     file_name_flat = '{0}all_observations_flat_{1}_lk{2}.pickle'.format(env.local_storage, year, lang_key)
+    file_name_watermark = '{0}all_observations_watermark_{1}_lk{2}.pickle'.format(env.local_storage, year, lang_key)
     get_new = True
     file_date_limit = dt.datetime.now() - dt.timedelta(hours=max_file_age)
 
@@ -70,13 +130,32 @@ def get_all_observations(year, output='List', geohazard_tids=None, lang_key=1, m
             get_new = False
 
     if get_new:
-        # When get new, get all geo hazards
-        listed_observations = go.get_all_observations(from_date=from_date, to_date=to_date,
-                                                      output='List', geohazard_tids=None, lang_key=lang_key)
-        mp.pickle_anything(listed_observations, file_name_list)
+        if incremental and os.path.exists(file_name_list) and os.path.exists(file_name_watermark):
+            watermark = mp.unpickle_anything(file_name_watermark)
+            try:
+                listed_observations = _sync_observations(from_date, to_date, file_name_list, watermark,
+                                                         lang_key=lang_key, max_workers=max_workers,
+                                                         original_data=original_data)
+                watermark = _get_watermark(listed_observations, watermark)
+            except Exception as e:
+                lg.error("getvarsompickles.py -> get_all_observations: Sync of {0} failed. Stored observations are "
+                         "returned unchanged. {1}".format(year, e))
+                listed_observations = None
 
-        flat_listed_observations = [o for lo in listed_observations for o in lo.Observations]
-        mp.pickle_anything(flat_listed_observations, file_name_flat)
+        else:
+            # When get new, get all geo hazards
+            listed_observations = go.get_all_observations(from_date=from_date, to_date=to_date,
+                                                          output='List', geohazard_tids=None, lang_key=lang_key,
+                                                          max_workers=max_workers, original_data=original_data)
+            watermark = _get_watermark(listed_observations)
+
+        if listed_observations is not None:
+            mp.pickle_anything(listed_observations, file_name_list)
+            if watermark is not None:
+                mp.pickle_anything(watermark, file_name_watermark)
+
+            flat_listed_observations = [o for lo in listed_observations for o in lo.Observations]
+            mp.pickle_anything(flat_listed_observations, file_name_flat)
 
     if output == 'List':
         all_listed_observations = mp.unpickle_anything(file_name_list)
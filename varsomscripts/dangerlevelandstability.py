@@ -66,7 +66,10 @@ def get_elevation(_id):
 def add_metadata():
     _df = pd.read_csv(r'../localstorage/ect_loc_dl_norway.csv', sep=';', index_col=0)
 
-    _df['Elevation'] = _df.apply(lambda row: get_elevation(row['RegID']), axis=1)
+    # One call for all RegIDs lets get_data query them concurrently, instead of one request pr row.
+    _reg_ids = [int(_id) for _id in _df['RegID'].unique()]
+    _elevations = {_o['RegID']: _o['ObsLocation']['Height'] for _o in go.get_data(reg_ids=_reg_ids)}
+    _df['Elevation'] = _df['RegID'].map(_elevations)
 
     _df.to_csv(r'../localstorage/ect_elev_norway.csv', sep=';', index_label='index')
 
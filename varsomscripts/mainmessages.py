@@ -143,7 +143,8 @@ def _message_no_is_in_list(message_no, main_messages):
 
 def pickle_warnings(regions, date_from, date_to, pickle_file_name):
     """All warnings and problems are selected from regObs or the avalanche api and neatly pickel'd for later use.
-    This method also gets all warnings in english for the english main message.
+    This method also gets all warnings in english for the english main message. Both languages are requested
+    together and joined on region and date by the forecast api module.
 
     :param regions:             [int or list of ints] RegionID as given in the forecast api
     :param date_from:           [date or string as yyyy-mm-dd]
@@ -153,24 +154,17 @@ def pickle_warnings(regions, date_from, date_to, pickle_file_name):
     :return:
     """
 
-    warnings = []
+    if not isinstance(regions, list):
+        regions = [regions]
 
-    # get all warning and problems for this region and then loop though them joining them on date
-    for r in regions:
-        warnings_no = gfa.get_avalanche_warnings_deprecated(r, date_from, date_to)
-        warnings_en = gfa.get_avalanche_warnings_deprecated(r, date_from, date_to, lang_key=2)
+    warnings = gfa.get_avalanche_warnings_deprecated(regions, date_from, date_to, lang_key=[1, 2])
 
-        # loop trough all the norwegian forecasts
-        for i in range(0, len(warnings_no), 1):
-
-            # add english main message with same dates
-            for k in range(0, len(warnings_en), 1):
-
-                if warnings_no[i].date == warnings_en[k].date:
-                    warnings_no[i].set_main_message_en(warnings_en[k].main_message_en)
-                    continue
-
-        warnings = warnings + warnings_no
+    # Warnings come sorted by date. Keep them region by region, as they were when requested one region at the time.
+    # AvalancheDanger gives the forecast api ids below 100 as regObs ids, i.e. 100 more, so regions are given the same.
+    region_order = {}
+    for i, region_id in enumerate(regions):
+        region_order.setdefault(region_id + 100 if region_id < 100 else region_id, i)
+    warnings.sort(key=lambda w: region_order.get(w.region_regobs_id, len(regions)))
 
     mp.pickle_anything(warnings, pickle_file_name)
 